@@ -1,9 +1,33 @@
 import streamlit as st
+from streamlit.errors import StreamlitAPIException
 import pandas as pd
 import datetime as dt
-import calendar
+import functools
+import io
+import uuid
+from collections import deque
 from pathlib import Path
 
+if int(pd.__version__.split(".")[0]) < 3: pd.set_option("mode.copy_on_write", True)   # antes de turnos.cache: instantáneas compartidas sin copia
+
+from turnos import datos
+from turnos import autocierre
+from turnos import importar
+from turnos.cache import CACHE
+from turnos.cobertura import Cobertura, reglas
+from turnos.compartido import calendario, memoria
+from turnos.conciliacion import AGRUPAR, DETALLE_COLS, conciliar, desvios, proximo_fin, tolerancias
+from turnos.exportar import exportar
+from turnos.fichadas import ahora, del_dia, emparejar, horas_por_persona, zona
+from turnos.grilla import chip_cls, mes_html
+from turnos.journal import aplicar
+from turnos.perfil import PERFIL, acumular, desglose
+from turnos.plantel import cargar_plantel
+from turnos.storage import DATASETS, get_backend, leer_config
+from turnos.calendario import (
+    DIAS, DIAS_ABBR, FALTA, MESES, CalendarStore, cambiar_libre, rango_mes, rotacion,
+)
+
 # ================== APP ==================
 st.set_page_config(page_title="Calendario 24/7 – La Lucy", layout="wide")
 st.title("📅 Calendario de Turnos – La Lucy")
@@ -31,10 +55,10 @@ section[data-testid="stSidebar"] .stButton > button{{ width:100%; white-space:no
 .ttl{{font-weight:600; font-size:.88rem; color:#111827}}
 .horas{{color:#6b7280; font-size:.82rem}}
 .chip{{display:inline-block;padding:2px 8px;border-radius:999px;font-size:.88rem;white-space:nowrap}}
-.chip-hugo{{background:#DBEAFE}} .chip-moira{{background:#EDE9FE}} .chip-brisa{{background:#FEF3C7}}
-.chip-jere{{background:#FFE4D6}} .chip-alina{{background:#FCE7F3;border:1px dashed #f472b6}}
-.chip-jony{{background:#D1FAE5}} .chip-dianela{{background:#FCE7E7}}
 .chip-warn{{background:#fee2e2;border:1px dashed #ef4444}}
+.mesgrid{{display:grid;grid-template-columns:repeat(7,minmax(0,1fr));gap:10px}}
+.daybox.vacio{{visibility:hidden}}
+.daybox.sel{{border:2px solid #6366f1}}
 .nav{{display:flex;justify-content:space-between;align-items:center;margin:6px 0 10px}}
 .nav h3{{margin:0}}
 .small{{font-size:.85rem;color:#6b7280}}
@@ -48,36 +72,54 @@ section[data-testid="stSidebar"] .stButton > button{{ width:100%; white-space:no
   .ttl{{ font-size:.9rem; }}
   .horas{{ font-size:.78rem; }}
   .chip{{ font-size:.8rem; padding:2px 7px; }}
+  .mesgrid{{ grid-template-columns:repeat(2,minmax(0,1fr)); gap:8px; }}
+  .daybox.vacio{{ display:none; }}
 }}
 </style>
 """, unsafe_allow_html=True)
 
 # ================== PERSISTENCIA ==================
 DATA_DIR = Path("data"); DATA_DIR.mkdir(exist_ok=True)
-OV_PATH      = DATA_DIR / "overrides.csv"   # cambios manuales (A/B/Libre)
-ABS_PATH     = DATA_DIR / "absences.csv"    # faltas (log)
-TASKS_PATH   = DATA_DIR / "tasks.csv"       # gestor de tareas
-TIMELOG_PATH = DATA_DIR / "timelog.csv"     # fichadas (ingreso/salida)
-
-# ================== CONSTANTES ==================
-PERSONAS = ["Hugo","Moira","Brisa","Jere","Alina","Jony","Dianela"]
-DIAS      = ["Lunes","Martes","Miércoles","Jueves","Viernes","Sábado","Domingo"]
-DIAS_ABBR = ["Lun","Mar","Mié","Jue","Vie","Sáb","Dom"]
-MESES     = ["enero","febrero","marzo","abril","mayo","junio","julio","agosto","septiembre","octubre","noviembre","diciembre"]
-HORAS_DEF = { "Mañana": ("06:00","14:00"), "Tarde": ("14:00","22:00"), "Noche": ("22:00","06:00 (+1)") }
-
-# Titulares fijos por turno
-ASIGN_DEF = {"Mañana":["Moira","Brisa"], "Tarde":["Jere","Dianela"], "Noche":["Hugo","Jony"]}
+# overrides: cambios manuales (A/B/Libre) · absences: faltas (log) · tasks: gestor de tareas
+# timelog: fichadas (ingreso/salida). CSV + journal o SQLite según config.json (ver turnos/storage.py)
+CONFIG = leer_config()
+# config.json "perfil": tiempos por rerun de lecturas, escrituras, calendario y render (ver turnos/perfil.py)
+PERFIL.configurar(CONFIG)
+SESION = st.session_state.setdefault("_sesion", uuid.uuid4().hex[:8])
+PERFIL_RERUNS = 30   # reruns recientes que muestra el panel
+
+def _guardar_perfil(r: dict | None):
+    if r is None: return
+    st.session_state.setdefault("perfil_reruns", deque(maxlen=PERFIL_RERUNS)).append(r)
+    acumular(st.session_state.setdefault("perfil_sesion", {}), r)
+    st.session_state.perfil_n = st.session_state.get("perfil_n", 0) + 1
+
+def perfilado(punto: str, pagina: str | None = None):
+    """Mide un fragmento o callback: dentro del rerun de la app como `punto`, solo como rerun propio."""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrap(*a, **k):
+            with PERFIL.suelto(pagina or punto, punto, SESION, st.session_state.get("perfil_on", False), _guardar_perfil):
+                return fn(*a, **k)
+        return wrap
+    return deco
+
+# Un rerun cortado por st.rerun() no llega al final: se cierra acá, al empezar el siguiente
+_guardar_perfil(PERFIL.cerrar(st.session_state.pop("_perfil_abierto", None), SESION, interrumpido=True))
+_perfil = PERFIL.empezar("panel", forzar=st.session_state.get("perfil_on", False))
+if _perfil is not None: st.session_state._perfil_abierto = _perfil
+STORAGE = get_backend(DATA_DIR, CONFIG)
+# personas.csv + config.json "plantel": sitios, turnos, francos y colores (ver turnos/plantel.py)
+PLANTEL = cargar_plantel(CONFIG)
+st.markdown(f"<style>{PLANTEL.css()}</style>", unsafe_allow_html=True)
+# config.json "cobertura": descanso mínimo y tope semanal para sugerir quién cubre una falta
+REGLAS = reglas(CONFIG)
+TOLERANCIAS = tolerancias(CONFIG)   # "conciliacion": minutos de tolerancia para tarde / anticipada / extra
+# Fichadas en hora local de config.json "timezone_offset_minutes", no la del servidor
+ZONA = zona(CONFIG)
+HOY = ahora(ZONA).date()
 
 # ================== HELPERS ==================
-def chip_cls(nombre: str) -> str:
-    n = str(nombre).lower()
-    if "falta cubrir" in n: return "chip-warn"
-    return {
-        "hugo":"chip-hugo","moira":"chip-moira","brisa":"chip-brisa",
-        "jere":"chip-jere","alina":"chip-alina","jony":"chip-jony","dianela":"chip-dianela"
-    }.get(n,"chip")
-
 def monday_of_week(d: dt.date) -> dt.date:
     return d - dt.timedelta(days=d.weekday())
 
@@ -86,166 +128,132 @@ def add_months(d: dt.date, m: int) -> dt.date:
     mo = (d.month - 1 + m) % 12 + 1
     return dt.date(y, mo, 1)
 
-def rango_mes(year: int, month: int):
-    first = dt.date(year, month, 1)
-    last  = dt.date(year, month, calendar.monthrange(year, month)[1])
-    return first, last
-
-# ================== GENERADOR: 1 libre/día rotando entre 7 ==================
-def generar_rango_rotativo(anchor_monday: dt.date, dias: int, offset_week: int) -> pd.DataFrame:
-    """
-    - Libre = orden[(semana + dia + offset) % 7] (incluye a Alina).
-    - Si el libre del día es titular del turno, Alina lo cubre en ese turno.
-    - Si el libre es Alina, titulares trabajan normal.
-    """
-    orden = ["Moira","Brisa","Jere","Dianela","Hugo","Jony","Alina"]
-    rows = []
-    for i in range(dias):
-        fecha = anchor_monday + dt.timedelta(days=i)
-        wd = fecha.weekday()
-        wk = (fecha - anchor_monday).days // 7
-        libre = orden[(wk + wd + offset_week) % 7]
-        for turno in ["Mañana","Tarde","Noche"]:
-            a,b = ASIGN_DEF[turno]; hi,hf = HORAS_DEF[turno]
-            if libre == a: pa,pb = "Alina", b
-            elif libre == b: pa,pb = a, "Alina"
-            else: pa,pb = a,b
-            rows.append({"Fecha":fecha,"Día":DIAS[wd],"Turno":turno,"Hora Inicio":hi,"Hora Fin":hf,
-                         "Persona A":pa,"Persona B":pb,"Libre":libre})
-    df = pd.DataFrame(rows)
-    df["__o__"] = df["Turno"].map({"Mañana":0,"Tarde":1,"Noche":2})
-    return df.sort_values(["Fecha","__o__"]).drop(columns="__o__").reset_index(drop=True)
-
 # ================== OVERRIDES / FALTAS / TAREAS / FICHADAS ==================
-def load_overrides() -> pd.DataFrame:
-    if OV_PATH.exists():
-        df = pd.read_csv(OV_PATH)
-        if "Fecha" in df: df["Fecha"] = pd.to_datetime(df["Fecha"]).dt.date
-        return df
-    return pd.DataFrame(columns=["Fecha","Turno","Persona A","Persona B","Libre"])
-
-def apply_overrides(cal: pd.DataFrame, ov: pd.DataFrame) -> pd.DataFrame:
-    if ov.empty: return cal
-    m = cal.merge(ov, on=["Fecha","Turno"], how="left", suffixes=("","_ov"))
-    for col in ["Persona A","Persona B","Libre"]:
-        if f"{col}_ov" in m.columns:
-            m[col] = m[f"{col}_ov"].fillna(m[col])
-            m.drop(columns=[f"{col}_ov"], inplace=True)
-    return m
+# Cada vista de la sesión es una copia superficial de la instantánea compartida (turnos/compartido.py).
+# Tras escribir, la sesión aplica sus filas sobre su vista (eso sí es propio) y anota la firma que
+# dejó; si después escribe otro, la firma cambia y la vista vuelve a ser la compartida.
+def _vista(key: str, name: str, loader, *rango):
+    """Carga la vista `key` si cambió el rango o si otro escribió `name` desde que se cargó."""
+    firma = (STORAGE.firma(name), rango)   # antes de leer: si escriben en el medio, se recarga la próxima
+    firmas = st.session_state.setdefault("_firmas", {})
+    if key not in st.session_state or firmas.get(key) != firma:
+        st.session_state[key] = loader(*rango)
+        firmas[key] = firma
+
+def _escrita(key: str, name: str, df: pd.DataFrame):
+    """Vista propia tras una escritura de esta sesión, vigente hasta que escriba otro."""
+    st.session_state[key] = df
+    f = st.session_state.setdefault("_firmas", {}).get(key)
+    if f is not None: st.session_state._firmas[key] = (STORAGE.firma(name), f[1])
+
+def _en_memoria(key: str, loader) -> pd.DataFrame:
+    """Vista en memoria del dataset: la de la sesión si ya está cargada."""
+    return st.session_state[key] if key in st.session_state else loader()
+
+def load_overrides(first: dt.date | None = None, last: dt.date | None = None) -> pd.DataFrame:
+    return datos.load_overrides(STORAGE, first, last)
+
+def _upsert_overrides(rows: list[dict]):
+    rows = CAL.escribir_overrides(rows)   # store y coberturas compartidos: sólo las filas del día (completas)
+    _escrita("overrides", "overrides", aplicar(_en_memoria("overrides", load_overrides), "upsert",
+                                               pd.DataFrame(rows), DATASETS["overrides"].key))
 
 def save_overrides_for_day(fecha: dt.date, valores: dict, libre_override=None):
-    ov = load_overrides()
-    for t in ["Mañana","Tarde","Noche"]:
-        row = {"Fecha":fecha,"Turno":t,"Persona A":valores[t]["A"],"Persona B":valores[t]["B"]}
-        if libre_override is not None: row["Libre"]=libre_override
-        mask = (ov["Fecha"]==fecha)&(ov["Turno"]==t)
-        if mask.any():
-            for k,v in row.items(): ov.loc[mask,k]=v
-        else:
-            ov = pd.concat([ov,pd.DataFrame([row])], ignore_index=True)
-    ov.to_csv(OV_PATH, index=False)
-    st.session_state.overrides = ov
+    _upsert_overrides(datos.filas_overrides_dia(fecha, valores, libre_override))
 
 def set_libre_override_for_day(fecha: dt.date, nuevo_libre: str):
-    ov = load_overrides()
-    for t in ["Mañana","Tarde","Noche"]:
-        mask=(ov["Fecha"]==fecha)&(ov["Turno"]==t)
-        if mask.any(): ov.loc[mask,"Libre"]=nuevo_libre
-        else: ov = pd.concat([ov,pd.DataFrame([{"Fecha":fecha,"Turno":t,"Libre":nuevo_libre}])], ignore_index=True)
-    ov.to_csv(OV_PATH, index=False)
-    st.session_state.overrides = ov
-
-def load_absences() -> pd.DataFrame:
-    if ABS_PATH.exists():
-        df = pd.read_csv(ABS_PATH)
-        df["Fecha"] = pd.to_datetime(df["Fecha"]).dt.date
-        return df
-    return pd.DataFrame(columns=["Fecha","Turno","Slot","Persona","Motivo","LoggedAt"])
+    _upsert_overrides(datos.filas_libre_dia(fecha, nuevo_libre, SITIO.turnos))
+
+def load_absences(first: dt.date | None = None, last: dt.date | None = None) -> pd.DataFrame:
+    return datos.load_absences(STORAGE, first, last)
 
 def append_absence(rec: dict):
-    df = load_absences()
-    df = pd.concat([df, pd.DataFrame([rec])], ignore_index=True)
-    df.to_csv(ABS_PATH, index=False)
-    st.session_state.absences = df
+    CAL.registrar_falta(rec)
+    _escrita("absences", "absences", aplicar(_en_memoria("absences", load_absences), "add", pd.DataFrame([rec]), None))
 
 def remove_absences_for_day_if_present(fecha: dt.date, personas_presentes: set):
-    df = load_absences()
-    if df.empty: return
-    keep = ~((df["Fecha"]==fecha) & (df["Persona"].isin(list(personas_presentes))))
-    df = df[keep].copy()
-    df.to_csv(ABS_PATH, index=False)
-    st.session_state.absences = df
+    dels = CAL.quitar_faltas(fecha, personas_presentes)
+    if dels.empty: return
+    _escrita("absences", "absences", aplicar(_en_memoria("absences", load_absences), "del", dels, DATASETS["absences"].key))
+
+def cobertura_mes(fecha: dt.date) -> Cobertura:
+    """Disponibilidad del mes de `fecha`, compartida entre sesiones (la actualizan overrides y faltas)."""
+    return CAL.cobertura(fecha)
 
 def load_tasks() -> pd.DataFrame:
-    if TASKS_PATH.exists():
-        df = pd.read_csv(TASKS_PATH)
-        if "Fecha" in df: df["Fecha"] = pd.to_datetime(df["Fecha"]).dt.date
-        if "Due" in df: df["Due"] = pd.to_datetime(df["Due"], errors="coerce").dt.date
-        return df
-    return pd.DataFrame(columns=["id","Fecha","Turno","Persona","Titulo","Estado","Due","CreatedAt"])
+    return datos.load_tasks(STORAGE)
 
 def save_tasks(df: pd.DataFrame):
-    df.to_csv(TASKS_PATH, index=False)
-    st.session_state.tasks = df
-
-def load_timelog() -> pd.DataFrame:
-    if TIMELOG_PATH.exists():
-        df = pd.read_csv(TIMELOG_PATH)
-        if "Fecha" in df: df["Fecha"] = pd.to_datetime(df["Fecha"]).dt.date
-        if "Timestamp" in df: df["Timestamp"] = pd.to_datetime(df["Timestamp"], errors="coerce")
-        return df
-    return pd.DataFrame(columns=["id","Fecha","Persona","Tipo","Timestamp","Turno","Fuente"])
+    datos.save_tasks(STORAGE, df)
+    _escrita("tasks", "tasks", df)
+
+def add_task(row: dict, clave: str | None = None) -> dict:
+    row = datos.add_task(STORAGE, row, clave)
+    if not row.get("_repetida"):
+        _escrita("tasks", "tasks", aplicar(_en_memoria("tasks", load_tasks), "add", pd.DataFrame([row]), None))
+    return row
+
+def commit_tasks(estados: list[dict], borrados: list[dict]):
+    estados = datos.commit_tasks(STORAGE, estados, borrados)
+    key = DATASETS["tasks"].key
+    tasks = _en_memoria("tasks", load_tasks)
+    if estados: tasks = aplicar(tasks, "upsert", pd.DataFrame(estados), key)
+    if borrados: tasks = aplicar(tasks, "del", pd.DataFrame(borrados), key)
+    _escrita("tasks", "tasks", tasks)
+
+def load_timelog(first: dt.date | None = None, last: dt.date | None = None) -> pd.DataFrame:
+    return datos.load_timelog(STORAGE, first, last)
 
 def save_timelog(df: pd.DataFrame):
-    df.to_csv(TIMELOG_PATH, index=False)
-    st.session_state.timelog = df
-
-def append_timelog(row: dict):
-    """Normaliza Timestamp a datetime y agrega una fila al timelog."""
-    df = load_timelog()
-    # 🔒 normalizar timestamp a datetime
-    if "Timestamp" in row:
-        row["Timestamp"] = pd.to_datetime(row["Timestamp"], errors="coerce")
-    else:
-        row["Timestamp"] = pd.Timestamp.now()
+    datos.save_timelog(STORAGE, df)
+    _escrita("timelog", "timelog", df)
 
-    # id incremental robusto
-    if df.empty or "id" not in df.columns:
-        new_id = 1
-    else:
-        _ids = pd.to_numeric(df["id"], errors="coerce")
-        new_id = (int(_ids.max()) if _ids.notna().any() else 0) + 1
+def append_timelog(row: dict, clave: str | None = None) -> dict:
+    row = datos.append_timelog(STORAGE, row, tz=ZONA, clave=clave)
+    if not row.get("_repetida"):
+        _escrita("timelog", "timelog", aplicar(_en_memoria("timelog", load_timelog), "add", pd.DataFrame([row]), None))
+    return row
+
+def editar_fichada(fila: dict, cambios: dict, por: str, observaciones: str | None = None):
+    nueva = datos.editar_fichada(STORAGE, fila, cambios, por, observaciones, tz=ZONA)
+    _escrita("timelog", "timelog", aplicar(_en_memoria("timelog", load_timelog), "upsert", pd.DataFrame([nueva]),
+                                           DATASETS["timelog"].key))
 
-    row["id"] = new_id
-    df = pd.concat([df, pd.DataFrame([row])], ignore_index=True)
-    save_timelog(df)
+def eliminar_fichada(fila: dict, por: str, motivo: str):
+    datos.eliminar_fichada(STORAGE, fila, por, motivo, tz=ZONA)
+    _escrita("timelog", "timelog", aplicar(_en_memoria("timelog", load_timelog), "del",
+                                           pd.DataFrame([{"id": int(fila["id"])}]), DATASETS["timelog"].key))
 
 # ================== CONFIG ==================
-c1,c2,c3 = st.columns([1.6,1,1])
+c0,c1,c2,c3 = st.columns([1,1.6,1,1]) if len(PLANTEL.sitios) > 1 else (None, *st.columns([1.6,1,1]))
+if c0 is not None:
+    with c0: sitio_sel = st.selectbox("Sitio", [s.nombre for s in PLANTEL.sitios], key="cfg_sitio")
+else:
+    sitio_sel = PLANTEL.sitio().nombre
+SITIO = PLANTEL.sitio(sitio_sel)
+PERSONAS_SITIO = PLANTEL.activos(SITIO.nombre)
 with c1:
-    hoy = dt.date.today()
-    fecha_anchor = st.date_input("Inicio de rotación (usa el lunes de esa semana)", value=hoy, key="cfg_fecha")
-    meses_prec = st.number_input("Meses a generar hacia delante", 1, 12, 6, 1, key="cfg_meses")
+    hoy = HOY
+    rot_anchor, rot_offset = rotacion(CONFIG, hoy)   # lo mismo que usa el kiosco
+    fecha_anchor = st.date_input("Inicio de rotación (usa el lunes de esa semana)", value=rot_anchor, key="cfg_fecha")
 with c2:
-    offset_week = st.number_input("Offset rotación semanal (0–6)", 0, 100, 0, key="cfg_offset_week")
+    offset_week = st.number_input("Offset rotación semanal (0–6)", 0, 100, rot_offset, key="cfg_offset_week")
 with c3:
-    st.caption("1 libre por día (entre los 7). Alina cubre al titular libre del día.")
+    st.caption(f"{len(SITIO.cobertura)} libre(s) por día (entre {len(SITIO.orden_libre)}). "
+               f"{', '.join(SITIO.cobertura) or 'Nadie'} cubre al titular libre del día.")
 
 if "config" not in st.session_state:
     st.session_state.config = {}
 
-cfg = dict(anchor=monday_of_week(fecha_anchor), meses=int(meses_prec), offset=int(offset_week))
+cfg = dict(anchor=monday_of_week(fecha_anchor), offset=int(offset_week), sitio=SITIO)
 
-if (st.session_state.config != cfg) or ("cal" not in st.session_state):
+# Calendario y coberturas compartidos por todas las sesiones con el mismo sitio y rotación;
+# los meses se generan recién cuando alguien los mira (grilla, stats o fichadas)
+CAL = calendario(STORAGE, SITIO, cfg["anchor"], cfg["offset"], PERSONAS_SITIO, REGLAS)
+if st.session_state.config != cfg:
     st.session_state.config = cfg
-    anchor = cfg["anchor"]
-    dias = 31 * cfg["meses"] + 14
-    base_cal = generar_rango_rotativo(anchor, dias, cfg["offset"])
-    st.session_state.overrides = load_overrides()
-    st.session_state.absences = load_absences()
-    st.session_state.tasks = load_tasks()
-    st.session_state.timelog = load_timelog()
-    st.session_state.cal = apply_overrides(base_cal, st.session_state.overrides)
+    st.session_state.pop("selected_day", None)
+st.session_state.cal = CAL.store
 
 # Estado de mes actual
 if "cur_month" not in st.session_state:
@@ -255,6 +263,16 @@ if "cur_month" not in st.session_state:
 cur = st.session_state.cur_month
 first, last = rango_mes(cur.year, cur.month)
 
+# Ingresos olvidados (config.json "workday_auto_close"): cambia la firma del timelog y la vista se recarga
+autocierre.programado(STORAGE, CONFIG, PLANTEL.duraciones(), ZONA)
+STORAGE.rotar_meses_cerrados(HOY)   # con archivo mensual: al cambiar el mes, el anterior pasa a Parquet
+
+# Vistas del mes visible: sólo se consulta first..last (con SQLite, vía índice por Fecha)
+_vista("overrides", "overrides", load_overrides, first, last)
+_vista("absences", "absences", load_absences, first, last)
+_vista("timelog", "timelog", load_timelog, first, last)
+_vista("tasks", "tasks", load_tasks)
+
 # ================== APLICAR CAMBIOS PENDIENTES ==================
 _pending = st.session_state.get("_pending_set", {})
 if _pending:
@@ -265,163 +283,226 @@ if _pending_abs:
     for rec in _pending_abs: append_absence(rec)
     st.session_state["_pending_abs"] = []
 
-# ================== TABS ==================
-tab_cal, tab_stats, tab_tasks, tab_clock = st.tabs(["📆 Calendario", "📊 Faltas & Horas", "🗂️ Tareas", "⏱️ Fichadas"])
-
-# ================== CALENDARIO ==================
-with tab_cal:
-    # NAV
-    nav_l, nav_c, nav_r = st.columns([1,6,1])
-    with nav_l:
-        if st.button("◀ Mes anterior"):
-            st.session_state.cur_month = add_months(cur, -1); st.rerun()
-    with nav_c:
-        st.markdown(f"<div class='nav'><h3>{MESES[cur.month-1].capitalize()} {cur.year}</h3></div>", unsafe_allow_html=True)
-    with nav_r:
-        if st.button("Mes siguiente ▶"):
-            st.session_state.cur_month = add_months(cur, +1); st.rerun()
-
-    # Helpers editor
-    def libre_del_dia(fecha: dt.date) -> str:
-        sub = st.session_state.cal[st.session_state.cal["Fecha"]==fecha]
-        return "" if sub.empty else str(sub.iloc[0]["Libre"])
-
-    # Editor lateral (✎)
+# El editor deja dos claves por turno de cada día que abre (sb_{día}_{turno}_A/B) y el selector
+# de día una por mes visto: sólo quedan las del día abierto y la del mes visible.
+_abierto = st.session_state.get("selected_day")
+_vivo = f"sb_{_abierto.isoformat()}_" if _abierto else None
+for _k in [k for k in st.session_state if isinstance(k, str) and (
+        k.startswith("sb_") and not (_vivo and k.startswith(_vivo)) or k.startswith("dia_sel_") and k != f"dia_sel_{first}")]:
+    del st.session_state[_k]
+
+# ================== EDITOR LATERAL (✎) ==================
+# Cambiar A/B sólo re-ejecuta el editor; Falta, Guardar y Cerrar afectan la grilla y reejecutan la app.
+@st.fragment
+@perfilado("render editor", "fragmento editor")
+def editor_dia(first: dt.date):
+    store: CalendarStore = st.session_state.cal
     if "selected_day" in st.session_state and st.session_state.selected_day:
         sel: dt.date = st.session_state.selected_day
         iso = sel.isoformat()
-        st.sidebar.header(f"Editar {DIAS[sel.weekday()]} {sel.strftime('%d/%m/%Y')}")
-        df_day = st.session_state.cal[st.session_state.cal["Fecha"]==sel]
-        if not df_day.empty:
+        st.header(f"Editar {DIAS[sel.weekday()]} {sel.strftime('%d/%m/%Y')}")
+        turnos_dia = store.dia(sel)
+        if turnos_dia:
             valores = {}
-            opts = PERSONAS + ["⚠ Falta cubrir"]
-            libre_hoy = libre_del_dia(sel)
-            st.sidebar.caption(f"Libre hoy (planificado): **{libre_hoy}** — Si alguien falta, cubre el libre y el libre pasa a ser el ausente.")
-            for t in ["Mañana","Tarde","Noche"]:
-                row = df_day[df_day["Turno"]==t].iloc[0]
-                st.sidebar.subheader(t)
+            opts = PERSONAS_SITIO + [FALTA]
+            libre_hoy = store.libre(sel)
+            libres = store.libres(sel)
+            cob = cobertura_mes(sel)
+            elegidos = {st.session_state.get(f"sb_{iso}_{tt}_{s}") for tt in turnos_dia for s in "AB"}
+            st.caption(f"Libre hoy (planificado): **{libre_hoy}** — Si alguien falta, cubre el primer sugerido "
+                       "(sin quedar sin descanso ni pisarse con otro turno); si era libre, el libre pasa a ser el ausente. "
+                       "Si nadie puede cubrir, el turno queda en Falta cubrir y el libre no cambia.")
+            for t in turnos_dia:
+                row = turnos_dia[t]
+                st.subheader(t)
+                sug = cob.candidatos(sel, t)
+                sug = sug[~sug["Persona"].isin(elegidos)]
+                cubre = sug["Persona"].iat[0] if len(sug) else FALTA
+                st.caption("Sugeridos: " + (" · ".join(f"{p} ({h:g} h sem.{', extra' if m else ''})"
+                                                       for p, h, m in sug.head(3).itertuples(index=False)) or "nadie disponible"))
 
                 # A
                 keyA = f"sb_{iso}_{t}_A"
                 if keyA not in st.session_state:
                     st.session_state[keyA] = str(row["Persona A"]) if str(row["Persona A"]) in opts else opts[0]
-                cA,cA_btn = st.sidebar.columns([3,1])
+                cA,cA_btn = st.columns([3,1])
                 with cA:
                     st.caption("A")
                     st.selectbox(f"A_{t}", opts, key=keyA, label_visibility="collapsed")
                 with cA_btn:
                     if st.button("Falta A", key=f"faltA_{iso}_{t}"):
                         aus = str(row["Persona A"])
-                        st.session_state.setdefault("_pending_set", {})[keyA] = libre_hoy if libre_hoy else "⚠ Falta cubrir"
-                        if aus: set_libre_override_for_day(sel, aus)
+                        st.session_state.setdefault("_pending_set", {})[keyA] = cubre
+                        if aus and cubre != FALTA: set_libre_override_for_day(sel, cambiar_libre(libres, cubre, aus))
                         st.session_state.setdefault("_pending_abs", []).append({
                             "Fecha": sel, "Turno": t, "Slot":"A", "Persona": aus,
-                            "Motivo":"FALTA", "LoggedAt": dt.datetime.now().isoformat(timespec="seconds")
+                            "Motivo":"FALTA", "LoggedAt": ahora(ZONA).isoformat(timespec="seconds")
                         }); st.rerun()
 
                 # B
                 keyB = f"sb_{iso}_{t}_B"
                 if keyB not in st.session_state:
                     st.session_state[keyB] = str(row["Persona B"]) if str(row["Persona B"]) in opts else opts[0]
-                cB,cB_btn = st.sidebar.columns([3,1])
+                cB,cB_btn = st.columns([3,1])
                 with cB:
                     st.caption("B")
                     st.selectbox(f"B_{t}", opts, key=keyB, label_visibility="collapsed")
                 with cB_btn:
                     if st.button("Falta B", key=f"faltB_{iso}_{t}"):
                         aus = str(row["Persona B"])
-                        st.session_state.setdefault("_pending_set", {})[keyB] = libre_hoy if libre_hoy else "⚠ Falta cubrir"
-                        if aus: set_libre_override_for_day(sel, aus)
+                        st.session_state.setdefault("_pending_set", {})[keyB] = cubre
+                        if aus and cubre != FALTA: set_libre_override_for_day(sel, cambiar_libre(libres, cubre, aus))
                         st.session_state.setdefault("_pending_abs", []).append({
                             "Fecha": sel, "Turno": t, "Slot":"B", "Persona": aus,
-                            "Motivo":"FALTA", "LoggedAt": dt.datetime.now().isoformat(timespec="seconds")
+                            "Motivo":"FALTA", "LoggedAt": ahora(ZONA).isoformat(timespec="seconds")
                         }); st.rerun()
 
                 valores[t] = {"A":st.session_state[keyA], "B":st.session_state[keyB]}
 
-            if st.sidebar.button("💾 Guardar cambios", key=f"save_{iso}"):
-                df = st.session_state.cal
-                for t in ["Mañana","Tarde","Noche"]:
-                    a,b = valores[t]["A"], valores[t]["B"]
-                    idx = df[(df["Fecha"]==sel)&(df["Turno"]==t)].index
-                    if not idx.empty: df.at[idx[0],"Persona A"]=a; df.at[idx[0],"Persona B"]=b
-                st.session_state.cal = df
-                libre_actual = libre_del_dia(sel)
+            if st.button("💾 Guardar cambios", key=f"save_{iso}"):
+                libre_actual = store.libre(sel)
                 save_overrides_for_day(sel, valores, libre_override=libre_actual)
-                presentes = {valores[t]["A"] for t in ["Mañana","Tarde","Noche"]} | {valores[t]["B"] for t in ["Mañana","Tarde","Noche"]}
-                presentes.discard("⚠ Falta cubrir"); presentes.discard("")
+                presentes = {v["A"] for v in valores.values()} | {v["B"] for v in valores.values()}
+                presentes.discard(FALTA); presentes.discard("")
                 remove_absences_for_day_if_present(sel, presentes)
-                st.sidebar.success("Guardado."); st.rerun()
-
-        if st.sidebar.button("Cerrar editor", key=f"close_{iso}"):
-            st.session_state.selected_day = None; st.rerun()
-
-    # --------- DATAFRAME del mes (con overrides) ---------
-    cal = apply_overrides(st.session_state.cal, st.session_state.overrides if "overrides" in st.session_state else load_overrides())
-
-    # --- RENDER DEL MES SIN ENCABEZADO DE DÍAS ---
-    day = first
-    while day <= last:
-        cols = st.columns(7)
-        start_wd = day.weekday()
-        i = 0
-        # Huecos iniciales
-        for _ in range(start_wd):
-            cols[i].empty()
-            i += 1
-
-        # Pintar días
-        while i < 7 and day <= last:
-            with cols[i]:
-                try:
-                    card = st.container(border=True)
-                except TypeError:
-                    card = st.container()
-                with card:
-                    numero = day.day
-
-                    # Botón editar
-                    if st.button("✎ Editar", key=f"edit_{day.isoformat()}"):
-                        st.session_state.selected_day = day
-                        st.rerun()
-
-                    # Título del casillero (día abreviado + número)
-                    st.markdown(
-                        f"<div class='dayhead'><span class='daynum'>{DIAS_ABBR[day.weekday()]} {numero}</span></div>",
-                        unsafe_allow_html=True
-                    )
-
-                    sub = cal[cal["Fecha"] == day]
-                    if sub.empty:
-                        st.caption("—")
-                    else:
-                        libre_hoy = str(sub.iloc[0]["Libre"])
-                        st.markdown(f"<div class='small'>🟢 Libre: {libre_hoy}</div>", unsafe_allow_html=True)
-
-                        for t in ["Mañana", "Tarde", "Noche"]:
-                            row = sub[sub["Turno"] == t]
-                            if row.empty:
-                                continue
-                            a = str(row.iloc[0]["Persona A"]); b = str(row.iloc[0]["Persona B"])
-                            hi = row.iloc[0]["Hora Inicio"]; hf = row.iloc[0]["Hora Fin"]
-
-                            st.markdown(
-                                f"<div class='row'><span class='ttl'>{t}</span> "
-                                f"<span class='horas'>({hi}–{hf})</span></div>",
-                                unsafe_allow_html=True
-                            )
-                            st.markdown(
-                                f"<div class='row'>"
-                                f"<span class='chip {chip_cls(a)}'>{a}</span>"
-                                f"<span class='chip {chip_cls(b)}'>{b}</span>"
-                                f"</div>",
-                                unsafe_allow_html=True
-                            )
-            i += 1
-            day += dt.timedelta(days=1)
+                st.success("Guardado."); st.rerun()
+
+        if st.button("Cerrar editor", key=f"close_{iso}"):
+            st.session_state.selected_day = None
+            st.session_state.pop(f"dia_sel_{first}", None); st.rerun()
+
+with st.sidebar:
+    editor_dia(first)
+
+# ================== TABS ==================
+# Cada pestaña es un fragmento: sus widgets re-ejecutan sólo esa pestaña. Lo que cambia datos de
+# otras pestañas (mes visible, día elegido, overrides/faltas) pide un rerun de toda la app.
+def _rerun_tab():
+    """Rerun del fragmento en curso; fuera de un rerun de fragmento (p. ej. AppTest), de toda la app."""
+    try: st.rerun(scope="fragment")
+    except StreamlitAPIException: st.rerun()
+
+tab_cal, tab_stats, tab_tasks, tab_clock = st.tabs(["📆 Calendario", "📊 Faltas & Horas", "🗂️ Tareas", "⏱️ Fichadas"])
+
+# ================== CALENDARIO ==================
+@st.fragment
+@perfilado("render calendario", "fragmento calendario")
+def tab_calendario(cur: dt.date, first: dt.date, last: dt.date):
+    # NAV
+    nav_l, nav_c, nav_r = st.columns([1,6,1])
+    with nav_l:
+        if st.button("◀ Mes anterior"):
+            st.session_state.cur_month = add_months(cur, -1); st.rerun()
+    with nav_c:
+        st.markdown(f"<div class='nav'><h3>{MESES[cur.month-1].capitalize()} {cur.year}</h3></div>", unsafe_allow_html=True)
+    with nav_r:
+        if st.button("Mes siguiente ▶"):
+            st.session_state.cur_month = add_months(cur, +1); st.rerun()
+
+    store: CalendarStore = st.session_state.cal
+
+    vista_cal = st.radio("Vista", ["Compacta", "Casilleros"], horizontal=True, key="cal_vista",
+                         help="Compacta: el mes en un solo bloque. Casilleros: un botón ✎ por día.")
+
+    # --- RENDER COMPACTO: un solo bloque HTML y un único selector de día ---
+    if vista_cal == "Compacta":
+        def _elegir_dia(key: str):
+            st.session_state.selected_day = st.session_state[key]
+            st.session_state._dia_elegido = True
+
+        dias_mes = [first + dt.timedelta(days=k) for k in range((last - first).days + 1)]
+        st.selectbox("✎ Editar día", [None] + dias_mes, key=f"dia_sel_{first}", on_change=_elegir_dia, args=(f"dia_sel_{first}",),
+                     format_func=lambda d: "—" if d is None else f"{DIAS[d.weekday()]} {d.day}")
+        if st.session_state.pop("_dia_elegido", False): st.rerun()   # el editor vive fuera del fragmento
+        st.markdown(mes_html(store, first, last, st.session_state.get("selected_day")), unsafe_allow_html=True)
+    else:
+        # --- RENDER POR CASILLEROS (widgets por día, alternativa) ---
+        day = first
+        while day <= last:
+            cols = st.columns(7)
+            start_wd = day.weekday()
+            i = 0
+            # Huecos iniciales
+            for _ in range(start_wd):
+                cols[i].empty()
+                i += 1
+
+            # Pintar días
+            while i < 7 and day <= last:
+                with cols[i]:
+                    try:
+                        card = st.container(border=True)
+                    except TypeError:
+                        card = st.container()
+                    with card:
+                        numero = day.day
+
+                        # Botón editar
+                        if st.button("✎ Editar", key=f"edit_{day.isoformat()}"):
+                            st.session_state.selected_day = day
+                            st.rerun()
+
+                        # Título del casillero (día abreviado + número)
+                        st.markdown(
+                            f"<div class='dayhead'><span class='daynum'>{DIAS_ABBR[day.weekday()]} {numero}</span></div>",
+                            unsafe_allow_html=True
+                        )
+
+                        # Lookup O(1) en el store (ya tiene los overrides aplicados)
+                        turnos_dia = store.dia(day)
+                        if not turnos_dia:
+                            st.caption("—")
+                        else:
+                            libre_hoy = store.libre(day)
+                            st.markdown(f"<div class='small'>🟢 Libre: {libre_hoy}</div>", unsafe_allow_html=True)
+
+                            for t, row in turnos_dia.items():
+                                a = str(row["Persona A"]); b = str(row["Persona B"])
+                                hi = row["Hora Inicio"]; hf = row["Hora Fin"]
+
+                                st.markdown(
+                                    f"<div class='row'><span class='ttl'>{t}</span> "
+                                    f"<span class='horas'>({hi}–{hf})</span></div>",
+                                    unsafe_allow_html=True
+                                )
+                                st.markdown(
+                                    f"<div class='row'>"
+                                    f"<span class='chip {chip_cls(a)}'>{a}</span>"
+                                    f"<span class='chip {chip_cls(b)}'>{b}</span>"
+                                    f"</div>",
+                                    unsafe_allow_html=True
+                                )
+                i += 1
+                day += dt.timedelta(days=1)
+
+with tab_cal:
+    tab_calendario(cur, first, last)
 
 # ================== FALTAS & HORAS ==================
-with tab_stats:
+PERIODOS = {
+    "Mes visible":      lambda first, last: (first, last),
+    "Año a la fecha":   lambda first, last: (dt.date(HOY.year, 1, 1), HOY),
+    "Últimos 12 meses": lambda first, last: (add_months(dt.date(HOY.year, HOY.month, 1), -11), HOY),
+}
+
+def _conciliacion(p0: dt.date, p1: dt.date) -> pd.DataFrame:
+    """
+    conciliar del período, guardado en la sesión: cambiar Agrupar o Persona sólo rearma la vista.
+    Se recalcula si otro escribió fichadas, faltas u overrides, o si terminó otro turno del plan.
+    """
+    momento = ahora(ZONA).replace(tzinfo=None)
+    clave = (p0, p1, STORAGE.firma("timelog"), STORAGE.firma("absences"), STORAGE.firma("overrides"))
+    memo = st.session_state.get("_conciliacion")
+    if memo is None or memo[0] != clave or None in clave[2:] or (memo[1] is not None and momento >= memo[1]):
+        cal = CAL.store.rango(p0, p1)
+        detalle = conciliar(cal, load_timelog(p0 - dt.timedelta(days=1), p1 + dt.timedelta(days=1)),
+                            p0, p1, load_absences(p0, p1), TOLERANCIAS, momento=momento)
+        memo = st.session_state._conciliacion = (clave, proximo_fin(cal, momento), detalle)
+    return memo[2]
+
+@st.fragment
+@perfilado("render faltas y horas", "fragmento faltas y horas")
+def tab_faltas_horas(first: dt.date, last: dt.date):
     st.subheader("Registro de faltas")
     abs_df = st.session_state.absences if "absences" in st.session_state else load_absences()
     if not abs_df.empty:
@@ -430,24 +511,74 @@ with tab_stats:
     else:
         st.info("Aún no hay faltas registradas.")
 
+    # Totales del período desde los acumulados por día/mes: un año suma 12 totales mensuales
     st.markdown("---")
-    st.subheader("Horas trabajadas (mes visible)")
-    cal_mes = apply_overrides(st.session_state.cal, st.session_state.overrides if "overrides" in st.session_state else load_overrides())
-    cal_mes = cal_mes[(cal_mes["Fecha"]>=first) & (cal_mes["Fecha"]<=last)].copy()
-    if cal_mes.empty:
-        st.info("Sin datos del mes.")
+    st.subheader("Faltas y horas por período")
+    periodo = st.radio("Período", list(PERIODOS), horizontal=True, key="fh_periodo")
+    p0, p1 = PERIODOS[periodo](first, last)
+    st.caption(f"Del {p0:%d/%m/%Y} al {p1:%d/%m/%Y}. Horas fichadas: pares Ingreso→Salida, en el día del Ingreso.")
+    plan = CAL.plan.rango(p0, p1).set_index("Persona")["Horas"]
+    fich = datos.horas_fichadas(STORAGE, HOY).rango(p0, p1).set_index("Persona")["Horas"]
+    faltas = datos.faltas_acumuladas(STORAGE).rango(p0, p1)
+    quienes = [p for p in PERSONAS_SITIO if p in plan.index or p in fich.index] + sorted(set(plan.index) - set(PERSONAS_SITIO))
+    if not quienes:
+        st.info("Sin horas en el período.")
+    else:
+        horas = pd.DataFrame({"Planificadas": plan, "Fichadas": fich}).reindex(quienes).fillna(0.0)
+        horas["Diferencia"] = horas["Fichadas"] - horas["Planificadas"]
+        st.dataframe(horas.rename_axis("Persona").round(2), use_container_width=True)
+    if faltas.empty:
+        st.caption("Sin faltas en el período.")
     else:
-        longA = cal_mes[["Fecha","Turno","Persona A"]].rename(columns={"Persona A":"Persona"})
-        longB = cal_mes[["Fecha","Turno","Persona B"]].rename(columns={"Persona B":"Persona"})
-        long = pd.concat([longA,longB], ignore_index=True)
-        long = long[long["Persona"].notna()]
-        long = long[long["Persona"]!="⚠ Falta cubrir"]
-        long["Horas"] = 8
-        horas = long.groupby("Persona", as_index=False)["Horas"].sum().sort_values("Horas", ascending=False)
-        st.dataframe(horas, use_container_width=True)
+        tabla = faltas.pivot_table(index="Persona", columns="Turno", values="Faltas", aggfunc="sum", fill_value=0)
+        tabla["Total"] = tabla.sum(axis=1)
+        st.caption("Faltas por persona y turno")
+        st.dataframe(tabla.sort_values("Total", ascending=False).astype(int), use_container_width=True)
+    if (p0.year, p0.month) != (p1.year, p1.month):
+        mes = lambda a: a.por_mes(p0, p1).groupby("Mes")[a.valor].sum()
+        st.caption("Por mes")
+        st.dataframe(pd.DataFrame({"Planificadas": mes(CAL.plan), "Fichadas": mes(datos.horas_fichadas(STORAGE, HOY)),
+                                   "Faltas": mes(datos.faltas_acumuladas(STORAGE))}).fillna(0).round(2),
+                     use_container_width=True)
+
+    # Plan vs fichadas: cada turno planificado contra sus fichadas (sólo los que ya terminaron)
+    st.markdown("---")
+    st.subheader("Plan vs fichadas")
+    st.caption(f"Tolerancia: {TOLERANCIAS.tarde_min:g} min para llegar tarde, {TOLERANCIAS.anticipada_min:g} para salir antes, "
+               f"{TOLERANCIAS.extra_min:g} de horas extra. Turnos seguidos de una persona cuentan como uno.")
+    detalle = _conciliacion(p0, p1)
+    agrupar = st.radio("Agrupar", list(AGRUPAR), index=1, horizontal=True, key="conc_agrupar")
+    if detalle.empty: st.info("Sin turnos ni fichadas en el período.")
+    else: st.dataframe(desvios(detalle, AGRUPAR[agrupar]), use_container_width=True, hide_index=True)
+    desv = detalle[detalle["Estado"] != "ok"]
+    with st.expander(f"Turnos con desvíos ({len(desv)})"):
+        quien = st.selectbox("Persona", ["Todas", *sorted(desv["Persona"].unique())], key="conc_persona")
+        if quien != "Todas": desv = desv[desv["Persona"] == quien]
+        st.dataframe(desv.round({c: 2 for c in DETALLE_COLS if c.startswith("Horas")}), use_container_width=True, hide_index=True)
+
+    st.markdown("---")
+    with st.expander("⬇️ Exportar a Excel (liquidación)"):
+        rango = st.date_input("Rango", value=(first, last), key="exp_rango", format="DD/MM/YYYY")
+        if st.button("Generar Excel", key="exp_generar") and len(rango) == 2:
+            buf = io.BytesIO()
+            cfg = st.session_state.config
+            with st.spinner("Generando…"):
+                exportar(STORAGE, buf, rango[0], rango[1], cfg["anchor"], cfg["offset"], PLANTEL)
+            st.session_state._export = (f"liquidacion_{rango[0]}_{rango[1]}.xlsx", buf.getvalue())
+        if "_export" in st.session_state:
+            nombre, contenido = st.session_state._export
+            st.download_button(f"Descargar {nombre}", contenido, file_name=nombre, key="exp_descargar",
+                               mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+
+with tab_stats:
+    tab_faltas_horas(first, last)
 
 # ================== TAREAS ==================
-with tab_tasks:
+TAREAS_POR_PAG = 50
+
+@st.fragment
+@perfilado("render tareas", "fragmento tareas")
+def tab_tareas(first: dt.date, last: dt.date):
     st.subheader("Gestor de tareas")
     tasks = st.session_state.tasks if "tasks" in st.session_state else load_tasks()
 
@@ -455,49 +586,72 @@ with tab_tasks:
     with c_add:
         st.markdown("**Nueva tarea**")
         default_date = st.session_state.get("selected_day", st.session_state.cur_month)
-        t_fecha = st.date_input("Fecha", value=default_date, key="task_fecha")
-        t_turno = st.selectbox("Turno (opcional)", ["", "Mañana","Tarde","Noche"], index=0, key="task_turno")
-        t_persona = st.selectbox("Persona (opcional)", [""] + PERSONAS, index=0, key="task_persona")
-        t_titulo = st.text_input("Título de la tarea", key="task_titulo")
-        t_due = st.date_input("Vence (opcional)", value=default_date, key="task_due")
-        if st.button("➕ Agregar tarea"):
-            if not t_titulo.strip():
-                st.warning("Poné un título para la tarea.")
-            else:
-                if tasks.empty or "id" not in tasks.columns:
-                    new_id = 1
-                else:
-                    _ids = pd.to_numeric(tasks["id"], errors="coerce")
-                    new_id = (int(_ids.max()) if _ids.notna().any() else 0) + 1
-
-                row = {"id":new_id,"Fecha":t_fecha,"Turno":t_turno if t_turno else "","Persona":t_persona if t_persona else "",
-                       "Titulo":t_titulo.strip(),"Estado":"Pendiente","Due":t_due if t_due else pd.NaT,
-                       "CreatedAt":dt.datetime.now().isoformat(timespec="seconds")}
-                tasks = pd.concat([tasks, pd.DataFrame([row])], ignore_index=True)
-                save_tasks(tasks); st.success("Tarea agregada."); st.rerun()
+        st.date_input("Fecha", value=default_date, key="task_fecha")
+        st.selectbox("Turno (opcional)", ["", *SITIO.turnos], index=0, key="task_turno")
+        st.selectbox("Persona (opcional)", [""] + PERSONAS_SITIO, index=0, key="task_persona")
+        st.text_input("Título de la tarea", key="task_titulo")
+        st.date_input("Vence (opcional)", value=default_date, key="task_due")
+
+        @perfilado("callback agregar tarea")
+        def _agregar_tarea():
+            # valores del estado de los widgets: el texto recién tipeado puede llegar junto con el click
+            ss = st.session_state
+            if not ss.task_titulo.strip():
+                ss._tarea_msg = ("warning", "Poné un título para la tarea."); return
+            row = {"Fecha":ss.task_fecha,"Turno":ss.task_turno or "","Persona":ss.task_persona or "",
+                   "Titulo":ss.task_titulo.strip(),"Estado":"Pendiente","Due":ss.task_due if ss.task_due else pd.NaT,
+                   "CreatedAt":ahora(ZONA).isoformat(timespec="seconds")}
+            row = add_task(row, datos.clave_tarea(row))   # un doble clic no la duplica
+            ss._tarea_msg = ("info", "Esa tarea ya estaba agregada.") if row.get("_repetida") else ("success", "Tarea agregada.")
+
+        st.button("➕ Agregar tarea", on_click=_agregar_tarea)
+        if "_tarea_msg" in st.session_state:
+            kind, msg = st.session_state.pop("_tarea_msg"); getattr(st, kind)(msg)
 
     with c_list:
         st.markdown("**Tareas del mes**")
-        if tasks.empty:
+        f1,f2,f3 = st.columns(3)
+        with f1: ft = st.selectbox("Turno", ["Todos", *SITIO.turnos], key="task_f_turno")
+        with f2: fp = st.selectbox("Persona", ["Todas"] + PERSONAS_SITIO, key="task_f_persona")
+        with f3: fe = st.selectbox("Estado", ["Todos","Pendiente","Hecho"], key="task_f_estado")
+
+        # Filtros sobre columnas enteras: sólo la página visible llega al navegador
+        vista = datos.filtrar_tareas(tasks, first, last, turno=None if ft == "Todos" else ft,
+                                     persona=None if fp == "Todas" else fp, estado=None if fe == "Todos" else fe)
+        if vista.empty:
             st.info("No hay tareas.")
         else:
-            mask = (pd.to_datetime(tasks["Fecha"]).dt.date>=first) & (pd.to_datetime(tasks["Fecha"]).dt.date<=last)
-            tshow = tasks[mask].sort_values(["Fecha","Turno","Persona","Estado","id"]).copy()
-            for _, r in tshow.iterrows():
-                c1,c2,c3,c4,c5 = st.columns([2,2,4,2,1])
-                with c1: st.caption(r["Fecha"])
-                with c2: st.caption(r["Turno"] if r["Turno"] else "—")
-                with c3: st.write(f"**{r['Titulo']}**  —  {r['Persona'] if r['Persona'] else 'Sin asignar'}")
-                with c4:
-                    done = (r["Estado"]=="Hecho")
-                    if st.checkbox("Hecha", value=done, key=f"task_done_{int(r['id'])}"):
-                        tasks.loc[tasks["id"]==r["id"], "Estado"] = "Hecho"; save_tasks(tasks)
-                with c5:
-                    if st.button("🗑️", key=f"task_del_{int(r['id'])}"):
-                        tasks = tasks[tasks["id"]!=r["id"]]; save_tasks(tasks); st.rerun()
+            ver = st.session_state.get("tasks_ver", 0)
+            n_pag = -(-len(vista) // TAREAS_POR_PAG)
+            pag = int(st.number_input(f"Página (de {n_pag})", 1, n_pag, 1, key=f"task_pag_{ver}_{first}_{ft}_{fp}_{fe}")) if n_pag > 1 else 1
+            st.caption(f"{len(vista)} tareas · mostrando {TAREAS_POR_PAG * (pag - 1) + 1}–{min(len(vista), TAREAS_POR_PAG * pag)}")
+            page = vista.iloc[TAREAS_POR_PAG * (pag - 1):TAREAS_POR_PAG * pag]
+            antes = pd.DataFrame({
+                "id": page["id"].to_numpy(), "Fecha": page["Fecha"].to_numpy(),
+                "Turno": page["Turno"].fillna("").replace("", "—").to_numpy(),
+                "Tarea": page["Titulo"].to_numpy(), "Persona": page["Persona"].fillna("").replace("", "Sin asignar").to_numpy(),
+                "Hecha": page["Estado"].eq("Hecho").to_numpy(), "Borrar": False,
+            })
+            # Las ediciones quedan en el form hasta guardar: un solo diff y una escritura por tipo de operación
+            with st.form(f"tasks_form_{ver}"):
+                editado = st.data_editor(
+                    antes, key=f"tasks_ed_{ver}_{first}_{ft}_{fp}_{fe}_{pag}", hide_index=True, use_container_width=True,
+                    disabled=["id","Fecha","Turno","Tarea","Persona"], column_config={"id": None},
+                )
+                if st.form_submit_button("💾 Guardar cambios"):
+                    estados, borrados = datos.diff_tasks(antes, editado)
+                    if estados or borrados:
+                        commit_tasks(estados, borrados)
+                        st.session_state.tasks_ver = ver + 1
+                        _rerun_tab()
+
+with tab_tasks:
+    tab_tareas(first, last)
 
 # ================== FICHADAS (Ingreso/Salida) ==================
-with tab_clock:
+@st.fragment
+@perfilado("render fichadas", "fragmento fichadas")
+def tab_fichadas(first: dt.date, last: dt.date):
     st.subheader("⏱️ Fichadas (Ingreso / Salida)")
 
     timelog = st.session_state.timelog if "timelog" in st.session_state else load_timelog()
@@ -505,77 +659,71 @@ with tab_clock:
     if not timelog.empty:
         timelog["Timestamp"] = pd.to_datetime(timelog["Timestamp"], errors="coerce")
 
-    cal_all = st.session_state.cal
-
     csel, cdate = st.columns([2,1])
     with csel:
-        emp = st.selectbox("Empleado", PERSONAS, index=0, key="clock_emp")
+        emp = st.selectbox("Empleado", PERSONAS_SITIO, index=0, key="clock_emp")
     with cdate:
-        fch = st.date_input("Fecha", value=dt.date.today(), key="clock_date")
+        fch = st.date_input("Fecha", value=HOY, key="clock_date")
 
     # Turnos planificados para ese empleado en esa fecha (si los hay)
-    plan = cal_all[(cal_all["Fecha"]==fch) & ((cal_all["Persona A"]==emp) | (cal_all["Persona B"]==emp))]
-    turnos_plan = ", ".join(plan["Turno"].tolist()) if not plan.empty else "—"
+    plan = st.session_state.cal.plan(fch, emp)
+    turnos_plan = ", ".join(plan) if plan else "—"
     st.caption(f"Turnos planificados ese día: **{turnos_plan}**")
-
-    # Estado actual del día (último evento)
-    day_logs = timelog[(timelog["Persona"]==emp) & (timelog["Fecha"]==fch)].sort_values(
-        "Timestamp", na_position="last"
-    )
-    last_type = day_logs.iloc[-1]["Tipo"] if not day_logs.empty else None
+    if fch < HOY:   # día cerrado: cómo quedó contra el plan
+        conc = conciliar(CAL.store.rango(fch, fch), load_timelog(fch - dt.timedelta(days=1), fch + dt.timedelta(days=1)),
+                         fch, fch, load_absences(fch, fch), TOLERANCIAS)
+        conc = conc[conc["Persona"] == emp]
+        if not conc.empty: st.caption("Contra el plan: " + "; ".join(conc["Estado"].unique()))
+
+    # Estado actual del día (último evento). La vista cubre el mes visible; otra fecha se consulta aparte.
+    logs_fch = timelog if first <= fch <= last else load_timelog(fch, fch)
+    day_logs = del_dia(logs_fch, emp, fch)
+    if fch == HOY:   # hoy: índice de ingresos abiertos (también ve el de un Noche que empezó ayer)
+        idx = datos.abiertos(STORAGE, HOY)
+        abierto, previa = idx.de(emp), idx.ultimo(emp)
+        last_type = "Ingreso" if abierto is not None else None
+        if abierto is not None and abierto["Fecha"] != fch:
+            st.caption(f"Ingreso abierto desde el {abierto['Timestamp']:%d/%m %H:%M}.")
+    else:
+        previa = day_logs.iloc[-1].to_dict() if not day_logs.empty else None
+        last_type = None if previa is None else previa["Tipo"]
     can_in  = (last_type != "Ingreso")   # si el último no fue "Ingreso", se puede ingresar
     can_out = (last_type == "Ingreso")   # si el último fue "Ingreso", corresponde salida
 
+    # El registro va en on_click: corre antes del fragmento, que se dibuja una sola vez ya con la fichada nueva
+    @perfilado("callback fichar")
+    # La clave (persona, tipo, último evento visto) viaja en args: un doble toque repite la misma y no duplica
+    def _fichar(tipo: str, clave: str):
+        now = ahora(ZONA)
+        row = append_timelog({
+            "Fecha": fch, "Persona": emp, "Tipo": tipo,
+            "Timestamp": now,
+            "Turno": turnos_plan, "Fuente": "boton"
+        }, clave)
+        st.session_state._fichada_ok = (f"{tipo} ya registrado." if row.get("_repetida") else
+                                        f"{tipo} registrad{'o' if tipo == 'Ingreso' else 'a'} {now.strftime('%H:%M')}.")
+
     cbtn1, cbtn2 = st.columns([1,1])
-    now = dt.datetime.now()
 
     with cbtn1:
         if can_in:
-            if st.button("🟢 Marcar ingreso"):
-                append_timelog({
-                    "Fecha": fch, "Persona": emp, "Tipo": "Ingreso",
-                    "Timestamp": now,
-                    "Turno": turnos_plan, "Fuente": "boton"
-                })
-                st.success(f"Ingreso registrado {now.strftime('%H:%M')}.")
-                st.rerun()
+            st.button("🟢 Marcar ingreso", on_click=_fichar, args=("Ingreso", datos.clave_fichada(emp, "Ingreso", previa)))
         else:
             st.info("Ya hay un ingreso pendiente de salida.")
 
     with cbtn2:
         if can_out:
-            if st.button("🔴 Marcar salida"):
-                append_timelog({
-                    "Fecha": fch, "Persona": emp, "Tipo": "Salida",
-                    "Timestamp": now,
-                    "Turno": turnos_plan, "Fuente": "boton"
-                })
-                st.success(f"Salida registrada {now.strftime('%H:%M')}.")
-                st.rerun()
+            st.button("🔴 Marcar salida", on_click=_fichar, args=("Salida", datos.clave_fichada(emp, "Salida", previa)))
         else:
             st.caption("Esperando ingreso o ya cerró el ciclo.")
 
-    # Mostrar fichadas del día y duración (suma de todos los pares Ingreso→Salida)
+    if "_fichada_ok" in st.session_state:
+        st.success(st.session_state.pop("_fichada_ok"))
+
+    # Mostrar fichadas del día y duración (pares Ingreso→Salida que empiezan ese día, aunque salgan al siguiente)
     st.markdown("---")
     st.markdown("**Fichadas del día**")
 
-    def _sumar_intervalos(logs: pd.DataFrame, time_col: str = "Timestamp") -> pd.Timedelta:
-        """Suma pares Ingreso→Salida ordenados por time_col."""
-        if logs.empty:
-            return pd.Timedelta(0)
-        logs = logs.sort_values(time_col)
-        total = pd.Timedelta(0)
-        current_in = None
-        for _, r in logs.iterrows():
-            ts = r[time_col]
-            if r["Tipo"] == "Ingreso":
-                current_in = ts
-            elif r["Tipo"] == "Salida" and current_in is not None:
-                if pd.notna(ts) and pd.notna(current_in) and ts > current_in:
-                    total += (ts - current_in)
-                current_in = None
-        return total
-
     if day_logs.empty:
         st.caption("No hay fichadas.")
     else:
@@ -583,31 +731,153 @@ with tab_clock:
         show["Hora"] = pd.to_datetime(show["Timestamp"]).dt.strftime("%H:%M")
         st.dataframe(show[["Hora","Tipo","Turno","Fuente"]], use_container_width=True, hide_index=True)
 
-        total_td = _sumar_intervalos(day_logs, time_col="Timestamp")
-        if total_td.total_seconds() > 0:
-            h = int(total_td.total_seconds()//3600)
-            m = int((total_td.total_seconds()%3600)//60)
+        logs_par = load_timelog(fch, fch + dt.timedelta(days=1))
+        pares_dia, _ = emparejar(logs_par[logs_par["Persona"]==emp])
+        total_s = pares_dia.loc[pares_dia["Fecha"]==fch, "Horas"].sum() * 3600
+        if total_s > 0:
+            h = int(total_s//3600)
+            m = int((total_s%3600)//60)
             st.success(f"Total trabajado en el día: **{h:02d}h {m:02d}m**")
         else:
             st.caption("Aún no hay pares Ingreso→Salida completos.")
 
-    # Resumen mensual (suma de intervalos por persona y fecha)
+        # Correcciones: quedan como versiones nuevas en el historial (datos.editar_fichada / eliminar_fichada)
+        with st.expander("✏️ Corregir o eliminar una fichada"):
+            filas = day_logs.to_dict("records")
+            i = st.selectbox("Fichada", range(len(filas)), key="corr_sel", format_func=lambda i: (
+                f"{filas[i]['Timestamp']:%H:%M}" if pd.notna(filas[i]["Timestamp"]) else "sin hora") + f" · {filas[i]['Tipo']} (#{filas[i]['id']})")
+            fila = filas[min(i, len(filas) - 1)]
+            ts = fila["Timestamp"] if pd.notna(fila["Timestamp"]) else pd.Timestamp(fch)
+            ch, ct = st.columns(2)
+            with ch: st.time_input("Hora", value=ts.time(), key=f"corr_hora_{fila['id']}")
+            with ct: st.selectbox("Evento", ["Ingreso","Salida"], index=int(fila["Tipo"] == "Salida"), key=f"corr_tipo_{fila['id']}")
+            st.text_input("Quién corrige", key="corr_por")
+            st.text_input("Observaciones / motivo (obligatorio para eliminar)", key="corr_obs")
+
+            # on_click corre antes del fragmento: leer los valores del estado, no de esta corrida
+            @perfilado("callback corregir fichada")
+            def _corregir():
+                quien, nota = st.session_state.corr_por.strip(), st.session_state.corr_obs.strip()
+                if not quien: st.session_state._fichada_err = "Indicá quién corrige."; return
+                nueva = dt.datetime.combine(ts.date(), st.session_state[f"corr_hora_{fila['id']}"])
+                editar_fichada(fila, {"Tipo": st.session_state[f"corr_tipo_{fila['id']}"], "Timestamp": nueva}, quien, nota or None)
+                st.session_state._fichada_ok = "Fichada corregida."
+
+            @perfilado("callback eliminar fichada")
+            def _eliminar():
+                quien, nota = st.session_state.corr_por.strip(), st.session_state.corr_obs.strip()
+                if not quien or not nota: st.session_state._fichada_err = "Indicá quién elimina y el motivo."; return
+                eliminar_fichada(fila, quien, nota)
+                st.session_state._fichada_ok = "Fichada eliminada (queda en el historial)."
+
+            cg, ce = st.columns(2)
+            with cg: st.button("💾 Guardar corrección", key="corr_guardar", on_click=_corregir)
+            with ce: st.button("🗑️ Eliminar", key="corr_eliminar", on_click=_eliminar)
+            if "_fichada_err" in st.session_state: st.warning(st.session_state.pop("_fichada_err"))
+
+    with st.expander("🕓 Historial y estado a una fecha"):
+        hist = datos.load_historial(STORAGE, fch, fch)
+        hist = hist[hist["Persona"] == emp].sort_values(["ID","Version"])
+        if hist.empty:
+            st.caption("Sin versiones registradas para ese día.")
+        else:
+            st.dataframe(hist[["ID","Version","Evento","Timestamp","CreadoPor","CreadoEn","EditadoPor","EditadoEn",
+                               "Observaciones","Eliminado","EliminadoPor","EliminadoEn","MotivoEliminacion"]],
+                         use_container_width=True, hide_index=True)
+        ca, cb = st.columns(2)
+        with ca: al_dia = st.date_input("Estado al", value=HOY, key="al_fecha")
+        with cb: al_hora = st.time_input("Hora", value=dt.time(23, 59), key="al_hora")
+        al = datos.fichadas_al(STORAGE, dt.datetime.combine(al_dia, al_hora), fch, fch)
+        al = al[al["Persona"] == emp]
+        if al.empty:
+            st.caption("No había fichadas registradas a ese momento.")
+        else:
+            st.dataframe(al.assign(Hora=al["Timestamp"].dt.strftime("%H:%M"))[["id","Hora","Tipo","Turno","Fuente"]],
+                         use_container_width=True, hide_index=True)
+
+    # Export del reloj biométrico: se lee por bloques y se escribe en un lote (turnos/importar.py)
+    with st.expander("📥 Importar export del reloj"):
+        credenciales = PLANTEL.credenciales()
+        if not credenciales:
+            st.caption("Para importar, cargá en personas.csv la columna Credencial (el id de cada persona en el reloj).")
+        else:
+            st.file_uploader("Export CSV", type=["csv","txt"], key="imp_archivo")
+            st.checkbox("Simular (sólo el informe, sin escribir)", key="imp_simular")
+
+            @perfilado("callback importar fichadas")
+            def _importar():
+                f = st.session_state.imp_archivo
+                if f is None: st.session_state._importar_err = "Elegí un archivo."; return
+                try:
+                    st.session_state._importado = importar.importar(
+                        STORAGE, f, credenciales, importar.opciones(CONFIG), ZONA, por=f"importación {f.name}",
+                        simular=st.session_state.imp_simular)
+                except (ValueError, TimeoutError) as e:
+                    st.session_state._importar_err = f"No se pudo importar: {e}"
+
+            st.button("Importar", key="imp_go", on_click=_importar)
+            if "_importado" in st.session_state:
+                inf = st.session_state.pop("_importado")
+                (st.info if st.session_state.imp_simular else st.success)(importar.resumen(inf))
+                if inf["credenciales_desconocidas"]:
+                    st.dataframe(pd.DataFrame(list(inf["credenciales_desconocidas"].items()), columns=["Credencial","Marcas"]),
+                                 hide_index=True, use_container_width=True)
+            if "_importar_err" in st.session_state: st.warning(st.session_state.pop("_importar_err"))
+
+    # Resumen mensual (pares por persona sobre todo el mes; +1 día para las salidas del último Noche)
     st.markdown("---")
     st.markdown("**Resumen mensual (horas por persona)**")
-    month_logs = timelog[(timelog["Fecha"]>=first) & (timelog["Fecha"]<=last)].copy()
+    month_logs = load_timelog(first, last + dt.timedelta(days=1))
     if month_logs.empty:
         st.caption("No hay fichadas en el mes.")
     else:
-        # usar columna 'ts' para evitar duplicar nombre con 'Timestamp'
-        month_logs["ts"] = pd.to_datetime(month_logs["Timestamp"], errors="coerce")
-        resumen = []
-        for (p, d), g in month_logs.groupby(["Persona","Fecha"]):
-            total_td = _sumar_intervalos(g, time_col="ts")
-            if total_td.total_seconds() > 0:
-                resumen.append({"Persona":p,"Fecha":d,"Horas":round(total_td.total_seconds()/3600.0,2)})
-        if resumen:
-            dfres = pd.DataFrame(resumen)
-            byp = dfres.groupby("Persona", as_index=False)["Horas"].sum().sort_values("Horas", ascending=False)
-            st.dataframe(byp, use_container_width=True, hide_index=True)
+        pares, sueltos = emparejar(month_logs)
+        pares = pares[(pares["Fecha"]>=first) & (pares["Fecha"]<=last) & (pares["Horas"]>0)]
+        if not pares.empty:
+            st.dataframe(horas_por_persona(pares), use_container_width=True, hide_index=True)
         else:
             st.caption("Aún no hay días completos (ingreso y salida) para calcular.")
+        sueltos = sueltos[(sueltos["Fecha"]>=first) & (sueltos["Fecha"]<=last)]
+        if not sueltos.empty:
+            with st.expander(f"Fichadas sin par ({len(sueltos)})"):
+                st.dataframe(sueltos, use_container_width=True, hide_index=True)
+
+with tab_clock:
+    tab_fichadas(first, last)
+
+# ================== DIAGNÓSTICO ==================
+_guardar_perfil(PERFIL.cerrar(st.session_state.pop("_perfil_abierto", None), SESION))   # el panel no se mide
+
+with st.expander("🔧 Cache de datos"):
+    _cs = CACHE.stats()
+    st.caption(f"Hits: **{_cs['hits']}** · Misses: **{_cs['misses']}** · Evicciones: {_cs['evictions']} · "
+               f"Entradas: {_cs['entradas']} · {_cs['bytes'] / 1024:.0f} KiB")
+
+with st.expander("🧠 Memoria de la sesión"):
+    st.caption("Lo propio de esta sesión y lo que comparte con las demás del proceso (cache, calendario).")
+    if st.button("Medir", key="mem_medir"):
+        _m = memoria(st.session_state)
+        st.caption(f"Propios: **{_m['Propios KiB'].sum():.0f} KiB** · Compartidos: {_m['Compartidos KiB'].sum():.0f} KiB "
+                   f"· Cache del proceso: {CACHE.stats()['bytes'] / 1024:.0f} KiB")
+        st.dataframe(_m, hide_index=True, use_container_width=True)
+
+with st.expander("⏱️ Perfil por rerun"):
+    if PERFIL.opciones["activo"]: st.caption('Midiendo todas las sesiones (config.json "perfil").')
+    else: st.checkbox("Medir esta sesión", key="perfil_on")
+    _reruns = list(st.session_state.get("perfil_reruns", ()))
+    if not _reruns:
+        st.caption("Sin reruns medidos todavía.")
+    else:
+        _u = _reruns[-1]
+        st.caption(f"Último ({_u['pagina']}{', cortado por st.rerun' if _u['interrumpido'] else ''}): **{_u['ms']:.0f} ms**, "
+                   f"{_u['resto']:.0f} ms fuera de los puntos medidos (widgets, Streamlit)")
+        st.dataframe(desglose(_u["puntos"], _u["ms"]), hide_index=True, use_container_width=True)
+        st.caption("Recientes")
+        st.dataframe(pd.DataFrame([{
+            "Hora": r["ts"][11:], "Rerun": r["pagina"], "ms": r["ms"],
+            "Más lento": max(r["puntos"], key=lambda k: r["puntos"][k][2], default="—"),
+        } for r in reversed(_reruns)]), hide_index=True, use_container_width=True)
+        st.caption(f"Sesión ({st.session_state.perfil_n} reruns)")
+        st.dataframe(desglose(st.session_state.perfil_sesion), hide_index=True, use_container_width=True)
+    if PERFIL.opciones["archivo"]:
+        st.caption(f"Cada rerun medido se agrega a {PERFIL.opciones['archivo']} (resumen: `python -m turnos.perfil`).")
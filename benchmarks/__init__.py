@@ -0,0 +1 @@
+"""Benchmarks de los caminos calientes. Correr desde la raíz: python -m benchmarks.<modulo>"""
@@ -0,0 +1,72 @@
+"""
+Carga en frío del mes visible (timelog + absences) con años de historia: todo caliente vs
+meses cerrados archivados en Parquet (turnos/archivo.py).
+
+    python -m benchmarks.bench_archivo [--anios 5] [--personas 20]
+
+"En frío" = cache del proceso vacía (primer load tras arrancar o tras una escritura).
+Memoria = pico de tracemalloc durante la carga.
+"""
+import argparse
+import datetime as dt
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from benchmarks.sinteticos import INICIO, poblar
+from turnos import datos
+from turnos.archivo import ArchivoBackend
+from turnos.cache import CACHE
+from turnos.calendario import rango_mes
+from turnos.storage import CsvBackend, SqliteBackend
+
+
+def carga_fria(b, first: dt.date, last: dt.date, reps: int) -> tuple[float, float, int]:
+    """(mejor ms, pico MiB, filas) de cargar timelog y absences de first..last sin cache."""
+    def cargar():
+        CACHE.invalidate()
+        return len(datos.load_timelog(b, first, last + dt.timedelta(days=1))) + len(datos.load_absences(b, first, last))
+    best = float("inf")
+    for _ in range(reps):
+        t0 = time.perf_counter(); n = cargar(); best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()   # aparte: tracemalloc hace más lenta la corrida medida
+    cargar(); pico = tracemalloc.get_traced_memory()[1]; tracemalloc.stop()
+    return best * 1000, pico / 2**20, n
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--anios", type=int, default=5)
+    ap.add_argument("--personas", type=int, default=20)
+    ap.add_argument("--reps", type=int, default=3)
+    args = ap.parse_args()
+
+    ultimo = INICIO.replace(year=INICIO.year + args.anios - 1)
+    first, last = rango_mes(ultimo.year, 12)   # el mes "abierto"
+    with tempfile.TemporaryDirectory() as tmp:
+        d = Path(tmp)
+        (d / "csv").mkdir(); (d / "csv_arch").mkdir()
+        casos = {
+            "CSV":              CsvBackend(d / "csv"),
+            "CSV + archivo":    ArchivoBackend(CsvBackend(d / "csv_arch"), d / "arch_csv"),
+            "SQLite":           SqliteBackend(d / "a.db"),
+            "SQLite + archivo": ArchivoBackend(SqliteBackend(d / "b.db"), d / "arch_sql"),
+        }
+        for b in casos.values():
+            n = poblar(b, args.anios, args.personas)
+            if isinstance(b, ArchivoBackend):
+                for name in b.datasets: b.rotar(name, first)
+        print(f"{n['timelog']} fichadas y {n['absences']} faltas en {args.anios} años · mes visible {first:%Y-%m}")
+
+        for mes in (first, INICIO):   # abierto y el más viejo (archivado)
+            f, l = rango_mes(mes.year, mes.month)
+            print(f"\n{f:%Y-%m}")
+            print(f"{'backend':<18} {'ms':>8} {'pico MiB':>9} {'filas':>6}")
+            for nombre, b in casos.items():
+                ms, mib, filas = carga_fria(b, f, l, args.reps)
+                print(f"{nombre:<18} {ms:>8.1f} {mib:>9.1f} {filas:>6}")
+
+
+if __name__ == "__main__":
+    main()
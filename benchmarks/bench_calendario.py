@@ -0,0 +1,68 @@
+"""
+Tiempo de armado de la grilla del mes: escaneo del DataFrame (antes) vs CalendarStore (ahora).
+
+    python -m benchmarks.bench_calendario                 # sólo lookups
+    python -m benchmarks.bench_calendario --app app.py    # además, rerun completo vía AppTest
+
+Con `--app` se puede apuntar a una copia vieja del script para comparar antes/después.
+"""
+import argparse
+import calendar
+import datetime as dt
+import os
+import time
+
+from tests._referencia import grilla_escaneo, grilla_store
+from turnos.calendario import CalendarStore, generar_rango_rotativo
+
+MESES_BENCH = [1, 6, 12]
+
+
+def _mejor(fn, reps: int) -> float:
+    """Mejor tiempo (ms) de `reps` corridas."""
+    best = float("inf")
+    for _ in range(reps):
+        t0 = time.perf_counter(); fn(); best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def bench_lookups(reps: int):
+    hoy = dt.date.today()
+    anchor = hoy - dt.timedelta(days=hoy.weekday())
+    first = dt.date(hoy.year, hoy.month, 1)
+    last = dt.date(hoy.year, hoy.month, calendar.monthrange(hoy.year, hoy.month)[1])
+    print(f"{'meses':>5} {'filas':>6} {'escaneo ms':>11} {'store ms':>9} {'x':>6}")
+    for meses in MESES_BENCH:
+        cal = generar_rango_rotativo(anchor, 31 * meses + 14, 0)
+        store = CalendarStore(cal)
+        t_old = _mejor(lambda: grilla_escaneo(cal, first, last), reps)
+        t_new = _mejor(lambda: grilla_store(store, first, last), reps)
+        print(f"{meses:>5} {len(cal):>6} {t_old:>11.2f} {t_new:>9.3f} {t_old / t_new:>6.0f}")
+
+
+def bench_app(script: str, reps: int):
+    from streamlit.testing.v1 import AppTest
+
+    print(f"\nRerun completo de {script} (AppTest)")
+    print(f"{'meses':>5} {'rerun ms':>9}")
+    at = AppTest.from_file(os.path.abspath(script), default_timeout=120).run()
+    for meses in MESES_BENCH:
+        try:
+            at.number_input(key="cfg_meses").set_value(meses).run()
+        except KeyError:
+            pass  # motor lazy: ya no hay horizonte configurable, genera sólo el mes visible
+        print(f"{meses:>5} {_mejor(at.run, reps):>9.1f}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--reps", type=int, default=5)
+    ap.add_argument("--app", help="script de Streamlit a medir con AppTest (ej. app_turnos.py)")
+    args = ap.parse_args()
+    bench_lookups(args.reps)
+    if args.app:
+        bench_app(args.app, args.reps)
+
+
+if __name__ == "__main__":
+    main()
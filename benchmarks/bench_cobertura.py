@@ -0,0 +1,67 @@
+"""
+Buscador de cobertura (turnos/cobertura.py) con plantel grande: armar la disponibilidad del mes,
+pedir candidatos para cada (día, turno) y aplicar un override suelto sin rearmar nada.
+
+    python -m benchmarks.bench_cobertura [--personas 150] [--sitios 10] [--presupuesto]
+
+Con `--presupuesto`, sale con código 1 si algún paso supera su presupuesto en ms (los candidatos se
+piden en el editor lateral); son tiempos absolutos, de esta máquina: sin la opción sólo informa.
+Que los candidatos sean los correctos lo verifica tests/test_cobertura.py.
+"""
+import argparse
+import datetime as dt
+import sys
+
+from benchmarks.bench_calendario import _mejor
+from tests._referencia import plantel_sintetico
+from turnos.calendario import CalendarStore, generar_sitio, rango_mes
+from turnos.cobertura import Cobertura, Reglas, ventana
+
+PRESUPUESTO_MS = {"armar (por sitio)": 50, "candidatos": 2, "actualizar": 0.5}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--personas", type=int, default=150)
+    ap.add_argument("--sitios", type=int, default=10)
+    ap.add_argument("--reps", type=int, default=5)
+    ap.add_argument("--presupuesto", action="store_true", help="fallar si algún paso supera PRESUPUESTO_MS")
+    args = ap.parse_args()
+
+    plantel = plantel_sintetico(args.personas, args.sitios)
+    anchor, r = dt.date(2025, 1, 6), Reglas()
+    first, last = rango_mes(2025, 6)
+    armado = []
+    for s in plantel.sitios:
+        d0, d1 = ventana(first, last, s, r)
+        cal = CalendarStore(motor=lambda f, l, s=s: generar_sitio(s, anchor, f, l, 0)).rango(d0, d1)
+        armado.append((s, plantel.activos(s.nombre), cal, d0, d1))
+    cobs = [Cobertura(s, p, cal, d0, d1, r) for s, p, cal, d0, d1 in armado]
+    pedidos = [(c, first + dt.timedelta(days=i), t) for c in cobs for i in range((last - first).days + 1) for t in c.sitio.turnos]
+    print(f"{len(plantel.personas)} personas · {len(plantel.sitios)} sitios · {len(pedidos)} pedidos de candidatos en {first:%Y-%m}")
+
+    def candidatos():
+        for c, f, t in pedidos: c.candidatos(f, t)
+
+    c0, s0 = cobs[0], plantel.sitios[0]
+    ida = [{"Fecha": first, "Turno": s0.turnos[0], "Persona A": c0.personas[-1]}]
+    vuelta = [{"Fecha": first, "Turno": s0.turnos[0], "Persona A": s0.titulares[0][0]}]
+
+    def actualizar():
+        c0.actualizar(ida); c0.actualizar(vuelta)
+
+    t = {
+        "armar (por sitio)": _mejor(lambda: [Cobertura(s, p, cal, d0, d1, r) for s, p, cal, d0, d1 in armado], args.reps) / len(armado),
+        "candidatos": _mejor(candidatos, args.reps) / len(pedidos),
+        "actualizar": _mejor(lambda: [actualizar() for _ in range(100)], args.reps) / 200,
+    }
+    excedidos = []
+    for paso, ms in t.items():
+        tope = PRESUPUESTO_MS[paso]
+        if ms > tope: excedidos.append(paso)
+        print(f"{paso:<18} {ms:>8.3f} ms  (presupuesto {tope} ms){'  EXCEDIDO' if ms > tope else ''}")
+    if excedidos and args.presupuesto: sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
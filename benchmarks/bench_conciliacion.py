@@ -0,0 +1,43 @@
+"""
+Plan vs fichadas (turnos.conciliacion) de un año para todo el personal.
+
+    python -m benchmarks.bench_conciliacion [--personas 300] [--dias 365] [--reps 3]
+
+El plan tiene un turno por persona y día como las fichadas de fichadas_sinteticas
+(persona p: Mañana, Tarde o Noche según p % 3), con un 5 % de turnos sin fichadas y un 5 % de
+días fichados sin turno. Mide conciliar (plan, emparejar e intervalos) y desvios por mes.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from tests._referencia import INICIO, fichadas_sinteticas, plan_sintetico
+from turnos.conciliacion import conciliar, desvios
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--personas", type=int, default=300)
+    ap.add_argument("--dias", type=int, default=365)
+    ap.add_argument("--reps", type=int, default=3)
+    args = ap.parse_args()
+
+    first, last = INICIO, INICIO + pd.Timedelta(days=args.dias - 1)
+    cal = plan_sintetico(args.personas, args.dias)
+    logs = fichadas_sinteticas(args.personas, args.dias)
+    logs = logs[np.random.default_rng(1).random(len(logs)) >= 0.05]   # turnos sin fichadas o con una sola marca
+    print(f"{len(cal):,} turnos planificados, {len(logs):,} fichadas")
+
+    for nombre, fn in (("conciliar", lambda: conciliar(cal, logs, first, last)),
+                       ("desvíos por mes", lambda: desvios(detalle, "M"))):
+        mejor = float("inf")
+        for _ in range(args.reps):
+            t = time.perf_counter(); out = fn(); mejor = min(mejor, time.perf_counter() - t)
+        if nombre == "conciliar": detalle = out
+        print(f"{nombre:<16} {mejor * 1000:>8.0f} ms · {len(out):,} filas")
+    print(detalle["Estado"].value_counts().head(6).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""
+Horas trabajadas: loop con iterrows() por (Persona, Fecha) (antes) vs emparejado vectorizado (ahora).
+
+    python -m benchmarks.bench_fichadas [--personas 7] [--dias 365]
+
+Con sólo turnos diurnos ambos dan lo mismo (tests/test_fichadas.py); con Noche, el loop pierde las
+salidas del día siguiente.
+"""
+import argparse
+
+from benchmarks.bench_calendario import _mejor
+from tests._referencia import fichadas_sinteticas, resumen_loop, resumen_vectorizado
+from turnos.fichadas import emparejar
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--personas", type=int, default=7)
+    ap.add_argument("--dias", type=int, default=365)
+    ap.add_argument("--reps", type=int, default=3)
+    args = ap.parse_args()
+
+    logs = fichadas_sinteticas(args.personas, args.dias, noche=True)
+    pares, sueltos = emparejar(logs)
+    perdidas = pares["Horas"].sum() - resumen_loop(logs)["Horas"].sum()
+    print(f"Con Noche: el loop por Fecha pierde {perdidas:.0f} h; vectorizado deja {len(sueltos)} fichadas sin par")
+
+    t_old = _mejor(lambda: resumen_loop(logs), args.reps)
+    t_new = _mejor(lambda: resumen_vectorizado(logs), args.reps)
+    print(f"{len(logs)} fichadas ({args.personas} personas x {args.dias} días): "
+          f"loop {t_old:.0f} ms · vectorizado {t_new:.1f} ms · x{t_old / t_new:.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Latencia por interacción contra un servidor de Streamlit real (headless), como la ve el navegador:
+desde que se manda el click hasta que termina la última corrida que dispara.
+
+    python -m benchmarks.bench_fragmentos [--app app_turnos.py] [--reps 5]
+
+AppTest siempre corre el script completo, así que acá se habla el protocolo del websocket:
+un click dentro de un fragmento viaja con su fragment_id y el servidor re-ejecuta sólo ese fragmento.
+Con `--app` apuntando a una copia vieja se mide el antes. Requiere el paquete `websockets`.
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIN_RERUN = ForwardMsg.ScriptFinishedStatus.Value("FINISHED_EARLY_FOR_RERUN")
+
+# (nombre, etiqueta del botón); None = rerun completo sin click
+INTERACCIONES = [
+    ("rerun completo", None),
+    ("marcar ingreso", "🟢 Marcar ingreso"),
+    ("marcar salida", "🔴 Marcar salida"),
+    ("agregar tarea", "➕ Agregar tarea"),
+    ("mes siguiente", "Mes siguiente ▶"),
+]
+
+
+class Sesion:
+    """
+    Una pestaña de navegador: manda reruns y espera a que terminen, recordando los widgets vistos.
+    Como el navegador, reenvía en cada rerun el valor de los widgets que ya se eligieron.
+    """
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.widgets: dict[str, tuple[str, str]] = {}   # etiqueta -> (widget id, fragment id)
+        self.valores: dict[str, WidgetState] = {}       # widget id -> último valor enviado
+        self.corridas = 0
+
+    async def rerun(self, etiqueta: str | None = None, valor: str | None = None) -> float:
+        m = BackMsg(); m.rerun_script.query_string = ""
+        frag = ""
+        if etiqueta is not None:
+            wid, frag = self.widgets[etiqueta]
+            if valor is None:
+                m.rerun_script.widget_states.widgets.append(WidgetState(id=wid, trigger_value=True))
+            else:
+                self.valores[wid] = WidgetState(id=wid, string_value=valor)
+        m.rerun_script.widget_states.widgets.extend(self.valores.values())
+        if frag: m.rerun_script.fragment_id = frag
+        t0 = time.perf_counter()
+        await self.ws.send(m.SerializeToString())
+        while True:
+            f = ForwardMsg(); f.ParseFromString(await self.ws.recv())
+            kind = f.WhichOneof("type")
+            if kind == "delta" and f.delta.WhichOneof("type") == "new_element":
+                e = f.delta.new_element
+                tipo = e.WhichOneof("type")
+                if tipo in ("button", "selectbox"):
+                    w = getattr(e, tipo)
+                    self.widgets[w.label] = (w.id, f.delta.fragment_id)
+            elif kind == "script_finished":
+                self.corridas += 1
+                if f.script_finished != FIN_RERUN:
+                    return (time.perf_counter() - t0) * 1000
+
+
+def _puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0)); return s.getsockname()[1]
+
+
+@contextlib.contextmanager
+def servidor(app: str):
+    """`streamlit run` headless de una copia de `app` (con turnos/ y config.json) en un data/ vacío; da el puerto."""
+    d = tempfile.mkdtemp()
+    port = _puerto_libre()
+    proc = None
+    try:
+        shutil.copytree(os.path.join(ROOT, "turnos"), os.path.join(d, "turnos"))
+        shutil.copy(os.path.join(ROOT, "config.json"), d)
+        shutil.copy(os.path.abspath(app), os.path.join(d, "app.py"))
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "streamlit", "run", "app.py", "--server.headless", "true", "--server.port", str(port),
+             "--server.enableXsrfProtection", "false", "--browser.gatherUsageStats", "false"],
+            cwd=d, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        for _ in range(150):
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health"); break
+            except OSError:
+                time.sleep(0.2)
+        yield port
+    finally:
+        if proc is not None: proc.terminate(); proc.wait()
+        shutil.rmtree(d, ignore_errors=True)
+
+
+def conectar(port: int):
+    import websockets
+    return websockets.connect(f"ws://127.0.0.1:{port}/_stcore/stream", subprotocols=["streamlit"], max_size=None)
+
+
+async def medir(port: int, reps: int) -> dict[str, list[float]]:
+    out = {n: [] for n, _ in INTERACCIONES}
+    async with conectar(port) as ws:
+        s = Sesion(ws)
+        await s.rerun()   # primera corrida: arma el calendario y carga datos
+        for _ in range(reps):
+            for nombre, etiqueta in INTERACCIONES:
+                if etiqueta is not None and etiqueta not in s.widgets: continue
+                out[nombre].append(await s.rerun(etiqueta))
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--app", default=os.path.join(ROOT, "app_turnos.py"))
+    ap.add_argument("--reps", type=int, default=5)
+    args = ap.parse_args()
+
+    with servidor(args.app) as port:
+        res = asyncio.run(medir(port, args.reps))
+
+    print(f"{os.path.basename(args.app)}: mediana de {args.reps} clicks por interacción")
+    print(f"{'interacción':<16} {'ms':>7}")
+    for nombre, ts in res.items():
+        print(f"{nombre:<16} {statistics.median(ts):>7.1f}" if ts else f"{nombre:<16} {'—':>7}")
+
+
+if __name__ == "__main__":
+    main()
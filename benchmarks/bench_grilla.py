@@ -0,0 +1,67 @@
+"""
+Render del mes: casilleros con widgets (alternativa) vs bloque HTML único (por defecto).
+
+    python -m benchmarks.bench_grilla [--reps 5]
+
+Por cada vista mide, vía AppTest, el rerun completo, la cantidad de elementos de la pestaña
+Calendario y los bytes serializados de esos elementos (lo que viaja al navegador).
+"""
+import argparse
+import datetime as dt
+import os
+import shutil
+import tempfile
+
+from benchmarks.bench_calendario import _mejor
+from turnos.calendario import CalendarStore, generar_ventana, rango_mes
+from turnos.grilla import mes_html
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _elementos(node) -> tuple[int, int]:
+    """(cantidad, bytes) de los elementos y contenedores bajo `node`."""
+    n = b = 0
+    for child in getattr(node, "children", {}).values():
+        if getattr(child, "proto", None) is not None:
+            n += 1; b += len(child.proto.SerializeToString())
+        cn, cb = _elementos(child)
+        n += cn; b += cb
+    return n, b
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--reps", type=int, default=5)
+    args = ap.parse_args()
+    from streamlit.testing.v1 import AppTest
+
+    hoy = dt.date.today()
+    first, last = rango_mes(hoy.year, hoy.month)
+    anchor = first - dt.timedelta(days=first.weekday())
+    store = CalendarStore(motor=lambda f, l: generar_ventana(anchor, f, l, 0))
+    mes_html(store, first, last)
+    print(f"mes_html: {_mejor(lambda: mes_html(store, first, last), args.reps * 20):.2f} ms, "
+          f"{len(mes_html(store, first, last).encode())} bytes de HTML")
+
+    d = tempfile.mkdtemp()
+    cwd = os.getcwd()
+    try:
+        shutil.copytree(os.path.join(ROOT, "turnos"), os.path.join(d, "turnos"))
+        shutil.copy(os.path.join(ROOT, "config.json"), d)
+        shutil.copy(os.path.join(ROOT, "app_turnos.py"), d)
+        os.chdir(d)
+        at = AppTest.from_file(os.path.join(d, "app_turnos.py"), default_timeout=120).run()
+        print(f"{'vista':<11} {'rerun ms':>9} {'elementos':>10} {'bytes':>8}")
+        for vista in ("Casilleros", "Compacta"):
+            at.radio(key="cal_vista").set_value(vista).run()
+            if at.exception: raise RuntimeError(at.exception[0].message)
+            n, b = _elementos(at.tabs[0])
+            print(f"{vista:<11} {_mejor(at.run, args.reps):>9.1f} {n:>10} {b:>8}")
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(d, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Importación de un export de reloj biométrico sintético (turnos.importar) en CSV y SQLite.
+
+    python -m benchmarks.bench_importar [--fichadas 1000000] [--personas 700] [--bloque 200000]
+
+El export tiene el formato de un reloj ZKTeco (AC-No.,Name,Time,State) con un 1 % de marcas
+repetidas y un 0,5 % de credenciales que no están en el plantel. Mide la primera importación
+(todo nuevo), la reimportación del mismo archivo (todo ya cargado: sólo lectura y merge) y, como
+referencia, lo que costaría el mismo volumen fichando de a una con datos.append_timelog.
+"""
+import argparse
+import datetime as dt
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.sinteticos import fichadas_sinteticas
+from turnos import datos
+from turnos.importar import DEFAULTS, importar, resumen
+from turnos.storage import CsvBackend, SqliteBackend
+
+
+def export_sintetico(path: Path, fichadas: int, personas: int, seed: int = 0) -> dict[str, str]:
+    """Escribe el export en `path` y devuelve las credenciales (id del reloj -> persona)."""
+    rng = np.random.default_rng(seed)
+    dias = -(-fichadas // (2 * personas))
+    logs = fichadas_sinteticas(personas, dias, seed=seed).iloc[:fichadas]
+    cred = {p: str(1000 + i) for i, p in enumerate(logs["Persona"].unique())}
+    ac = logs["Persona"].map(cred).to_numpy(dtype=object)
+    ac[rng.random(len(ac)) < 0.005] = "99999"
+    df = pd.DataFrame({"AC-No.": ac, "Name": logs["Persona"].to_numpy(),
+                       "Time": logs["Timestamp"].dt.strftime("%d/%m/%Y %H:%M:%S").to_numpy(),
+                       "State": np.where(logs["Tipo"] == "Ingreso", "C/In", "C/Out")})
+    rep = df.sample(frac=0.01, random_state=seed)
+    pd.concat([df, rep]).sort_values("Time", kind="stable").to_csv(path, index=False)
+    return {c: p for p, c in cred.items()}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--fichadas", type=int, default=1_000_000)
+    ap.add_argument("--personas", type=int, default=700)
+    ap.add_argument("--bloque", type=int, default=200_000)
+    ap.add_argument("--de-a-una", type=int, default=500, help="fichadas para estimar el alta de a una")
+    args = ap.parse_args()
+    op = {**DEFAULTS, "formato": "%d/%m/%Y %H:%M:%S"}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        d = Path(tmp)
+        t = time.perf_counter()
+        cred = export_sintetico(d / "export.csv", args.fichadas, args.personas)
+        print(f"export: {(d / 'export.csv').stat().st_size / 2**20:.0f} MiB en {time.perf_counter() - t:.1f} s")
+
+        (d / "csv").mkdir()
+        for nombre, b in (("csv", CsvBackend(d / "csv")), ("sqlite", SqliteBackend(d / "turnos.db"))):
+            inf = importar(b, d / "export.csv", cred, op, bloque=args.bloque)
+            print(f"{nombre:<7} importar    {inf['importadas'] / inf['segundos']:>9,.0f} fichadas/s · {resumen(inf)}")
+            inf = importar(b, d / "export.csv", cred, op, bloque=args.bloque)
+            print(f"{nombre:<7} reimportar  {inf['leidas'] / inf['segundos']:>9,.0f} leídas/s · {resumen(inf)}")
+
+            t = time.perf_counter()
+            for i in range(args.de_a_una):
+                datos.append_timelog(b, {"Fecha": dt.date(2030, 1, 1), "Persona": "Hugo", "Tipo": "Ingreso",
+                                         "Timestamp": pd.Timestamp(2030, 1, 1) + pd.Timedelta(seconds=i), "Fuente": "reloj"})
+            s = (time.perf_counter() - t) / args.de_a_una
+            print(f"{nombre:<7} de a una    {1 / s:>9,.0f} fichadas/s · {args.fichadas} serían {args.fichadas * s / 60:.0f} min")
+
+
+if __name__ == "__main__":
+    main()
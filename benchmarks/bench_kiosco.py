@@ -0,0 +1,63 @@
+"""
+Presupuesto del kiosco (kiosco.py) contra un servidor real, comparado con el panel (app_turnos.py).
+
+    python -m benchmarks.bench_kiosco [--reps 5] [--presupuesto]
+
+- arranque:  desde que el servidor responde hasta que termina la primera corrida (imports incluidos).
+- elegir:    elegir el empleado (plan del día + fichadas de hoy).
+- fichar:    click en Marcar ingreso/salida hasta que la página queda dibujada.
+Con `--presupuesto`, sale con código 1 si el kiosco se pasa de PRESUPUESTO_MS (tiempos absolutos,
+de esta máquina); sin la opción sólo informa.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+
+from benchmarks.bench_fragmentos import ROOT, Sesion, conectar, servidor
+
+PRESUPUESTO_MS = {"arranque": 1500, "elegir": 120, "fichar": 120}
+
+
+async def medir_kiosco(port: int, reps: int) -> dict[str, list[float]]:
+    out = {"arranque": [], "elegir": [], "fichar": []}
+    async with conectar(port) as ws:
+        s = Sesion(ws)
+        out["arranque"].append(await s.rerun())
+        for i in range(reps):
+            out["elegir"].append(await s.rerun("Empleado", ["Hugo", "Moira"][i % 2]))
+            boton = next(l for l in s.widgets if "Marcar" in l)
+            out["fichar"].append(await s.rerun(boton))
+    return out
+
+
+async def medir_panel(port: int) -> dict[str, list[float]]:
+    async with conectar(port) as ws:
+        s = Sesion(ws)
+        return {"arranque": [await s.rerun()]}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--reps", type=int, default=5)
+    ap.add_argument("--presupuesto", action="store_true", help="fallar si se pasa de PRESUPUESTO_MS")
+    args = ap.parse_args()
+
+    with servidor(os.path.join(ROOT, "kiosco.py")) as port:
+        kiosco = asyncio.run(medir_kiosco(port, args.reps))
+    with servidor(os.path.join(ROOT, "app_turnos.py")) as port:
+        panel = asyncio.run(medir_panel(port))
+
+    print(f"{'':<10} {'kiosco ms':>10} {'panel ms':>9} {'presupuesto':>12}")
+    excedido = False
+    for k, limite in PRESUPUESTO_MS.items():
+        v = statistics.median(kiosco[k])
+        excedido |= v > limite
+        p = f"{panel[k][0]:.0f}" if k in panel else "—"
+        print(f"{k:<10} {v:>10.0f} {p:>9} {limite:>9} {'ok' if v <= limite else 'EXCEDIDO':>2}")
+    sys.exit(1 if excedido and args.presupuesto else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Overrides: merge + fillna sobre todo el calendario (antes) vs parches por (Fecha, Turno) en el
+CalendarStore (ahora). Que ambos den lo mismo lo verifica tests/test_calendario.py.
+
+    python -m benchmarks.bench_overrides
+"""
+import argparse
+import datetime as dt
+import random
+
+from benchmarks.bench_calendario import _mejor
+from tests._referencia import apply_overrides_merge, overrides_aleatorios
+from turnos.calendario import TURNOS, CalendarStore, generar_rango_rotativo, rango_mes
+
+
+def bench(reps: int):
+    hoy = dt.date.today()
+    anchor = hoy - dt.timedelta(days=hoy.weekday())
+    first, last = rango_mes(hoy.year, hoy.month)
+    rng = random.Random(1)
+    print(f"{'meses':>5} {'merge x2 ms':>12} {'rerun sin cambios ms':>21} {'guardar 1 día ms':>17}")
+    for meses in [1, 6, 12]:
+        cal = generar_rango_rotativo(anchor, 31 * meses + 14, 0)
+        ov = overrides_aleatorios(rng, cal, 40 * meses)
+        # antes: un merge para la grilla y otro para el tab de stats, en cada rerun
+        t_old = _mejor(lambda: (apply_overrides_merge(cal, ov), apply_overrides_merge(cal, ov)), reps)
+        store = CalendarStore(cal); store.patch(ov); store.rango(first, last)
+        t_rerun = _mejor(lambda: store.rango(first, last), reps)
+        dia = [{"Fecha": max(first, anchor), "Turno": t, "Persona A": "Jony", "Libre": "Hugo"} for t in TURNOS]
+        t_save = _mejor(lambda: (store.patch(dia), store.rango(first, last)), reps)
+        print(f"{meses:>5} {t_old:>12.2f} {t_rerun:>21.3f} {t_save:>17.2f}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--reps", type=int, default=5)
+    args = ap.parse_args()
+    bench(args.reps)
+
+
+if __name__ == "__main__":
+    main()
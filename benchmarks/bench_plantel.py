@@ -0,0 +1,63 @@
+"""
+Motor de turnos con plantel grande: ~150 personas repartidas en varios sitios, de 3 a 5 turnos
+por sitio y varios francos por día, un año completo.
+
+    python -m benchmarks.bench_plantel [--personas 150] [--sitios 10] [--meses 12] [--presupuesto]
+
+Con `--presupuesto`, sale con código 1 si algún paso supera su presupuesto en ms (tiene que seguir
+siendo interactivo); son tiempos absolutos, de esta máquina: sin la opción sólo informa.
+"""
+import argparse
+import datetime as dt
+import sys
+
+import pandas as pd
+
+from benchmarks.bench_calendario import _mejor
+from tests._referencia import plantel_sintetico
+from turnos import datos
+from turnos.calendario import CalendarStore, generar_sitio, rango_mes
+
+PRESUPUESTO_MS = {"generar": 150, "calendario": 600, "horas": 100}
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--personas", type=int, default=150)
+    ap.add_argument("--sitios", type=int, default=10)
+    ap.add_argument("--meses", type=int, default=12)
+    ap.add_argument("--reps", type=int, default=5)
+    ap.add_argument("--presupuesto", action="store_true", help="fallar si algún paso supera PRESUPUESTO_MS")
+    args = ap.parse_args()
+
+    plantel = plantel_sintetico(args.personas, args.sitios)
+    anchor = dt.date(2025, 1, 6)
+    first = dt.date(2025, 1, 1)
+    last = rango_mes(2025 + (args.meses - 1) // 12, (args.meses - 1) % 12 + 1)[1]
+
+    def generar():
+        return [generar_sitio.__wrapped__(s, anchor, first, last, 0) for s in plantel.sitios]
+
+    def calendario():   # lo que hace la app al abrir cada sitio y recorrer el año (generación cacheada aparte)
+        return [CalendarStore(motor=lambda f, l, s=s: generar_sitio.__wrapped__(s, anchor, f, l, 0)).rango(first, last)
+                for s in plantel.sitios]
+
+    cal = pd.concat(generar(), ignore_index=True)
+    filas = len(cal)
+    francos = sum(len(s.cobertura) for s in plantel.sitios)
+    print(f"{len(plantel.personas)} personas · {len(plantel.sitios)} sitios · {len(plantel.turnos())} turnos · "
+          f"{francos} francos por día · {args.meses} meses = {filas} filas")
+
+    t = {
+        "generar": _mejor(generar, args.reps),
+        "calendario": _mejor(calendario, args.reps),
+        "horas": _mejor(lambda: datos.horas_planificadas(cal), args.reps),
+    }
+    excedidos = []
+    for paso, ms in t.items():
+        tope = PRESUPUESTO_MS[paso]
+        if ms > tope: excedidos.append(paso)
+        print(f"{paso:<11} {ms:>8.1f} ms  (presupuesto {tope} ms){'  EXCEDIDO' if ms > tope else ''}")
+    if excedidos and args.presupuesto: sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
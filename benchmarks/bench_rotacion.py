@@ -0,0 +1,38 @@
+"""
+Generación de la rotación: loop por día con dicts (antes) vs forma cerrada con NumPy (ahora).
+Que den lo mismo lo verifica tests/test_calendario.py.
+
+    python -m benchmarks.bench_rotacion
+"""
+import argparse
+import datetime as dt
+
+from benchmarks.bench_calendario import _mejor
+from tests._referencia import generar_loop
+from turnos.calendario import SITIO_DEF, generar_sitio, generar_ventana, rango_mes
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--reps", type=int, default=5)
+    args = ap.parse_args()
+
+    hoy = dt.date.today()
+    anchor = hoy - dt.timedelta(days=hoy.weekday())
+    print(f"{'meses':>5} {'loop ms':>8} {'numpy ms':>9} {'x':>5}")
+    for meses in [1, 6, 12, 60]:
+        dias = 31 * meses + 14
+        last = anchor + dt.timedelta(days=dias - 1)
+        t_old = _mejor(lambda: generar_loop(anchor, dias, 0), args.reps)
+        t_new = _mejor(lambda: generar_sitio.__wrapped__(SITIO_DEF, anchor, anchor, last, 0), args.reps)
+        print(f"{meses:>5} {t_old:>8.2f} {t_new:>9.2f} {t_old / t_new:>5.0f}")
+
+    # Arranque: antes se generaban 6 meses por defecto; ahora sólo el mes visible
+    first, last = rango_mes(hoy.year, hoy.month)
+    t_arranque = _mejor(lambda: generar_sitio.__wrapped__(SITIO_DEF, anchor, first, last, 0), args.reps)
+    print(f"\nArranque (mes visible): {t_arranque:.2f} ms, cache hit: "
+          f"{_mejor(lambda: generar_ventana(anchor, first, last, 0), args.reps) * 1000:.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Memoria por sesión del panel con datos sintéticos: cuánto cuesta abrir una pestaña más.
+
+    python -m benchmarks.bench_sesiones [--sesiones 20] [--tareas 50000]
+
+Abre `--sesiones` sesiones de app_turnos.py (AppTest) en el mismo proceso, como pestañas del mismo
+server, y para cada una mide con turnos.compartido.memoria lo propio y lo compartido. La columna
+"copia" es lo que costaría la sesión si cada una tuviera sus propios datos (propios + compartidos).
+Al final, una sesión escribe una fichada: su vista pasa a ser propia hasta que escriba otro.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _totales(at) -> tuple[float, float]:
+    from turnos.compartido import memoria
+    m = memoria({k: at.session_state[k] for k in at.session_state})
+    return m["Propios KiB"].sum(), m["Compartidos KiB"].sum()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sesiones", type=int, default=20)
+    ap.add_argument("--tareas", type=int, default=50000)
+    args = ap.parse_args()
+    from streamlit.testing.v1 import AppTest
+
+    d = tempfile.mkdtemp()
+    cwd = os.getcwd()
+    try:
+        shutil.copytree(os.path.join(ROOT, "turnos"), os.path.join(d, "turnos"))
+        shutil.copy(os.path.join(ROOT, "config.json"), d)
+        shutil.copy(os.path.join(ROOT, "app_turnos.py"), d)
+        os.chdir(d); sys.path.insert(0, d)
+        from benchmarks.sinteticos import poblar
+        from turnos.cache import CACHE
+        from turnos.storage import CsvBackend
+        (Path(d) / "data").mkdir()
+        filas = poblar(CsvBackend(Path(d) / "data"), tareas=args.tareas)
+        print(", ".join(f"{k}: {v}" for k, v in filas.items()))
+
+        sesiones = []
+        print(f"{'sesión':>6} {'propios KiB':>12} {'compartidos KiB':>16} {'copia KiB':>10}")
+        for i in range(args.sesiones):
+            at = AppTest.from_file(os.path.join(d, "app_turnos.py"), default_timeout=120).run()
+            if at.exception: raise RuntimeError(at.exception[0].message)
+            sesiones.append(at)
+            p, s = _totales(at)
+            if i < 3 or i == args.sesiones - 1: print(f"{i + 1:>6} {p:>12.0f} {s:>16.0f} {p + s:>10.0f}")
+        print(f"cache del proceso: {CACHE.stats()['bytes'] / 1024:.0f} KiB")
+
+        at = sesiones[0]
+        next(b for b in at.button if "Marcar" in b.label).click().run()
+        p, s = _totales(at)
+        print(f"tras escribir: propios {p:.0f} KiB, compartidos {s:.0f} KiB")
+        otra = sesiones[1]
+        otra.selectbox(key="clock_emp").select_index(1).run()   # otra persona: la misma sería un toque repetido
+        next(b for b in otra.button if "Marcar" in b.label).click().run()
+        at.run(); p, s = _totales(at)
+        print(f"tras escribir otra sesión: propios {p:.0f} KiB, compartidos {s:.0f} KiB")
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(d, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
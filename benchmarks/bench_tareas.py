@@ -0,0 +1,55 @@
+"""
+Rerun con muchas tareas en el mes: cuánto tarda, cuántos widgets arma y si toca tasks.csv.
+
+    python -m benchmarks.bench_tareas [--n 20000] [--app app_turnos.py]
+
+Arma un data/ temporal con `n` tareas del mes actual (la mitad "Hecho") y corre el script con AppTest.
+Con `--app` apuntando a una copia vieja se ve el patrón anterior (usar --n chico: un widget por celda).
+"""
+import argparse
+import datetime as dt
+import os
+import shutil
+import tempfile
+
+from benchmarks.bench_calendario import _mejor
+from benchmarks.sinteticos import tareas_sinteticas
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--n", type=int, default=20000)
+    ap.add_argument("--app", default=os.path.join(ROOT, "app_turnos.py"))
+    ap.add_argument("--reps", type=int, default=3)
+    args = ap.parse_args()
+    from streamlit.testing.v1 import AppTest
+
+    d = tempfile.mkdtemp()
+    try:
+        shutil.copytree(os.path.join(ROOT, "turnos"), os.path.join(d, "turnos"))
+        shutil.copy(os.path.join(ROOT, "config.json"), d)
+        shutil.copy(os.path.abspath(args.app), os.path.join(d, "app.py"))
+        os.makedirs(os.path.join(d, "data"))
+        hoy = dt.date.today()
+        tasks_csv = os.path.join(d, "data", "tasks.csv")
+        tareas_sinteticas(args.n, dt.date(hoy.year, hoy.month, 1)).to_csv(tasks_csv, index=False)
+
+        cwd = os.getcwd(); os.chdir(d)
+        try:
+            at = AppTest.from_file(os.path.join(d, "app.py"), default_timeout=600).run()
+            if at.exception: raise RuntimeError(at.exception[0].message)
+            mtime = os.stat(tasks_csv).st_mtime_ns
+            t = _mejor(at.run, args.reps)
+            reescrito = os.stat(tasks_csv).st_mtime_ns != mtime
+        finally:
+            os.chdir(cwd)
+        print(f"{args.n} tareas: rerun {t:.0f} ms · {len(at.checkbox)} checkboxes · {len(at.button)} botones · "
+              f"tasks.csv {'REESCRITO' if reescrito else 'sin tocar'} en el rerun")
+    finally:
+        shutil.rmtree(d, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Datos sintéticos con la forma de los de data/: fichadas de años, miles de overrides y faltas,
+listas de tareas grandes. Todo determinístico por `seed`.
+
+    python -m benchmarks.sinteticos --dir /tmp/datos --anios 3 --personas 12
+"""
+import argparse
+import datetime as dt
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from tests._referencia import INICIO, fichadas_sinteticas
+from turnos.calendario import PERSONAS, TURNOS
+from turnos.storage import Backend, CsvBackend
+
+def timelog_sintetico(personas: int, dias: int, seed: int = 0, inicio: dt.date = INICIO) -> pd.DataFrame:
+    """Fichadas con las columnas de data/timelog.csv, en orden de llegada."""
+    df = fichadas_sinteticas(personas, dias, seed=seed, inicio=inicio).sort_values("Timestamp", kind="stable")
+    return pd.DataFrame({
+        "id": np.arange(1, len(df) + 1), "Fecha": df["Fecha"].to_numpy(), "Persona": df["Persona"].to_numpy(),
+        "Tipo": df["Tipo"].to_numpy(), "Timestamp": df["Timestamp"].to_numpy(), "Turno": "—", "Fuente": "boton",
+    })
+
+
+def historial_sintetico(timelog: pd.DataFrame, corregidas: float = 0.05, seed: int = 0) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    (fichadas_hist, timelog vigente): alta de cada fichada, una corrección de hora para una
+    fracción `corregidas` y eliminación de una de cada cinco corregidas.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(timelog)
+    ts = pd.to_datetime(timelog["Timestamp"])
+    v1 = pd.DataFrame({
+        "ID": timelog["id"].to_numpy(), "Version": 1, "Persona": timelog["Persona"].to_numpy(),
+        "Fecha": timelog["Fecha"].to_numpy(), "Evento": timelog["Tipo"].to_numpy(), "Timestamp": ts.to_numpy(),
+        "Turno": timelog["Turno"].to_numpy(), "Fuente": timelog["Fuente"].to_numpy(),
+        "CreadoPor": timelog["Fuente"].to_numpy(), "CreadoEn": ts.to_numpy(), "Eliminado": False,
+    })
+    i = np.sort(rng.choice(n, size=int(n * corregidas), replace=False))
+    v2 = v1.iloc[i].assign(Version=2, EditadoPor="supervisor", Observaciones="corrección",
+                           Timestamp=ts.iloc[i].to_numpy() + pd.to_timedelta(rng.integers(-30, 30, i.size), "m").to_numpy())
+    v2["EditadoEn"] = v2["CreadoEn"] + pd.Timedelta(days=1)
+    j = i[::5]
+    v3 = v2[v2["ID"].isin(timelog["id"].iloc[j])].assign(Version=3, Eliminado=True, EliminadoPor="supervisor",
+                                                         MotivoEliminacion="duplicada")
+    v3["EliminadoEn"] = v3["EditadoEn"] + pd.Timedelta(hours=1)
+    vigente = timelog.copy()
+    vigente.loc[vigente.index[i], "Timestamp"] = v2["Timestamp"].to_numpy()
+    vigente = vigente.drop(vigente.index[j]).reset_index(drop=True)
+    hist = pd.concat([v1, v2, v3], ignore_index=True).sort_values(["CreadoEn","Version"], kind="stable")
+    return hist.reset_index(drop=True), vigente
+
+
+def overrides_sinteticos(n: int, dias: int, seed: int = 0, inicio: dt.date = INICIO) -> pd.DataFrame:
+    """`n` cambios manuales (A/B) sobre (Fecha, Turno) distintos."""
+    rng = np.random.default_rng(seed)
+    k = rng.choice(dias * len(TURNOS), size=min(n, dias * len(TURNOS)), replace=False)
+    nombres = np.array(PERSONAS + ["⚠ Falta cubrir"], dtype=object)
+    return pd.DataFrame({
+        "Fecha": [inicio + dt.timedelta(days=int(i)) for i in k // len(TURNOS)],
+        "Turno": np.array(TURNOS, dtype=object)[k % len(TURNOS)],
+        "Persona A": nombres[rng.integers(0, len(nombres), k.size)],
+        "Persona B": nombres[rng.integers(0, len(nombres), k.size)],
+        "Libre": np.array(PERSONAS, dtype=object)[rng.integers(0, len(PERSONAS), k.size)],
+    }).sort_values(["Fecha","Turno"]).reset_index(drop=True)
+
+
+def faltas_sinteticas(n: int, dias: int, seed: int = 0, inicio: dt.date = INICIO) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    fechas = [inicio + dt.timedelta(days=int(i)) for i in np.sort(rng.integers(0, dias, n))]
+    return pd.DataFrame({
+        "Fecha": fechas,
+        "Turno": np.array(TURNOS, dtype=object)[rng.integers(0, len(TURNOS), n)],
+        "Slot": np.where(rng.integers(0, 2, n) == 0, "A", "B"),
+        "Persona": np.array(PERSONAS, dtype=object)[rng.integers(0, len(PERSONAS), n)],
+        "Motivo": "FALTA", "LoggedAt": [f"{f.isoformat()}T08:00:00" for f in fechas],
+    })
+
+
+def tareas_sinteticas(n: int, first: dt.date = INICIO, dias: int = 28, seed: int = 0) -> pd.DataFrame:
+    """`n` tareas entre first y first + dias (la mitad "Hecho")."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "id": np.arange(1, n + 1),
+        "Fecha": [(first + dt.timedelta(days=int(d))).isoformat() for d in rng.integers(0, dias, n)],
+        "Turno": np.array(TURNOS + [""], dtype=object)[rng.integers(0, len(TURNOS) + 1, n)],
+        "Persona": np.array(PERSONAS + [""], dtype=object)[rng.integers(0, len(PERSONAS) + 1, n)],
+        "Titulo": [f"Tarea {i}" for i in range(1, n + 1)],
+        "Estado": np.where(np.arange(n) % 2 == 0, "Hecho", "Pendiente"),
+        "Due": "", "CreatedAt": "2025-01-01T00:00:00",
+    })
+
+
+def poblar(b: Backend, anios: int = 3, personas: int = 12, overrides: int = 3000, faltas: int = 2000,
+           tareas: int = 50000, seed: int = 0) -> dict[str, int]:
+    """Reemplaza los datasets de `b` con datos sintéticos desde INICIO. Devuelve filas por dataset."""
+    dias = 365 * anios
+    hist, timelog = historial_sintetico(timelog_sintetico(personas, dias, seed), seed=seed)
+    datos = {
+        "timelog": timelog,
+        "fichadas_hist": hist,
+        "overrides": overrides_sinteticos(overrides, dias, seed),
+        "absences": faltas_sinteticas(faltas, dias, seed),
+        "tasks": tareas_sinteticas(tareas, INICIO, dias, seed),
+    }
+    for name, df in datos.items(): b.replace(name, df)
+    return {name: len(df) for name, df in datos.items()}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--dir", required=True, help="carpeta data/ a (re)escribir")
+    ap.add_argument("--anios", type=int, default=3)
+    ap.add_argument("--personas", type=int, default=12)
+    ap.add_argument("--overrides", type=int, default=3000)
+    ap.add_argument("--faltas", type=int, default=2000)
+    ap.add_argument("--tareas", type=int, default=50000)
+    args = ap.parse_args()
+    Path(args.dir).mkdir(parents=True, exist_ok=True)
+    n = poblar(CsvBackend(Path(args.dir)), args.anios, args.personas, args.overrides, args.faltas, args.tareas)
+    for name, filas in n.items(): print(f"{name}: {filas} filas -> {args.dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Suite de regresión de los caminos calientes, sin Streamlit, sobre datos sintéticos.
+
+    python -m benchmarks.suite                  # compara contra benchmarks/base.json
+    python -m benchmarks.suite --guardar        # mide y reescribe la base (en esta máquina)
+    python -m benchmarks.suite -k timelog       # sólo los casos cuyo nombre contiene "timelog"
+
+Cada caso toma el mejor de `--reps` corridas. Los tiempos base son relativos: junto con ellos se
+guarda lo que tarda una carga fija de pandas/NumPy (`_calibracion`), que se vuelve a medir en cada
+corrida, y la base se escala por esa proporción (una máquina o un momento más lento sube todas las
+bases por igual). Un caso que supera su base escalada por más de la tolerancia (por defecto 50 %,
+`--tolerancia 0.5`) y de `--piso` ms se vuelve a medir con el doble de corridas antes de contarlo
+como regresión; si se confirma, sale con código 1. Con `--sin-base` sólo informa tiempos.
+Que un resultado sea correcto no se verifica acá sino en tests/ (pytest).
+"""
+import argparse
+import datetime as dt
+import io
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_calendario import _mejor
+from benchmarks.bench_importar import export_sintetico
+from benchmarks.sinteticos import INICIO, poblar
+from turnos import datos
+from turnos.acumulados import Acumulado
+from turnos.archivo import ArchivoBackend
+from turnos.cache import CACHE
+from turnos.cobertura import Cobertura, Reglas, ventana
+from turnos.conciliacion import conciliar, desvios
+from turnos.exportar import exportar
+from turnos.calendario import PERSONAS, SITIO_DEF, CalendarStore, generar_sitio, generar_ventana, rango_mes
+from turnos.fichadas import emparejar, horas_por_persona
+from turnos.grilla import mes_html
+from turnos.importar import DEFAULTS as IMPORTAR
+from turnos.importar import importar
+from turnos.storage import CsvBackend, SqliteBackend
+
+BASE = Path(__file__).with_name("base.json")
+
+
+def casos(d: Path) -> dict:
+    """Arma los backends con datos sintéticos y devuelve {nombre: función sin argumentos}."""
+    csv_b = CsvBackend(d / "csv"); (d / "csv").mkdir()
+    sql_b = SqliteBackend(d / "turnos.db")
+    arch_b = ArchivoBackend(CsvBackend(d / "hot"), d / "archivo"); (d / "hot").mkdir()
+    for b in (csv_b, sql_b, arch_b): poblar(b)
+
+    anchor = INICIO - dt.timedelta(days=INICIO.weekday())
+    anio = (INICIO, dt.date(INICIO.year, 12, 31))
+    mes = rango_mes(INICIO.year + 1, 6)
+
+    def store_nuevo():
+        return CalendarStore(motor=lambda f, l: generar_ventana(anchor, f, l, 0),
+                             overrides=lambda f, l: datos.load_overrides(csv_b, f, l))
+
+    for name in arch_b.datasets: arch_b.rotar(name, dt.date(INICIO.year + 2, 12, 1))   # caliente: sólo el último mes
+    store = store_nuevo(); store.rango(*mes)
+    timelog_anio = datos.load_timelog(csv_b, anio[0], anio[1] + dt.timedelta(days=1))
+    tareas = datos.load_tasks(csv_b)
+    ventana_mes = ventana(*mes, SITIO_DEF, Reglas())
+    cobertura = Cobertura(SITIO_DEF, PERSONAS, store.rango(*ventana_mes), *ventana_mes)
+    dias_mes = [mes[0] + dt.timedelta(days=i) for i in range((mes[1] - mes[0]).days + 1)]
+    # journal con muchas operaciones sobre la base de overrides
+    for i in range(500):
+        csv_b.append("overrides", "upsert", [{"Fecha": INICIO + dt.timedelta(days=i), "Turno": "Noche", "Persona A": "Hugo"}])
+
+    # acumulados por día/mes ya armados: lo que paga una consulta de un año después del primer uso
+    plan = Acumulado("plan", ["Persona"], "Horas", lambda f, l: datos.horas_plan_dias(store.rango(f, l)))
+    faltas, fichadas = datos.faltas_acumuladas(sql_b), datos.horas_fichadas(sql_b, anio[1])
+    for a in (plan, faltas, fichadas): a.rango(*anio)
+
+    # export del reloj ya importado: lo que cuesta leerlo y descartarlo entero por el merge
+    imp_b = CsvBackend(d / "imp"); (d / "imp").mkdir()
+    credenciales = export_sintetico(d / "export.csv", 20000, 20)
+    op_imp = {**IMPORTAR, "formato": "%d/%m/%Y %H:%M:%S"}
+    importar(imp_b, d / "export.csv", credenciales, op_imp)
+
+    def sin_cache(fn):
+        def run():
+            CACHE.invalidate(); fn()
+        return run
+
+    return {
+        "rotacion_anio":            lambda: generar_sitio.__wrapped__(SITIO_DEF, anchor, *anio, 0),
+        "calendario_anio_overrides": lambda: store_nuevo().rango(*anio),
+        "grilla_mes_html":          lambda: mes_html(store, *mes),
+        "horas_planificadas_anio":  lambda: datos.horas_planificadas(store.rango(*anio)),
+        "cobertura_armar_mes":      lambda: Cobertura(SITIO_DEF, PERSONAS, store.rango(*ventana_mes), *ventana_mes),
+        "cobertura_candidatos_mes": lambda: [cobertura.candidatos(f, t) for f in dias_mes for t in SITIO_DEF.turnos],
+        "csv_timelog_parse":        sin_cache(lambda: datos.load_timelog(csv_b, *mes)),
+        "csv_timelog_cache_hit":    lambda: datos.load_timelog(csv_b, *mes),
+        "csv_overrides_replay":     sin_cache(lambda: datos.load_overrides(csv_b, *mes)),
+        "archivo_timelog_parse":    sin_cache(lambda: datos.load_timelog(arch_b, *rango_mes(INICIO.year, 6))),
+        "sqlite_timelog_mes":       sin_cache(lambda: datos.load_timelog(sql_b, *mes)),
+        "sqlite_absences_mes":      sin_cache(lambda: datos.load_absences(sql_b, *mes)),
+        "csv_fichadas_al_mes":      lambda: datos.fichadas_al(csv_b, dt.datetime(mes[0].year, mes[0].month, 15), *mes),
+        "sqlite_fichadas_al_mes":   sin_cache(lambda: datos.fichadas_al(sql_b, dt.datetime(mes[0].year, mes[0].month, 15), *mes)),
+        "sqlite_timelog_cache_hit": lambda: datos.load_timelog(sql_b, *mes),
+        "emparejar_anio":           lambda: horas_por_persona(emparejar(timelog_anio)[0]),
+        "conciliar_anio":           lambda: desvios(conciliar(store.rango(*anio), timelog_anio, *anio, datos.load_absences(csv_b, *anio))),
+        "acumulados_anio":          lambda: [a.rango(*anio) for a in (plan, faltas, fichadas)],
+        "acumulados_anio_fichada":  lambda: (datos.append_timelog(sql_b, {"Fecha": anio[1], "Persona": "Hugo", "Tipo": "Ingreso"}),
+                                             fichadas.rango(*anio)),
+        "reimportar_export_20k":    lambda: importar(imp_b, d / "export.csv", credenciales, op_imp),
+        "tareas_filtrar_mes":       lambda: datos.filtrar_tareas(tareas, *mes, persona="Hugo", estado="Pendiente"),
+        "csv_append_timelog":       lambda: datos.append_timelog(csv_b, {"Fecha": mes[0], "Persona": "Hugo", "Tipo": "Ingreso"}),
+        "exportar_mes_xlsx":        lambda: exportar(sql_b, io.BytesIO(), *mes, anchor, 0),
+        "sqlite_append_timelog":    lambda: datos.append_timelog(sql_b, {"Fecha": mes[0], "Persona": "Hugo", "Tipo": "Ingreso"}),
+        "csv_append_repetida":      lambda: datos.append_timelog(csv_b, {"Fecha": mes[0], "Persona": "Hugo", "Tipo": "Ingreso"}, clave="doble"),
+        "sqlite_append_repetida":   lambda: datos.append_timelog(sql_b, {"Fecha": mes[0], "Persona": "Hugo", "Tipo": "Ingreso"}, clave="doble"),
+    }
+
+
+def calibracion():
+    """Carga fija de pandas/NumPy (agrupar, ordenar, textos): mide qué tan rápida está la máquina ahora."""
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"k": rng.integers(0, 2000, 200_000), "v": rng.random(200_000)})
+    return lambda: (df.groupby("k")["v"].sum(), np.sort(df["v"].to_numpy()), df["k"].astype(str).str.len().sum())
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--reps", type=int, default=5)
+    ap.add_argument("--tolerancia", type=float, default=0.5)
+    ap.add_argument("--piso", type=float, default=1.0, help="ms de diferencia mínima para contar como regresión")
+    ap.add_argument("--guardar", action="store_true", help="reescribir benchmarks/base.json con esta corrida")
+    ap.add_argument("--sin-base", action="store_true", help="sólo medir, sin comparar contra la base")
+    ap.add_argument("-k", default="", help="filtrar casos por nombre")
+    args = ap.parse_args()
+
+    base = json.loads(BASE.read_text(encoding="utf-8")) if BASE.exists() else {}
+    calibrar = calibracion()
+    with tempfile.TemporaryDirectory() as tmp:
+        fns = {n: fn for n, fn in casos(Path(tmp)).items() if args.k in n}
+        cal = _mejor(calibrar, args.reps)
+        medidos = {n: _mejor(fn, args.reps) for n, fn in fns.items()}
+        cal = min(cal, _mejor(calibrar, args.reps))   # la más rápida de antes y después de los casos
+        escala = cal / base["_calibracion"] if base.get("_calibracion") and not args.sin_base else 1.0
+        print(f"calibración {cal:.2f} ms" + (f" (base {base['_calibracion']:.2f} ms: bases x{escala:.2f})" if escala != 1.0 else ""))
+
+        print(f"{'caso':<26} {'ms':>9} {'base ms':>9} {'var':>7}")
+        regresiones = []
+        for n, ms in medidos.items():
+            b = None if args.sin_base or base.get(n) is None else base[n] * escala
+            if b is None:
+                print(f"{n:<26} {ms:>9.2f} {'—':>9}"); continue
+            if ms / b - 1 > args.tolerancia and ms - b > args.piso:   # ¿ruido? se confirma con más corridas
+                ms = medidos[n] = min(ms, _mejor(fns[n], 2 * args.reps))
+            var = ms / b - 1
+            marca = "  REGRESIÓN" if var > args.tolerancia and ms - b > args.piso else ""
+            if marca: regresiones.append(n)
+            print(f"{n:<26} {ms:>9.2f} {b:>9.2f} {var:>+7.0%}{marca}")
+
+    if args.guardar:
+        if base.get("_calibracion"):   # casos no medidos en esta corrida: se llevan a la calibración nueva
+            base = {n: round(v * cal / base["_calibracion"], 3) for n, v in base.items()}
+        base.update({n: round(ms, 3) for n, ms in medidos.items()}, _calibracion=round(cal, 3))
+        BASE.write_text(json.dumps(base, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        print(f"Base actualizada: {BASE}")
+    elif regresiones:
+        print(f"{len(regresiones)} caso(s) más de {args.tolerancia:.0%} por encima de la base: {', '.join(regresiones)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Kiosco de fichadas: Ingreso/Salida del día para un empleado, sin el panel de administración.
+
+    streamlit run kiosco.py
+
+No arma el calendario ni carga tareas o faltas: lee los turnos planificados de hoy (rotación del
+sitio de la persona en config.json + overrides de ese día) y las fichadas de hoy. El panel completo sigue en app_turnos.py.
+"""
+import datetime as dt
+import uuid
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+
+if int(pd.__version__.split(".")[0]) < 3: pd.set_option("mode.copy_on_write", True)   # antes de turnos.cache: instantáneas compartidas sin copia
+
+from turnos import autocierre, datos
+from turnos.calendario import CalendarStore, generar_sitio, rotacion
+from turnos.fichadas import ahora, del_dia, zona
+from turnos.perfil import PERFIL
+from turnos.plantel import cargar_plantel
+from turnos.storage import get_backend, leer_config
+
+st.set_page_config(page_title="Fichadas – La Lucy", layout="centered")
+
+# ================== PERSISTENCIA ==================
+DATA_DIR = Path("data"); DATA_DIR.mkdir(exist_ok=True)
+CONFIG = leer_config()
+PERFIL.configurar(CONFIG)   # config.json "perfil": sólo al JSONL, el kiosco no tiene panel
+SESION = st.session_state.setdefault("_sesion", uuid.uuid4().hex[:8])
+PERFIL.cerrar(st.session_state.pop("_perfil_abierto", None), SESION, interrumpido=True)   # el anterior no llegó al final
+st.session_state._perfil_abierto = PERFIL.empezar("kiosco")
+STORAGE = get_backend(DATA_DIR, CONFIG)
+PLANTEL = cargar_plantel(CONFIG)
+ZONA = zona(CONFIG)   # hora local de config.json, no la del servidor
+
+def plan_del_dia(fecha: dt.date, persona: str) -> list[str]:
+    """Turnos planificados de `persona`: sólo ese día de la rotación de su sitio, con sus overrides."""
+    anchor, offset = rotacion(CONFIG, ahora(ZONA).date())
+    store = CalendarStore(generar_sitio(PLANTEL.sitio_de(persona), anchor, fecha, fecha, offset))
+    store.patch(datos.load_overrides(STORAGE, fecha, fecha))
+    return store.plan(fecha, persona)
+
+def fichar(persona: str, tipo: str, turnos: str, clave: str):
+    now = ahora(ZONA)
+    with PERFIL.suelto("callback fichar", "callback fichar", SESION):   # on_click: corre antes del script
+        row = datos.append_timelog(STORAGE, {
+            "Fecha": now.date(), "Persona": persona, "Tipo": tipo,
+            "Timestamp": now, "Turno": turnos, "Fuente": "kiosco",
+        }, tz=ZONA, clave=clave)
+    st.session_state._fichada_ok = (f"{tipo} de {persona} ya registrado." if row.get("_repetida") else
+                                    f"{tipo} de {persona} registrad{'o' if tipo == 'Ingreso' else 'a'} {now.strftime('%H:%M')}.")
+
+# ================== KIOSCO ==================
+st.title("⏱️ Fichadas")
+hoy = ahora(ZONA).date()
+st.caption(hoy.strftime("%d/%m/%Y"))
+autocierre.programado(STORAGE, CONFIG, PLANTEL.duraciones(), ZONA)
+STORAGE.rotar_meses_cerrados(hoy)   # con archivo mensual: al cambiar el mes, el anterior pasa a Parquet
+
+emp = st.selectbox("Empleado", PLANTEL.activos(), index=None, placeholder="Elegí tu nombre", key="kiosco_emp")
+if "_fichada_ok" in st.session_state:
+    st.success(st.session_state.pop("_fichada_ok"))
+if emp is None:
+    PERFIL.cerrar(st.session_state.pop("_perfil_abierto", None), SESION)
+    st.stop()
+
+plan = plan_del_dia(hoy, emp)
+turnos_plan = ", ".join(plan) if plan else "—"
+st.caption(f"Turnos planificados hoy: **{turnos_plan}**")
+
+day_logs = del_dia(datos.load_timelog(STORAGE, hoy, hoy), emp, hoy)
+idx = datos.abiertos(STORAGE, hoy)   # sin recorrer fichadas; ve el Noche que empezó ayer
+abierto = idx.de(emp)
+tipo = "Salida" if abierto is not None else "Ingreso"
+if abierto is not None and abierto["Fecha"] != hoy:
+    st.caption(f"Ingreso abierto desde el {abierto['Timestamp']:%d/%m %H:%M}.")
+st.button("🔴 Marcar salida" if tipo == "Salida" else "🟢 Marcar ingreso", type="primary",
+          use_container_width=True, on_click=fichar, args=(emp, tipo, turnos_plan, datos.clave_fichada(emp, tipo, idx.ultimo(emp))))
+
+if day_logs.empty:
+    st.caption("Sin fichadas hoy.")
+else:
+    st.markdown("\n".join(
+        f"- {'—' if pd.isna(r.Timestamp) else r.Timestamp.strftime('%H:%M')} · {r.Tipo}"
+        for r in day_logs.itertuples()
+    ))
+
+PERFIL.cerrar(st.session_state.pop("_perfil_abierto", None), SESION)
@@ -0,0 +1,186 @@
+"""
+Implementaciones de referencia (las anteriores, fila por fila) y datos sintéticos que usan los
+tests para verificar las versiones rápidas. Los benchmarks importan de acá para medir lo mismo;
+un cambio en benchmarks/ no toca lo que se verifica.
+"""
+import datetime as dt
+import random
+
+import numpy as np
+import pandas as pd
+
+from turnos.calendario import ASIGN_DEF, DIAS, HORAS_DEF, ORDEN_LIBRE, PERSONAS, TURNOS, CalendarStore, Sitio
+from turnos.fichadas import emparejar, horas_por_persona
+from turnos.plantel import Persona, Plantel
+
+INICIO = dt.date(2024, 1, 1)
+
+
+# ================== DATOS SINTÉTICOS ==================
+def nombres(personas: int) -> np.ndarray:
+    base = np.array(PERSONAS, dtype=object)
+    if personas <= len(base): return base[:personas]
+    extra = np.array([f"P{i:03d}" for i in range(personas - len(base))], dtype=object)
+    return np.concatenate([base, extra])
+
+
+def fichadas_sinteticas(personas: int, dias: int, noche: bool = True, seed: int = 0,
+                        inicio: dt.date = INICIO) -> pd.DataFrame:
+    """Un turno de 8 h por persona y día (con ruido); un tercio de la gente hace Noche (22→06)."""
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp(inicio)
+    p = np.repeat(np.arange(personas), dias)
+    d = np.tile(np.arange(dias), personas)
+    base_h = np.where((p % 3 == 2) & noche, 22, np.where(p % 3 == 1, 14, 6))
+    ent = start + pd.to_timedelta(d, "D") + pd.to_timedelta(base_h * 60 + rng.integers(-10, 10, p.size), "m")
+    sal = ent + pd.to_timedelta(8 * 60 + rng.integers(-15, 30, p.size), "m")
+    quien = nombres(personas)[p]
+    df = pd.DataFrame({
+        "Persona": np.r_[quien, quien],
+        "Tipo": np.r_[np.full(p.size, "Ingreso", dtype=object), np.full(p.size, "Salida", dtype=object)],
+        "Timestamp": np.r_[ent.to_numpy(), sal.to_numpy()],
+    })
+    df["Fecha"] = df["Timestamp"].dt.date   # como la app: Fecha del momento en que se ficha
+    return df.sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+HORARIOS = {"Mañana": ("06:00", "14:00"), "Tarde": ("14:00", "22:00"), "Noche": ("22:00", "06:00 (+1)")}
+
+
+def plan_sintetico(personas: int, dias: int, seed: int = 0) -> pd.DataFrame:
+    """Filas de calendario (una por persona y día, en Persona A) que corresponden a fichadas_sinteticas."""
+    rng = np.random.default_rng(seed)
+    turno = np.array(list(HORARIOS), dtype=object)[np.arange(personas) % 3]
+    fechas = pd.date_range(INICIO, periods=dias).date
+    cal = pd.DataFrame({"Fecha": np.repeat(fechas, personas), "Turno": np.tile(turno, dias),
+                        "Persona A": np.tile(nombres(personas), dias), "Persona B": ""})
+    cal["Hora Inicio"] = cal["Turno"].map(lambda t: HORARIOS[t][0])
+    cal["Hora Fin"] = cal["Turno"].map(lambda t: HORARIOS[t][1])
+    return cal[rng.random(len(cal)) >= 0.05].reset_index(drop=True)   # días fichados fuera del plan
+
+
+PLANTILLAS = list(HORAS_DEF.items()) + [("Refuerzo", ("10:00","18:00")), ("Corto", ("08:00","12:00"))]
+
+
+def plantel_sintetico(personas: int, sitios: int) -> Plantel:
+    """Sitios de personas/sitios cada uno: 3–5 turnos con dos titulares, hasta 3 de cobertura."""
+    gente, out = [], []
+    por_sitio = personas // sitios
+    for i in range(sitios):
+        quien = [f"S{i:02d}P{j:02d}" for j in range(por_sitio)]
+        m = min(3 + i % 3, (por_sitio - 1) // 2)
+        turnos = [(f"S{i:02d} {n}", h) for n, h in PLANTILLAS[:m]]
+        cob = quien[2 * m:2 * m + 3]
+        out.append(Sitio(f"Sitio {i}", tuple(t for t, _ in turnos), tuple(h for _, h in turnos),
+                         tuple((quien[2 * k], quien[2 * k + 1]) for k in range(m)), tuple(quien), tuple(cob)))
+        gente += [Persona(n, True, f"Sitio {i}", "#E2E8F0") for n in quien]
+    return Plantel(tuple(gente), tuple(out))
+
+
+VALORES = PERSONAS + ["⚠ Falta cubrir", None, np.nan]
+
+
+def overrides_aleatorios(rng: random.Random, cal: pd.DataFrame, n: int) -> pd.DataFrame:
+    """Overrides con clave única (como los deja el storage), parciales y algunos fuera de rango."""
+    fechas = list(cal["Fecha"].unique()) + [cal["Fecha"].max() + dt.timedelta(days=40)]
+    claves = {(rng.choice(fechas), rng.choice(TURNOS)) for _ in range(n)}
+    cols = rng.sample(["Persona A","Persona B","Libre"], rng.randint(1, 3))
+    rows = [{"Fecha": f, "Turno": t, **{c: rng.choice(VALORES) for c in cols}} for f, t in claves]
+    return pd.DataFrame(rows, columns=["Fecha","Turno"] + cols)
+
+
+# ================== REFERENCIAS ==================
+def generar_loop(anchor_monday: dt.date, dias: int, offset_week: int) -> pd.DataFrame:
+    """Rotación fila por fila (la implementación anterior a generar_sitio)."""
+    rows = []
+    for i in range(dias):
+        fecha = anchor_monday + dt.timedelta(days=i)
+        wd = fecha.weekday()
+        wk = (fecha - anchor_monday).days // 7
+        libre = ORDEN_LIBRE[(wk + wd + offset_week) % 7]
+        for turno in TURNOS:
+            a,b = ASIGN_DEF[turno]; hi,hf = HORAS_DEF[turno]
+            if libre == a: pa,pb = "Alina", b
+            elif libre == b: pa,pb = a, "Alina"
+            else: pa,pb = a,b
+            rows.append({"Fecha":fecha,"Día":DIAS[wd],"Turno":turno,"Hora Inicio":hi,"Hora Fin":hf,
+                         "Persona A":pa,"Persona B":pb,"Libre":libre})
+    df = pd.DataFrame(rows)
+    df["__o__"] = df["Turno"].map({"Mañana":0,"Tarde":1,"Noche":2})
+    return df.sort_values(["Fecha","__o__"]).drop(columns="__o__").reset_index(drop=True)
+
+
+def apply_overrides_merge(cal: pd.DataFrame, ov: pd.DataFrame) -> pd.DataFrame:
+    """Overrides con merge + fillna sobre todo el calendario (la implementación anterior a CalendarStore.patch)."""
+    if ov.empty: return cal
+    m = cal.merge(ov, on=["Fecha","Turno"], how="left", suffixes=("","_ov"))
+    for col in ["Persona A","Persona B","Libre"]:
+        if f"{col}_ov" in m.columns:
+            m[col] = m[f"{col}_ov"].fillna(m[col])
+            m.drop(columns=[f"{col}_ov"], inplace=True)
+    return m
+
+
+def normalizar(df: pd.DataFrame) -> pd.DataFrame:
+    return df.astype(object).where(df.notna(), None).reset_index(drop=True)
+
+
+def grilla_escaneo(cal, first: dt.date, last: dt.date) -> list:
+    """Grilla con un filtro sobre todo el calendario por día y otro por turno (el patrón anterior)."""
+    out = []
+    day = first
+    while day <= last:
+        sub = cal[cal["Fecha"] == day]
+        if not sub.empty:
+            libre = str(sub.iloc[0]["Libre"])
+            for t in TURNOS:
+                row = sub[sub["Turno"] == t]
+                if row.empty: continue
+                out.append((day, libre, t, str(row.iloc[0]["Persona A"]), str(row.iloc[0]["Persona B"])))
+        day += dt.timedelta(days=1)
+    return out
+
+
+def grilla_store(store: CalendarStore, first: dt.date, last: dt.date) -> list:
+    out = []
+    day = first
+    while day <= last:
+        turnos = store.dia(day)
+        if turnos:
+            libre = store.libre(day)
+            for t, row in turnos.items():
+                out.append((day, libre, t, str(row["Persona A"]), str(row["Persona B"])))
+        day += dt.timedelta(days=1)
+    return out
+
+
+def _sumar_intervalos(logs: pd.DataFrame, time_col: str = "Timestamp") -> pd.Timedelta:
+    if logs.empty:
+        return pd.Timedelta(0)
+    logs = logs.sort_values(time_col)
+    total = pd.Timedelta(0)
+    current_in = None
+    for _, r in logs.iterrows():
+        ts = r[time_col]
+        if r["Tipo"] == "Ingreso":
+            current_in = ts
+        elif r["Tipo"] == "Salida" and current_in is not None:
+            if pd.notna(ts) and pd.notna(current_in) and ts > current_in:
+                total += (ts - current_in)
+            current_in = None
+    return total
+
+
+def resumen_loop(logs: pd.DataFrame) -> pd.DataFrame:
+    """Horas por (Persona, Fecha) con iterrows (la implementación anterior: pierde las salidas del día siguiente)."""
+    resumen = []
+    for (p, d), g in logs.groupby(["Persona","Fecha"]):
+        total_td = _sumar_intervalos(g)
+        if total_td.total_seconds() > 0:
+            resumen.append({"Persona":p,"Fecha":d,"Horas":total_td.total_seconds()/3600.0})
+    return pd.DataFrame(resumen)
+
+
+def resumen_vectorizado(logs: pd.DataFrame) -> pd.DataFrame:
+    pares, _ = emparejar(logs)
+    return horas_por_persona(pares[pares["Horas"] > 0])
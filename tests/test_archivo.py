@@ -0,0 +1,71 @@
+import datetime as dt
+import threading
+
+import pandas as pd
+
+from turnos.archivo import ArchivoBackend
+from turnos.storage import CsvBackend
+
+
+def _archivo(tmp_path) -> ArchivoBackend:
+    (tmp_path / "hot").mkdir()
+    return ArchivoBackend(CsvBackend(tmp_path / "hot"), tmp_path / "archivo")
+
+
+def _faltas(mes: int, n: int) -> list[dict]:
+    return [{"Fecha": dt.date(2025, mes, 1 + i % 28), "Turno": "Mañana", "Slot": "A", "Persona": f"P{i:03d}",
+             "Motivo": "FALTA", "LoggedAt": "2025-01-01T00:00:00"} for i in range(n)]
+
+
+def test_load_tipado_con_y_sin_particiones(tmp_path):
+    b = _archivo(tmp_path)
+    b.append("absences", "add", _faltas(3, 5))
+    sin = b.load("absences")
+    b.rotar("absences", dt.date(2025, 4, 1)); b.append("absences", "add", _faltas(4, 5))
+    con = b.load("absences")
+    assert b.particiones("absences")
+    assert isinstance(sin["Fecha"].iat[0], dt.date) and isinstance(con["Fecha"].iat[0], dt.date)
+    assert sin["Fecha"].dtype == con["Fecha"].dtype
+
+
+def test_correcciones_concurrentes_sobre_un_mes_archivado(tmp_path):
+    """Cada hilo cambia el Motivo de sus filas archivadas (leer, aplicar y reescribir la partición): ninguna se pierde."""
+    b = _archivo(tmp_path)
+    filas = _faltas(3, 80)
+    b.append("absences", "add", filas)
+    b.rotar("absences", dt.date(2025, 4, 1))
+
+    def corregir(h):
+        for r in filas[h::8]: b.append("absences", "upsert", [{**r, "Motivo": f"corregida {h}"}])
+
+    ts = [threading.Thread(target=corregir, args=(h,)) for h in range(8)]
+    for t in ts: t.start()
+    for t in ts: t.join()
+    df = b.load("absences")
+    assert len(df) == 80
+    assert df["Motivo"].str.startswith("corregida").all()
+
+
+def test_correccion_mientras_se_rota(tmp_path):
+    """Correcciones de febrero mientras febrero pasa al archivo: ninguna queda en la versión vieja."""
+    b = _archivo(tmp_path)
+    b.append("absences", "add", _faltas(1, 40))
+    b.rotar("absences", dt.date(2025, 2, 1))
+    febrero = _faltas(2, 40)
+    b.append("absences", "add", febrero)
+    t = threading.Thread(target=lambda: [b.append("absences", "upsert", [{**r, "Motivo": "corregida"}]) for r in febrero])
+    t.start(); b.rotar("absences", dt.date(2025, 3, 1)); t.join()
+    df = b.load("absences")
+    assert len(df) == 80
+    assert (df.loc[pd.to_datetime(df["Fecha"]).dt.month == 2, "Motivo"] == "corregida").all()
+
+
+def test_rotar_meses_cerrados_una_vez_por_mes(tmp_path):
+    b = _archivo(tmp_path)
+    b.append("absences", "add", _faltas(3, 5) + _faltas(4, 3))
+    assert CsvBackend(tmp_path / "otro").rotar_meses_cerrados(dt.date(2025, 4, 2)) == {}   # sin archivo: nada
+    assert b.rotar_meses_cerrados(dt.date(2025, 4, 2)) == {"absences": {"2025-03": 5}}
+    b.append("absences", "add", [{**_faltas(3, 1)[0], "Persona": "Tarde"}])   # llega tarde: queda caliente hasta el próximo mes
+    assert b.rotar_meses_cerrados(dt.date(2025, 4, 20)) == {}
+    assert b.rotar_meses_cerrados(dt.date(2025, 5, 1)) == {"absences": {"2025-03": 1, "2025-04": 3}}
+    assert b.inner.load("absences").empty and len(b.load("absences")) == 9
@@ -0,0 +1,27 @@
+import contextlib
+
+import pandas as pd
+import pytest
+
+from turnos import cache
+
+
+@pytest.fixture(params=[True, False], ids=["cow", "sin-cow"])
+def cow(request, monkeypatch):
+    """Sin CoW: pandas 2.x con mode.copy_on_write apagado (en pandas >= 3 no se puede apagar: sólo el camino de copia)."""
+    monkeypatch.setattr(cache, "COW", request.param and cache.COW)
+    apagado = not request.param and int(pd.__version__.split(".")[0]) < 3
+    with pd.option_context("mode.copy_on_write", False) if apagado else contextlib.nullcontext():
+        yield cache.COW
+
+
+def test_quien_modifica_su_copia_no_toca_la_instantanea(cow):
+    c = cache.DataCache()
+    nuevo = lambda: pd.DataFrame({"Persona": ["Ana", "Beto"], "Horas": [8.0, 6.0]})
+    for df in (c.get("k", 1, nuevo), c.get("k", 1, nuevo)):   # el que la arma y uno que la lee del cache
+        df.loc[0, "Horas"] = 99.0
+        df["Persona"] = df["Persona"].str.upper()
+        df.drop(index=1, inplace=True)
+        col = df["Horas"]; col.iloc[0] = -1.0
+    pd.testing.assert_frame_equal(c.valores()[0], nuevo())
+    assert c.get("k", 1, nuevo).equals(nuevo()) and c.hits == 2
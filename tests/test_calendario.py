@@ -0,0 +1,41 @@
+import datetime as dt
+import random
+
+import pandas as pd
+import pytest
+
+from tests._referencia import apply_overrides_merge, generar_loop, grilla_escaneo, grilla_store, normalizar, overrides_aleatorios
+from turnos.calendario import SITIO_DEF, CalendarStore, generar_rango_rotativo, generar_sitio, rango_mes
+
+ANCHOR = dt.date(2025, 1, 6)
+
+
+@pytest.mark.parametrize("dias", [1, 45, 400])
+@pytest.mark.parametrize("offset", range(7))
+def test_rotacion_vectorizada_igual_al_loop(dias, offset):
+    last = ANCHOR + dt.timedelta(days=dias - 1)
+    pd.testing.assert_frame_equal(generar_loop(ANCHOR, dias, offset),
+                                  generar_sitio.__wrapped__(SITIO_DEF, ANCHOR, ANCHOR, last, offset), check_dtype=False)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_patch_igual_al_merge(seed):
+    """Overrides aleatorios (parciales, con vacíos y fuera de rango): patch da lo mismo que merge + fillna."""
+    rng = random.Random(seed)
+    for i in range(50):
+        anchor = dt.date(2024, 1, 1) + dt.timedelta(weeks=rng.randint(0, 100))
+        cal = generar_rango_rotativo(anchor, rng.randint(1, 120), rng.randint(0, 6))
+        ov = overrides_aleatorios(rng, cal, rng.randint(0, 60))
+        esperado = normalizar(apply_overrides_merge(cal, ov))
+        store = CalendarStore(cal); store.patch(ov)
+        pd.testing.assert_frame_equal(normalizar(store.to_frame()), esperado, obj=f"caso {i}")
+        partido = CalendarStore(cal)   # en parches sucesivos, igual
+        for j in range(0, len(ov), 7): partido.patch(ov.iloc[j:j + 7])
+        pd.testing.assert_frame_equal(normalizar(partido.to_frame()), esperado, obj=f"caso {i} (partido)")
+
+
+def test_grilla_store_igual_al_escaneo():
+    cal = generar_rango_rotativo(ANCHOR, 31 * 6, 0)
+    store = CalendarStore(cal)
+    for mes in range(1, 7):
+        assert grilla_store(store, *rango_mes(2025, mes)) == grilla_escaneo(cal, *rango_mes(2025, mes))
@@ -0,0 +1,82 @@
+import datetime as dt
+import random
+
+import pandas as pd
+import pytest
+
+from tests._referencia import plantel_sintetico
+from turnos.calendario import FALTA, PERSONAS, SITIO_DEF, CalendarStore, generar_sitio, rango_mes
+from turnos.cobertura import MOTIVOS, Cobertura, Reglas, intervalo, ventana
+
+ANCHOR = dt.date(2025, 1, 6)
+
+
+def candidatos_fuerza_bruta(sitio, personas, cal, desde, r, ausentes, fecha, turno) -> list[tuple[str, str, float]]:
+    """(persona, motivo, horas semana) comparando el turno pedido contra cada turno de cada persona."""
+    horas = dict(zip(sitio.turnos, (intervalo(*h) for h in sitio.horas)))
+    turnos = {p: [] for p in personas}
+    for rec in cal.to_dict("records"):
+        d = (rec["Fecha"] - desde).days
+        a, b = horas[rec["Turno"]]
+        for col in ("Persona A", "Persona B"):
+            if rec[col] in turnos: turnos[rec[col]].append((d * 1440 + a, d * 1440 + b, d))
+    d = (fecha - desde).days
+    a, b = horas[turno]; a, b = a + d * 1440, b + d * 1440
+    out = []
+    for i, p in enumerate(personas):
+        gaps = [max(x0 - b, a - x1) for x0, x1, _ in turnos[p]]
+        semana = sum(x1 - x0 for x0, x1, dd in turnos[p] if d - d % 7 <= dd < d - d % 7 + 7) + b - a
+        if (fecha, p) in ausentes: m = "ausente"
+        elif any(g < 0 for g in gaps): m = "en turno"
+        elif any(0 <= g < r.descanso_min_horas * 60 for g in gaps): m = "descanso"
+        elif semana > r.horas_semana_max * 60: m = "horas extra"
+        else: m = ""
+        out.append((MOTIVOS.index(m), semana, i, p))
+    return [(p, MOTIVOS[m], s / 60) for m, s, _, p in sorted(out)]
+
+
+def _overrides(rng: random.Random, sitio, personas, first, last, n) -> list[dict]:
+    dias = (last - first).days + 1
+    rows = []
+    for _ in range(n):
+        a, b = rng.sample(personas + [FALTA], 2)
+        rows.append({"Fecha": first + dt.timedelta(days=rng.randrange(dias)), "Turno": rng.choice(sitio.turnos),
+                     "Persona A": a, "Persona B": b})
+    return rows
+
+
+def _comparar(c: Cobertura, sitio, personas, cal, d0, r, ausentes, first, last):
+    for i in range((last - first).days + 1):
+        f = first + dt.timedelta(days=i)
+        for t in sitio.turnos:
+            got = c.candidatos(f, t, todos=True)
+            esperado = candidatos_fuerza_bruta(sitio, personas, cal, d0, r, ausentes, f, t)
+            assert list(zip(got["Persona"], got["Motivo"], got["Horas semana"])) == esperado, (f, t)
+
+
+@pytest.mark.parametrize("r", [Reglas(), Reglas(descanso_min_horas=8, horas_semana_max=40), Reglas(16, 24)])
+def test_candidatos_igual_a_fuerza_bruta(r):
+    rng = random.Random(0)
+    first, last = rango_mes(2025, 3)
+    d0, d1 = ventana(first, last, SITIO_DEF, r)
+    store = CalendarStore(motor=lambda f, l: generar_sitio(SITIO_DEF, ANCHOR, f, l, 0))
+    store.patch(_overrides(rng, SITIO_DEF, PERSONAS, d0, d1, 40))
+    cal = store.rango(d0, d1)
+    aus = pd.DataFrame([{"Fecha": first + dt.timedelta(days=rng.randrange(28)), "Persona": rng.choice(PERSONAS)} for _ in range(10)])
+    c = Cobertura(SITIO_DEF, PERSONAS, cal, d0, d1, r, aus)
+    _comparar(c, SITIO_DEF, PERSONAS, cal, d0, r, set(zip(aus["Fecha"], aus["Persona"])), first, last)
+
+
+def test_actualizar_igual_a_rearmar():
+    """Aplicar overrides sobre una Cobertura armada da los mismos candidatos que armarla con el calendario nuevo."""
+    rng, r = random.Random(1), Reglas()
+    plantel = plantel_sintetico(40, 4)
+    first, last = rango_mes(2025, 6)
+    for sitio in plantel.sitios:
+        personas = plantel.activos(sitio.nombre)
+        d0, d1 = ventana(first, last, sitio, r)
+        store = CalendarStore(motor=lambda f, l, s=sitio: generar_sitio(s, ANCHOR, f, l, 0))
+        c = Cobertura(sitio, personas, store.rango(d0, d1), d0, d1, r)
+        ov = _overrides(rng, sitio, personas, d0, d1, 30)
+        c.actualizar(ov); store.patch(ov)
+        _comparar(c, sitio, personas, store.rango(d0, d1), d0, r, set(), first, last)
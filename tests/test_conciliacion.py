@@ -0,0 +1,20 @@
+import datetime as dt
+
+import pandas as pd
+
+from tests._referencia import INICIO, fichadas_sinteticas, plan_sintetico
+from turnos.conciliacion import conciliar, proximo_fin
+
+
+def test_conciliar_no_cambia_hasta_el_proximo_fin():
+    cal, logs = plan_sintetico(30, 6), fichadas_sinteticas(30, 6)
+    first, last = INICIO, INICIO + dt.timedelta(days=5)
+    momento = pd.Timestamp(INICIO) + pd.Timedelta(days=2, hours=3)
+    antes = conciliar(cal, logs, first, last, momento=momento)
+    for _ in range(6):
+        fin = proximo_fin(cal, momento)
+        pd.testing.assert_frame_equal(conciliar(cal, logs, first, last, momento=fin - pd.Timedelta(seconds=1)), antes)
+        despues = conciliar(cal, logs, first, last, momento=fin)
+        assert not despues.equals(antes)   # en `fin` entra al menos un bloque
+        momento, antes = fin, despues
+    assert proximo_fin(cal, pd.Timestamp(INICIO) + pd.Timedelta(days=9)) is None
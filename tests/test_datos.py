@@ -0,0 +1,87 @@
+import datetime as dt
+import threading
+
+import pandas as pd
+import pytest
+
+from turnos import datos
+from turnos.archivo import ArchivoBackend
+from turnos.storage import CsvBackend, SqliteBackend
+
+DIA = dt.date(2025, 3, 10)
+
+
+@pytest.fixture(params=["csv", "sqlite", "archivo"])
+def backend(request, tmp_path):
+    if request.param == "sqlite": return SqliteBackend(tmp_path / "turnos.db")
+    (tmp_path / "hot").mkdir()
+    if request.param == "csv": return CsvBackend(tmp_path / "hot")
+    return ArchivoBackend(CsvBackend(tmp_path / "hot"), tmp_path / "archivo")
+
+
+def _fichar(b, n: int) -> list[dict]:
+    return [datos.append_timelog(b, {"Fecha": DIA, "Persona": f"P{i}", "Tipo": "Ingreso",
+                                     "Timestamp": pd.Timestamp(DIA) + pd.Timedelta(hours=6, minutes=i), "Fuente": "boton"})
+            for i in range(n)]
+
+
+def test_editar_reemplaza_la_fila_en_una_escritura(backend):
+    fila = _fichar(backend, 3)[1]
+    if isinstance(backend, ArchivoBackend): backend.rotar("timelog", dt.date(2025, 4, 1))   # la corrección cae en una partición
+    escrituras = []
+    append = backend.append
+    backend.append = lambda name, op, rows, **kw: (escrituras.append((name, op)), append(name, op, rows, **kw))[1]
+    datos.editar_fichada(backend, fila, {"Tipo": "Salida", "Timestamp": pd.Timestamp(DIA) + pd.Timedelta(hours=14)}, "supervisor")
+    assert [e for e in escrituras if e[0] == "timelog"] == [("timelog", "upsert")]
+    tl = datos.load_timelog(backend)
+    assert len(tl) == 3 and (tl["id"] == fila["id"]).sum() == 1
+    r = tl[tl["id"] == fila["id"]].iloc[0]
+    assert r["Tipo"] == "Salida" and r["Timestamp"] == pd.Timestamp(DIA) + pd.Timedelta(hours=14) and r["Persona"] == "P1"
+    assert list(datos.historial_fichada(backend, fila)["Version"]) == [1, 2]
+
+
+def test_correcciones_concurrentes(backend):
+    filas = _fichar(backend, 8)
+
+    def corregir(fila, k):
+        for j in range(3):
+            datos.editar_fichada(backend, fila, {"Timestamp": fila["Timestamp"] + pd.Timedelta(minutes=j + 1)}, f"s{k}")
+
+    ts = [threading.Thread(target=corregir, args=(f, k)) for k, f in enumerate(filas)]
+    for t in ts: t.start()
+    for t in ts: t.join()
+    tl = datos.load_timelog(backend)
+    assert sorted(tl["id"]) == sorted(f["id"] for f in filas)
+    h = datos.load_historial(backend)
+    assert not h.duplicated(["ID", "Version"]).any() and len(h) == 8 * 4
+
+
+def test_ingreso_viejo_sigue_abierto(backend):
+    from turnos.autocierre import cerrar_abiertos
+    viejo = datos.append_timelog(backend, {"Fecha": DIA, "Persona": "Ana", "Tipo": "Ingreso",
+                                           "Timestamp": pd.Timestamp(DIA) + pd.Timedelta(hours=6), "Fuente": "boton"})
+    hoy = DIA + dt.timedelta(days=datos.VENTANA_ABIERTOS + 3)
+    datos._ABIERTOS.clear()   # otro proceso: arma el índice desde el timelog
+    assert datos.abiertos(backend, hoy).de("Ana")["id"] == viejo["id"]
+    otra = _fichar(backend, 1)[0]
+    datos.editar_fichada(backend, otra, {"Tipo": "Salida"}, "supervisor")   # la corrección rearma el índice
+    assert datos.abiertos(backend, hoy).de("Ana")["id"] == viejo["id"]
+    cerradas = cerrar_abiertos(backend, pd.Timestamp(hoy) + pd.Timedelta(hours=8), {}, max_horas=16, horas_sin_turno=8)
+    assert [(f["Persona"], f["Timestamp"]) for f in cerradas] == [("Ana", pd.Timestamp(DIA) + pd.Timedelta(hours=14))]
+    assert datos.abiertos(backend, hoy).de("Ana") is None
+
+
+def test_upsert_parcial_conserva_las_otras_columnas_y_deja_vaciar(backend):
+    datos.upsert_overrides(backend, [{"Fecha": DIA, "Turno": "Noche", "Persona A": "Ana", "Persona B": "Beto", "Libre": "Caro"}])
+    datos.upsert_overrides(backend, datos.filas_libre_dia(DIA, "Dani", ["Noche"]))   # sólo Libre
+    datos.upsert_overrides(backend, [{"Fecha": DIA, "Turno": "Noche", "Persona B": None}])   # vaciar B
+    ov = datos.load_overrides(backend)
+    assert len(ov) == 1
+    r = ov.iloc[0]
+    assert (r["Persona A"], r["Libre"]) == ("Ana", "Dani") and pd.isna(r["Persona B"])
+
+    t = datos.add_task(backend, {"Fecha": DIA, "Turno": "Noche", "Persona": "Ana", "Titulo": "Llaves", "Estado": "Pendiente"})
+    escritas = datos.commit_tasks(backend, [{"id": t["id"], "Estado": "Hecho"}], [])
+    tareas = datos.load_tasks(backend)
+    assert len(tareas) == 1 and escritas[0]["Titulo"] == "Llaves"
+    assert tareas.iloc[0][["Titulo", "Persona", "Estado"]].tolist() == ["Llaves", "Ana", "Hecho"]
@@ -0,0 +1,66 @@
+import datetime as dt
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+
+from turnos.calendario import FALTA
+from turnos.storage import CsvBackend
+
+RAIZ = Path(__file__).resolve().parents[1]
+
+
+def abrir(tmp_path, monkeypatch):
+    """app_turnos.py sobre una copia de config.json, personas.csv y data/ (sólo CSV, sin archivo)."""
+    AppTest = pytest.importorskip("streamlit.testing.v1").AppTest
+    shutil.copytree(RAIZ / "data", tmp_path / "data")
+    shutil.copy(RAIZ / "personas.csv", tmp_path)
+    config = json.loads((RAIZ / "config.json").read_text(encoding="utf-8"))
+    config["storage"] = {"backend": "csv"}
+    config["cobertura"] = {"descanso_min_horas": 240, "horas_semana_max": 48}   # nadie puede cubrir nada
+    (tmp_path / "config.json").write_text(json.dumps(config), encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+    at = AppTest.from_file(str(RAIZ / "app_turnos.py"), default_timeout=120)
+    at.run()
+    return at
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    return abrir(tmp_path, monkeypatch)
+
+
+def test_falta_sin_quien_cubra_no_toca_el_libre(app, tmp_path):
+    dia = dt.date.today() + dt.timedelta(days=2)
+    app.session_state["cur_month"] = dt.date(dia.year, dia.month, 1)
+    app.session_state["selected_day"] = dia
+    app.run()
+    assert not app.exception
+    turno = app.sidebar.subheader[0].value
+    aus = app.sidebar.selectbox(key=f"sb_{dia}_{turno}_A").value
+    assert any("nadie disponible" in c.value for c in app.sidebar.caption)
+
+    app.sidebar.button(key=f"faltA_{dia}_{turno}").click().run()
+    assert not app.exception
+    assert app.sidebar.selectbox(key=f"sb_{dia}_{turno}_A").value == FALTA
+    b = CsvBackend(tmp_path / "data")
+    ov = b.load("overrides")
+    assert ov is None or not (ov["Fecha"].astype(str) == dia.isoformat()).any()   # ni el libre ni nada más
+    faltas = b.load("absences")
+    assert ((faltas["Fecha"].astype(str) == dia.isoformat()) & (faltas["Persona"] == aus)).any()
+
+
+def test_agrupar_no_recalcula_la_conciliacion(tmp_path, monkeypatch):
+    from turnos import conciliacion
+    llamadas = []
+    original = conciliacion.conciliar
+    monkeypatch.setattr(conciliacion, "conciliar", lambda *a, **k: (llamadas.append(a[2:4]), original(*a, **k))[1])
+    at = abrir(tmp_path, monkeypatch)   # conciliar ya reemplazado al importar la app
+    assert not at.exception and llamadas
+    n = len(llamadas)
+    at.radio(key="conc_agrupar").set_value("Semana").run()
+    at.selectbox(key="conc_persona").set_value(at.selectbox(key="conc_persona").options[-1]).run()
+    assert not at.exception and len(llamadas) == n
+    at.radio(key="fh_periodo").set_value("Últimos 12 meses").run()   # otro período: otra conciliación
+    assert len(llamadas) == n + 1
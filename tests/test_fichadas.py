@@ -0,0 +1,19 @@
+import pandas as pd
+
+from tests._referencia import fichadas_sinteticas, resumen_loop, resumen_vectorizado
+from turnos.fichadas import emparejar
+
+
+def test_emparejar_igual_al_loop_en_turnos_diurnos():
+    logs = fichadas_sinteticas(7, 120, noche=False)
+    viejo = resumen_loop(logs).groupby("Persona")["Horas"].sum().round(2)
+    nuevo = resumen_vectorizado(logs).set_index("Persona")["Horas"]
+    pd.testing.assert_series_equal(viejo.sort_index(), nuevo.sort_index(), check_names=False)
+
+
+def test_noche_empareja_con_la_salida_del_dia_siguiente():
+    logs = fichadas_sinteticas(3, 30, noche=True)
+    pares, sueltos = emparejar(logs)
+    assert sueltos.empty
+    assert len(pares) == len(logs) // 2
+    assert pares["Horas"].between(7, 9).all()
@@ -0,0 +1,65 @@
+import threading
+
+import pandas as pd
+
+from turnos.journal import Journal, aplicar
+
+
+def test_append_y_compactar_concurrentes_no_pierden_filas(tmp_path):
+    """8 hilos agregando con compactaciones en segundo plano (y otra en paralelo): ninguna fila se pierde."""
+    j = Journal(tmp_path / "absences.csv", ["id", "Persona"], compactar_bytes=2000)
+    hilos, por_hilo = 8, 400
+    listo = threading.Event()
+
+    def escribir(h):
+        for i in range(por_hilo):
+            j.append("add", [{"id": h * por_hilo + i, "Persona": f"P{h}"}])
+
+    def compactar():
+        while not listo.is_set(): j.compact()
+
+    ts = [threading.Thread(target=escribir, args=(h,)) for h in range(hilos)]
+    c = threading.Thread(target=compactar)
+    for t in [*ts, c]: t.start()
+    for t in ts: t.join()
+    listo.set(); c.join()
+    j.compact()
+
+    df = j.load()
+    assert len(df) == hilos * por_hilo
+    assert sorted(df["id"]) == list(range(hilos * por_hilo))
+    assert not j.path.exists() and not j.sealed.exists() and not j.done.exists()
+    assert not j.lock.exists() and not j.compact_lock.exists()
+
+
+def test_un_solo_encabezado_y_compactar_despues(tmp_path):
+    j = Journal(tmp_path / "overrides.csv", ["Fecha", "Turno"], key=["Fecha", "Turno"], compactar_bytes=10**9)
+    ts = [threading.Thread(target=j.append, args=("upsert", [{"Fecha": f"2026-01-{d:02d}", "Turno": "Noche"}]))
+          for d in range(1, 29)]
+    for t in ts: t.start()
+    for t in ts: t.join()
+    assert j.path.read_text(encoding="utf-8").count("_op,") == 1
+    j.compact()
+    assert len(j.load()) == 28
+
+
+def test_upsert_a_vacio_queda_vacio_tras_compactar(tmp_path):
+    cols = ["Fecha", "Turno", "Persona A", "Persona B", "Libre"]
+    j = Journal(tmp_path / "overrides.csv", cols, key=["Fecha", "Turno"])
+    j.append("upsert", [{"Fecha": "2026-01-05", "Turno": "Noche", "Persona A": "Ana", "Persona B": "Beto", "Libre": "Caro"},
+                        {"Fecha": "2026-01-05", "Turno": "Tarde", "Persona A": "Dani"}])
+    j.append("upsert", [{"Fecha": "2026-01-05", "Turno": "Noche", "Persona A": "Ana", "Persona B": None, "Libre": ""}])
+    for _ in range(2):   # del journal y de la base compactada
+        df = j.load()
+        assert list(df["Turno"]) == ["Noche", "Tarde"] and len(df) == 2
+        noche = df.iloc[0]
+        assert noche["Persona A"] == "Ana" and pd.isna(noche["Persona B"]) and pd.isna(noche["Libre"])
+        j.compact()
+    assert not j.path.exists()
+
+
+def test_upsert_reemplaza_la_fila_y_conserva_claves_vacias():
+    df = pd.DataFrame({"k": ["a", None, "b"], "v": [1.0, 2.0, 3.0]})
+    out = aplicar(df, "upsert", pd.DataFrame({"k": [None, "a"], "v": [None, 5.0]}), ["k"])
+    assert list(out["k"].fillna("-")) == ["a", "-", "b"]
+    assert out["v"].tolist()[0] == 5.0 and pd.isna(out["v"].tolist()[1]) and out["v"].tolist()[2] == 3.0
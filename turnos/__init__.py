@@ -0,0 +1 @@
+"""Lógica del calendario de turnos, importable sin Streamlit."""
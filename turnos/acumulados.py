@@ -0,0 +1,121 @@
+"""
+Totales por día y por mes (faltas por persona y turno, horas planificadas, horas fichadas), para
+consultar cualquier rango (el mes, el año a la fecha, los últimos 12 meses) sumando unos pocos
+agregados en lugar de recorrer las filas en cada rerun.
+
+- Un mes se arma la primera vez que se consulta, con `armar(first, last)`: un DataFrame con Fecha,
+  las columnas de la clave y el valor (una fila por evento, o ya sumado).
+- Los writers lo mantienen: `sumar` agrega un evento al día y al mes; `ensuciar` marca días que
+  se rearman (sólo esos) en la próxima consulta; `olvidar` descarta meses enteros.
+- `rango(first, last)`: los meses completos salen del total mensual y los bordes, de los días.
+Los registros de cada dataset están en turnos/datos.py (faltas, fichadas) y turnos/compartido.py (plan).
+"""
+import datetime as dt
+import threading
+from collections import defaultdict
+from typing import Callable
+
+import pandas as pd
+
+from turnos.calendario import _meses_entre, rango_mes
+from turnos.perfil import medir
+
+Clave = tuple
+
+
+class Acumulado:
+    """`valor` sumado por `cols` (p. ej. Persona, Turno), por día y por mes."""
+
+    def __init__(self, nombre: str, cols: list[str], valor: str, armar: Callable[[dt.date, dt.date], pd.DataFrame]):
+        self.nombre, self.cols, self.valor = nombre, list(cols), valor
+        self._armar = armar
+        self._dias: dict[dt.date, dict[Clave, float]] = {}
+        self._meses: dict[tuple[int, int], dict[Clave, float]] = {}
+        self._sucios: set[dt.date] = set()
+        self._lock = threading.RLock()
+
+    def _por_dia(self, df: pd.DataFrame) -> dict[dt.date, dict[Clave, float]]:
+        out: dict[dt.date, dict[Clave, float]] = defaultdict(dict)
+        if df.empty: return out
+        g = df.groupby(["Fecha", *self.cols], sort=False)[self.valor].sum()
+        for (fecha, *clave), v in g.items(): out[fecha][tuple(clave)] = float(v)
+        return out
+
+    def _asegurar_mes(self, y: int, m: int):
+        if (y, m) in self._meses: return
+        first, last = rango_mes(y, m)
+        with medir(f"armar acumulado {self.nombre}"): dias = self._por_dia(self._armar(first, last))
+        mes: dict[Clave, float] = defaultdict(float)
+        for fecha, vals in dias.items():
+            self._dias[fecha] = vals
+            for k, v in vals.items(): mes[k] += v
+        self._meses[(y, m)] = dict(mes)
+        self._sucios -= {d for d in self._sucios if (d.year, d.month) == (y, m)}
+
+    def _poner_dia(self, fecha: dt.date, vals: dict[Clave, float]):
+        mes = self._meses[(fecha.year, fecha.month)]
+        for k, v in self._dias.pop(fecha, {}).items():
+            mes[k] -= v
+            if abs(mes[k]) < 1e-9: del mes[k]
+        if vals:
+            self._dias[fecha] = vals
+            for k, v in vals.items(): mes[k] = mes.get(k, 0.0) + v
+
+    def _limpiar(self, y: int, m: int):
+        sucios = sorted(d for d in self._sucios if (d.year, d.month) == (y, m))
+        if not sucios: return
+        with medir(f"rearmar acumulado {self.nombre}"): dias = self._por_dia(self._armar(sucios[0], sucios[-1]))
+        for d in sucios: self._poner_dia(d, dias.get(d, {}))
+        self._sucios.difference_update(sucios)
+
+    # --- writers ---
+    def sumar(self, fecha: dt.date, clave: Clave, v: float = 1.0):
+        """Un evento más (si el mes ya está armado; si no, lo va a leer al armarlo)."""
+        with self._lock:
+            if (fecha.year, fecha.month) not in self._meses or fecha in self._sucios: return
+            dia = self._dias.setdefault(fecha, {})
+            dia[clave] = dia.get(clave, 0.0) + v
+            mes = self._meses[(fecha.year, fecha.month)]
+            mes[clave] = mes.get(clave, 0.0) + v
+
+    def ensuciar(self, first: dt.date, last: dt.date | None = None):
+        """Los días first..last se rearman en la próxima consulta (sólo los de meses ya armados)."""
+        dias = [first + dt.timedelta(days=i) for i in range(((last or first) - first).days + 1)]
+        with self._lock:
+            self._sucios.update(d for d in dias if (d.year, d.month) in self._meses)
+
+    def olvidar(self):
+        """Descarta todo: cada mes se vuelve a armar al consultarlo."""
+        with self._lock:
+            self._dias.clear(); self._meses.clear(); self._sucios.clear()
+
+    # --- consultas ---
+    def rango(self, first: dt.date, last: dt.date) -> pd.DataFrame:
+        """`valor` por clave en first..last."""
+        tot: dict[Clave, float] = defaultdict(float)
+        with self._lock:
+            for y, m in _meses_entre(first, last):
+                self._asegurar_mes(y, m); self._limpiar(y, m)
+                mf, ml = rango_mes(y, m)
+                if first <= mf and ml <= last:
+                    for k, v in self._meses[(y, m)].items(): tot[k] += v
+                    continue
+                d = max(first, mf)
+                while d <= min(last, ml):
+                    for k, v in self._dias.get(d, {}).items(): tot[k] += v
+                    d += dt.timedelta(days=1)
+        return self._frame(tot)
+
+    def por_mes(self, first: dt.date, last: dt.date) -> pd.DataFrame:
+        """`valor` por mes ("AAAA-MM") y clave en first..last."""
+        partes = []
+        for y, m in _meses_entre(first, last):
+            mf, ml = rango_mes(y, m)
+            partes.append(self.rango(max(first, mf), min(last, ml)).assign(Mes=f"{y:04d}-{m:02d}"))
+        if not partes: return pd.DataFrame(columns=["Mes", *self.cols, self.valor])
+        return pd.concat(partes, ignore_index=True)[["Mes", *self.cols, self.valor]]
+
+    def _frame(self, tot: dict[Clave, float]) -> pd.DataFrame:
+        tot = {k: v for k, v in tot.items() if abs(v) > 1e-9}
+        df = pd.DataFrame([(*k, v) for k, v in tot.items()], columns=[*self.cols, self.valor])
+        return df.sort_values(self.cols, ignore_index=True) if not df.empty else df
@@ -0,0 +1,228 @@
+"""
+Archivo histórico por mes en Parquet, delante del backend de siempre (CSV + journal o SQLite).
+
+    data/archivo/timelog/2024-01.parquet    un archivo por mes cerrado, con tipos (date/timestamp)
+    data/archivo/absences/2024-01.parquet
+
+El backend "caliente" guarda sólo el mes abierto (y lo que llegue tarde de meses ya archivados).
+`load(first, last)` lee únicamente las particiones que tocan el rango más las filas calientes de
+ese rango, así una vista de un mes no parsea años de historia.
+
+Está apagado por defecto; se activa en config.json (y los meses ya cerrados se archivan solos):
+
+    "storage": {"backend": "csv", "archivo": {"dir": "data/archivo", "datasets": ["timelog", "absences"]}}
+
+La rotación mueve al archivo los meses anteriores al actual. La app y el kiosco la corren al
+arrancar y cuando cambia el mes (`rotar_meses_cerrados`, una vez por mes y proceso); también a mano:
+
+    python -m turnos.archivo rotar [--hasta AAAA-MM]
+    python -m turnos.archivo estado
+
+Primero escribe cada partición (reemplazo atómico) y después borra esas filas del backend caliente
+con operaciones `del`, así no pisa fichadas que entren mientras tanto. Si se corta entre los dos
+pasos, volver a rotar lo completa (al fusionar con la partición se descartan filas repetidas).
+Rotar y corregir una partición (upsert/del sobre un mes archivado: leer, aplicar, reescribir) van
+bajo el bloqueo del dataset (`bloqueo(name)`), para que dos escrituras no se pisen.
+"""
+import argparse
+import datetime as dt
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from turnos.calendario import rango_mes
+from turnos.journal import aplicar
+from turnos.storage import DATASETS, Backend, get_backend, leer_config
+
+ARCHIVABLES = ("timelog", "absences")
+
+
+def tipar(df: pd.DataFrame) -> pd.DataFrame:
+    """Fecha como date y Timestamp como datetime64, igual que en las particiones."""
+    df = df.copy()
+    if "Fecha" in df: df["Fecha"] = pd.to_datetime(df["Fecha"], errors="coerce").dt.date
+    if "Timestamp" in df: df["Timestamp"] = pd.to_datetime(df["Timestamp"], errors="coerce", format="ISO8601")
+    return df
+
+
+def _mes(m: str) -> tuple[dt.date, dt.date]:
+    y, mo = map(int, m.split("-"))
+    return rango_mes(y, mo)
+
+
+def _clave_mes(f) -> str:
+    return f.strftime("%Y-%m") if pd.notna(f) else ""
+
+
+def _escribir(df: pd.DataFrame, path: Path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+
+
+class ArchivoBackend(Backend):
+    """Particiones mensuales de sólo lectura + `inner` para las escrituras."""
+
+    def __init__(self, inner: Backend, dir: Path, datasets=ARCHIVABLES):
+        self.inner = inner
+        self.dir = Path(dir)
+        self.datasets = set(datasets)
+        self.indexado = inner.indexado
+        self._max_ids: dict[tuple, int] = {}
+        self._rotado: tuple[int, int] | None = None   # mes en que ya corrió rotar_meses_cerrados
+        self._rotacion_lock = threading.Lock()
+
+    def particiones(self, name: str) -> dict[str, Path]:
+        """{"AAAA-MM": ruta}, en orden."""
+        d = self.dir / name
+        return {p.stem: p for p in sorted(d.glob("*.parquet"))} if d.exists() else {}
+
+    def _leer(self, path: Path, first: dt.date | None, last: dt.date | None) -> pd.DataFrame:
+        mf, ml = _mes(path.stem)
+        filtros = []
+        if first is not None and first > mf: filtros.append(("Fecha", ">=", first))
+        if last is not None and last < ml: filtros.append(("Fecha", "<=", last))
+        return pd.read_parquet(path, filters=filtros or None)
+
+    def load(self, name, first=None, last=None):
+        if name not in self.datasets: return self.inner.load(name, first, last)
+        partes = [self._leer(p, first, last) for m, p in self.particiones(name).items()
+                  if (first is None or _mes(m)[1] >= first) and (last is None or _mes(m)[0] <= last)]
+        hot = self.inner.load(name, first, last)
+        if not partes: return None if hot is None else tipar(hot)
+        if hot is not None and not hot.empty: partes.append(tipar(hot))
+        return pd.concat(partes, ignore_index=True)
+
+    def _max_id(self, name: str, col: str) -> int:
+        """Mayor `col` archivado, de las estadísticas de cada partición (sin leer filas)."""
+        k = (name, col, self._firma_particiones(name))
+        if k not in self._max_ids:
+            tope = 0
+            for p in self.particiones(name).values():
+                md = pq.read_metadata(p)
+                j = md.schema.names.index(col)
+                for i in range(md.num_row_groups):
+                    s = md.row_group(i).column(j).statistics
+                    if s is not None and s.has_min_max: tope = max(tope, int(s.max))
+            self._max_ids[k] = tope
+        return self._max_ids[k]
+
+    def append(self, name, op, rows, auto_id=None, id_desde=1, clave=None):
+        if name not in self.datasets or op == "add":
+            if auto_id and name in self.datasets: id_desde = max(id_desde, self._max_id(name, auto_id) + 1)
+            return self.inner.append(name, op, rows, auto_id, id_desde, clave)
+        # upsert/del: lo que cae en meses archivados se aplica sobre su partición
+        with self.inner.bloqueo(name):
+            key = DATASETS[name].key
+            t = tipar(pd.DataFrame(rows))
+            calientes = np.ones(len(t), dtype=bool)   # filas que (también) van al backend caliente
+            meses = t["Fecha"].map(_clave_mes) if "Fecha" in t else None
+            for m, p in self.particiones(name).items():
+                if meses is not None and not (meses == m).any(): continue
+                df = pd.read_parquet(p)
+                hit = t[key].merge(df[key].drop_duplicates().assign(_hit=True), on=key, how="left")["_hit"].notna().to_numpy()
+                if not hit.any(): continue
+                nuevo = aplicar(df, op, t[hit], key)
+                if nuevo.empty: p.unlink()
+                else: _escribir(nuevo, p)
+                if op == "upsert": calientes &= ~hit   # un del sigue: puede haber filas calientes con esa clave
+            pendientes = [r for r, c in zip(rows, calientes) if c]
+            if pendientes: self.inner.append(name, op, pendientes)
+        return rows
+
+    def append_lote(self, name, df, auto_id=None, id_desde=1):
+        if auto_id and name in self.datasets: id_desde = max(id_desde, self._max_id(name, auto_id) + 1)
+        return self.inner.append_lote(name, df, auto_id, id_desde)
+
+    def replace(self, name, df):
+        if name in self.datasets:
+            for p in self.particiones(name).values(): p.unlink()
+        self.inner.replace(name, df)
+
+    def _firma_particiones(self, name: str) -> tuple:
+        out = []
+        for m, p in self.particiones(name).items():
+            s = p.stat(); out.append((m, s.st_mtime_ns, s.st_size))
+        return tuple(out)
+
+    def firma(self, name):
+        f = self.inner.firma(name)
+        if name not in self.datasets or f is None: return f
+        return (f, self._firma_particiones(name))
+
+    def por_rango(self, name):
+        # sin particiones todo está caliente: conviene la cache del dataset completo (si el backend la usa)
+        return (name in self.datasets and bool(self.particiones(name))) or self.inner.por_rango(name)
+
+    def compactar(self, name):
+        self.inner.compactar(name)
+
+    def bloqueo(self, name):
+        return self.inner.bloqueo(name)
+
+    def rotar_meses_cerrados(self, hoy):
+        mes = (hoy.year, hoy.month)
+        with self._rotacion_lock:
+            if self._rotado == mes: return {}
+            self._rotado = mes
+        try:
+            return {name: m for name in sorted(self.datasets) if (m := self.rotar(name, hoy))}
+        except TimeoutError:   # otro proceso tiene el dataset: se reintenta en la próxima llamada
+            with self._rotacion_lock: self._rotado = None
+            return {}
+
+    def rotar(self, name: str, hasta: dt.date) -> dict[str, int]:
+        """Archiva las filas calientes de meses anteriores al de `hasta`. Devuelve filas por mes."""
+        with self.inner.bloqueo(name):
+            hot = self.inner.load(name)
+            if hot is None or hot.empty: return {}
+            t = tipar(hot)
+            mes = t["Fecha"].map(_clave_mes)
+            cerrado = (mes != "") & (mes < hasta.strftime("%Y-%m"))
+            out = {}
+            for m, filas in t[cerrado.to_numpy()].groupby(mes[cerrado], sort=True):
+                p = self.dir / name / f"{m}.parquet"
+                if p.exists(): filas = pd.concat([pd.read_parquet(p), filas], ignore_index=True).drop_duplicates()
+                _escribir(filas.sort_values("Fecha", kind="stable").reset_index(drop=True), p)
+                out[m] = int(cerrado[mes == m].sum())
+            if out:
+                key = DATASETS[name].key
+                self.inner.append(name, "del", hot.loc[cerrado.to_numpy(), key].drop_duplicates().to_dict("records"))
+                self.inner.compactar(name)
+        return out
+
+
+def main():
+    ap = argparse.ArgumentParser(prog="python -m turnos.archivo")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("rotar", help="archivar los meses anteriores a --hasta (por defecto, el mes actual)")
+    r.add_argument("--hasta", default=None, help="AAAA-MM: primer mes que queda caliente")
+    sub.add_parser("estado", help="particiones por dataset")
+    for p in sub.choices.values(): p.add_argument("--data", default="data")
+    args = ap.parse_args()
+
+    config = leer_config()
+    if not ((config.get("storage") or {}).get("archivo") or {}).get("datasets"):
+        ap.error('el archivo no está activo: "storage": {"archivo": {"datasets": [...]}} en config.json')
+    b = get_backend(Path(args.data), config)
+    if args.cmd == "rotar":
+        hasta = _mes(args.hasta)[0] if args.hasta else dt.date.today()
+        for name in sorted(b.datasets):
+            movidas = b.rotar(name, hasta)
+            print(f"{name}: {sum(movidas.values())} filas archivadas en {len(movidas)} mes(es)")
+    else:
+        for name in sorted(b.datasets):
+            parts = b.particiones(name)
+            kb = sum(p.stat().st_size for p in parts.values()) / 1024
+            rango = f"{next(iter(parts))} .. {next(reversed(parts))}" if parts else "—"
+            hot = b.inner.load(name)
+            print(f"{name}: {len(parts)} particiones ({rango}, {kb:.0f} KiB) · {0 if hot is None else len(hot)} filas calientes")
+
+
+if __name__ == "__main__":
+    main()
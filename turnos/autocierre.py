@@ -0,0 +1,106 @@
+"""
+Auto-cierre de ingresos olvidados: a cada Ingreso abierto hace más de `max_horas` le agrega la
+Salida al fin de su turno planificado (o `horas_sin_turno` después del ingreso), con Fuente
+"auto-cierre". Así el par cuenta en las horas y la persona puede volver a fichar ingreso.
+
+    config.json   "workday_auto_close": true
+                  (o {"max_horas": 16, "horas_sin_turno": 8, "cada_min": 10})
+    python -m turnos.autocierre [--data data] [--simular]      # para cron
+
+La app y el kiosco también lo corren, a lo sumo cada `cada_min` minutos por proceso.
+Sale del índice de ingresos abiertos (datos.abiertos), no recorre el timelog. Es idempotente y
+apto para varios kioscos: escribe bajo el bloqueo del backend y, antes, relee del storage las
+fichadas de esas personas; si alguna ya no termina en ese Ingreso (la cerró otro), la saltea.
+"""
+import argparse
+import datetime as dt
+import math
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from turnos import datos
+from turnos.fichadas import MAX_HORAS_PAR, ahora, zona
+from turnos.plantel import cargar_plantel
+from turnos.storage import Backend, get_backend, leer_config
+
+DEFAULTS = {"max_horas": MAX_HORAS_PAR, "horas_sin_turno": 8.0, "cada_min": 10}
+FUENTE = "auto-cierre"
+
+
+def opciones(config: dict) -> dict | None:
+    """Opciones de config.json "workday_auto_close" (None si está apagado)."""
+    c = config.get("workday_auto_close")
+    if not c: return None
+    return {**DEFAULTS, **(c if isinstance(c, dict) else {})}
+
+
+def _horas(turno, duraciones: dict[str, float], horas_sin_turno: float) -> float:
+    ts = [t.strip() for t in str(turno or "").split(",") if t.strip()]
+    return sum(duraciones[t] for t in ts) if ts and all(t in duraciones for t in ts) else horas_sin_turno
+
+
+def cerrar_abiertos(b: Backend, momento: pd.Timestamp, duraciones: dict[str, float],
+                    max_horas: float = DEFAULTS["max_horas"], horas_sin_turno: float = DEFAULTS["horas_sin_turno"],
+                    tz: dt.timezone | None = None, simular: bool = False) -> list[dict]:
+    """Cierra los ingresos abiertos hace más de `max_horas` a `momento` (hora local). Devuelve las Salidas."""
+    momento = pd.Timestamp(momento)
+    limite = momento - pd.Timedelta(hours=max_horas)
+    viejos = [f for f in datos.abiertos(b, momento.date()).todos() if f["Timestamp"] <= limite]
+    if not viejos: return []
+    out = []
+    with b.bloqueo("timelog"):
+        logs = datos.load_timelog(b, min(f["Fecha"] for f in viejos), momento.date() + dt.timedelta(days=1))
+        logs = logs[logs["Timestamp"].notna()].sort_values(["Timestamp","id"], kind="stable")
+        ultimo = logs.drop_duplicates("Persona", keep="last").set_index("Persona")["id"]
+        for f in viejos:
+            if ultimo.get(f["Persona"]) != f["id"]: continue   # ya tiene un evento posterior
+            salida = min(f["Timestamp"] + pd.Timedelta(hours=_horas(f.get("Turno"), duraciones, horas_sin_turno)), momento)
+            fila = {"Fecha": salida.date(), "Persona": f["Persona"], "Tipo": "Salida", "Timestamp": salida,
+                    "Turno": f.get("Turno"), "Fuente": FUENTE}
+            if simular: out.append(fila); continue
+            # misma clave que un toque de Salida sobre ese Ingreso: si el kiosco llegó antes, queda una sola
+            fila = datos.append_timelog(b, fila, por=FUENTE, tz=tz, clave=datos.clave_fichada(f["Persona"], "Salida", f))
+            if not fila.get("_repetida"): out.append(fila)
+    return out
+
+
+_ultima: dict[Backend, float] = {}
+_lock = threading.Lock()
+
+
+def programado(b: Backend, config: dict, duraciones: dict[str, float], tz: dt.timezone | None = None) -> list[dict]:
+    """cerrar_abiertos si está activo y pasaron `cada_min` desde la última corrida de este proceso."""
+    op = opciones(config)
+    if op is None: return []
+    with _lock:
+        t = time.monotonic()
+        if t - _ultima.get(b, -math.inf) < op["cada_min"] * 60: return []
+        _ultima[b] = t
+    try:
+        return cerrar_abiertos(b, ahora(tz), duraciones, op["max_horas"], op["horas_sin_turno"], tz)
+    except TimeoutError:   # otro kiosco lo está corriendo
+        return []
+
+
+def main():
+    ap = argparse.ArgumentParser(prog="python -m turnos.autocierre", description="Cerrar ingresos olvidados")
+    ap.add_argument("--data", default="data")
+    ap.add_argument("--simular", action="store_true", help="mostrar qué cerraría, sin escribir")
+    args = ap.parse_args()
+
+    config = leer_config()
+    op = opciones(config) or DEFAULTS
+    tz = zona(config)
+    b = get_backend(Path(args.data), config)
+    cerradas = cerrar_abiertos(b, ahora(tz), cargar_plantel(config).duraciones(), op["max_horas"],
+                               op["horas_sin_turno"], tz, simular=args.simular)
+    for f in cerradas:
+        print(f"{f['Persona']}: Salida {f['Timestamp']:%d/%m/%Y %H:%M} ({f['Turno'] or 'sin turno'})")
+    print(f"{len(cerradas)} ingreso(s) {'a cerrar' if args.simular else 'cerrados'}")
+
+
+if __name__ == "__main__":
+    main()
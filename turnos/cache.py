@@ -0,0 +1,130 @@
+"""
+Cache de datasets parseados, compartido por todas las sesiones del proceso.
+
+Cada entrada guarda la "firma" de los archivos de los que salió (mtime_ns y tamaño de la base
+y sus journals). Mientras la firma no cambie, un load_* no toca el disco ni vuelve a parsear.
+Los writers además invalidan explícitamente, por si dos escrituras caen en el mismo tick de mtime.
+Acotado por bytes (LRU) y con contadores de hits/misses para verificarlo.
+
+Lo cacheado es la instantánea compartida de cada dataset (y de cada rango pedido): nadie la
+modifica. Con Copy-on-Write cada `get` devuelve una copia superficial, que no duplica datos;
+quien la modifique copia sólo lo que toca (ver turnos/compartido.py).
+"""
+import datetime as dt
+import sys
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+import pandas as pd
+
+from turnos.perfil import medir
+from turnos.storage import DATASETS, Backend
+
+MAX_BYTES = 128 * 1024 * 1024
+# pandas >= 3 siempre; en 2.x, si se activó mode.copy_on_write antes de importar (app_turnos.py y kiosco.py lo
+# hacen). Sin CoW, `get` devuelve copias profundas: nadie modifica la instantánea, pero cada sesión tiene la suya.
+COW = int(pd.__version__.split(".")[0]) >= 3 or pd.get_option("mode.copy_on_write") is True
+
+
+def _nbytes(v) -> int:
+    """Bytes aproximados: los buffers de cada columna; las object, por una muestra (deep=True las recorre enteras)."""
+    if not isinstance(v, pd.DataFrame): return 0
+    n = 0
+    for _, col in v.items():
+        n += col.array.nbytes
+        if col.dtype == object and len(col):
+            muestra = col.iloc[::max(1, len(col) // 64)]
+            n += len(col) * sum(map(sys.getsizeof, muestra)) // len(muestra)
+    return n
+
+
+class DataCache:
+    def __init__(self, max_bytes: int = MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._d: OrderedDict[Hashable, tuple] = OrderedDict()   # key -> (firma, valor, bytes)
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key: Hashable, firma: Hashable, compute: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """Valor cacheado para `key` si sigue vigente con `firma`; si no, `compute()`. Devuelve una copia (superficial con CoW)."""
+        with self._lock:
+            e = self._d.get(key)
+            if e is not None and e[0] == firma:
+                self._d.move_to_end(key); self.hits += 1
+                return e[1].copy(deep=not COW)
+            self.misses += 1
+        v = compute()
+        n = _nbytes(v)
+        with self._lock:
+            self._d[key] = (firma, v, n); self._d.move_to_end(key)
+            while len(self._d) > 1 and sum(e[2] for e in self._d.values()) > self.max_bytes:
+                self._d.popitem(last=False); self.evictions += 1
+        return v.copy(deep=not COW)
+
+    def invalidate(self, key: Hashable | None = None):
+        """Borra `key` y las entradas por rango de ese dataset (claves (key, first, last)); sin key, todo."""
+        with self._lock:
+            if key is None: self._d.clear(); return
+            for k in [k for k in self._d if k == key or (isinstance(k, tuple) and k[0] == key)]:
+                del self._d[k]
+
+    def valores(self) -> list[pd.DataFrame]:
+        """Las instantáneas cacheadas (para el reporte de memoria; no modificarlas)."""
+        with self._lock:
+            return [e[1] for e in self._d.values()]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "entradas": len(self._d), "bytes": sum(e[2] for e in self._d.values())}
+
+
+CACHE = DataCache()
+
+
+def cargar(backend: Backend, name: str, parse: Callable[[pd.DataFrame], pd.DataFrame],
+           first: dt.date | None = None, last: dt.date | None = None) -> pd.DataFrame:
+    """
+    Dataset parseado, opcionalmente sólo first..last.
+    CSV: se parsea una vez por cambio de archivo (cache por proceso) y se filtra en memoria; el
+    rango filtrado también se cachea, así las sesiones que miran el mismo mes comparten el recorte.
+    Archivo mensual: se leen sólo las particiones del rango y se cachea cada rango aparte.
+    SQLite: consulta por rango (índice por Fecha), cacheada por rango hasta que cambie la versión del dataset.
+    """
+    def _leer(f=None, l=None):
+        with medir(f"leer {name}"): df = backend.load(name, f, l)
+        with medir(f"parsear {name}"): return parse(pd.DataFrame(columns=DATASETS[name].cols) if df is None else df)
+    with medir(f"cargar {name}"):   # propio: cache, copia y filtro por rango
+        firma = backend.firma(name)
+        if firma is None: return _leer(first, last)
+        if backend.por_rango(name): return CACHE.get((name, first, last), firma, lambda: _leer(first, last))
+        if first is None and last is None: return CACHE.get(name, firma, _leer)
+
+        def _recortar():
+            df = CACHE.get(name, firma, _leer)
+            mask = pd.Series(True, index=df.index)
+            if first is not None: mask &= df["Fecha"] >= first
+            if last is not None: mask &= df["Fecha"] <= last
+            return df[mask].reset_index(drop=True)
+        return CACHE.get((name, first, last), firma, _recortar)
+
+
+def escribir(backend: Backend, name: str, op: str, rows: list[dict], **kw) -> list[dict]:
+    """Escribe vía el backend e invalida lo cacheado de ese dataset."""
+    with medir(f"escribir {name}"): rows = backend.append(name, op, rows, **kw)
+    CACHE.invalidate(name)
+    return rows
+
+
+def escribir_lote(backend: Backend, name: str, df: pd.DataFrame, **kw) -> pd.DataFrame:
+    """escribir para un lote "add" en un DataFrame (Backend.append_lote)."""
+    with medir(f"escribir {name}"): df = backend.append_lote(name, df, **kw)
+    CACHE.invalidate(name)
+    return df
+
+
+def reemplazar(backend: Backend, name: str, df: pd.DataFrame):
+    """Reemplaza el dataset completo e invalida lo cacheado."""
+    with medir(f"escribir {name}"): backend.replace(name, df)
+    CACHE.invalidate(name)
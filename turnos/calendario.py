@@ -0,0 +1,249 @@
+import calendar
+import datetime as dt
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from turnos.perfil import medido, medir
+
+# ================== CONSTANTES ==================
+PERSONAS = ["Hugo","Moira","Brisa","Jere","Alina","Jony","Dianela"]
+TURNOS    = ["Mañana","Tarde","Noche"]
+DIAS      = ["Lunes","Martes","Miércoles","Jueves","Viernes","Sábado","Domingo"]
+DIAS_ABBR = ["Lun","Mar","Mié","Jue","Vie","Sáb","Dom"]
+MESES     = ["enero","febrero","marzo","abril","mayo","junio","julio","agosto","septiembre","octubre","noviembre","diciembre"]
+HORAS_DEF = { "Mañana": ("06:00","14:00"), "Tarde": ("14:00","22:00"), "Noche": ("22:00","06:00 (+1)") }
+
+# Titulares fijos por turno
+ASIGN_DEF = {"Mañana":["Moira","Brisa"], "Tarde":["Jere","Dianela"], "Noche":["Hugo","Jony"]}
+
+# ================== GENERADOR: 1 libre/día rotando entre 7 ==================
+ORDEN_LIBRE = ["Moira","Brisa","Jere","Dianela","Hugo","Jony","Alina"]
+CAL_COLS = ["Fecha","Día","Turno","Hora Inicio","Hora Fin","Persona A","Persona B","Libre"]
+FALTA = "⚠ Falta cubrir"
+
+@dataclass(frozen=True)
+class Sitio:
+    """
+    Lo que necesita el generador para un sitio (hashable: se usa como clave de cache).
+    - turnos/horas/titulares: en paralelo, un (inicio, fin) y un (A, B) por turno.
+    - orden_libre: rotación del franco; cada día tienen franco tantas personas como `cobertura`.
+    - cobertura: quienes cubren, en orden, a los titulares de franco.
+    """
+    nombre: str
+    turnos: tuple[str, ...]
+    horas: tuple[tuple[str, str], ...]
+    titulares: tuple[tuple[str, str], ...]
+    orden_libre: tuple[str, ...]
+    cobertura: tuple[str, ...]
+
+SITIO_DEF = Sitio("La Lucy", tuple(TURNOS), tuple(HORAS_DEF[t] for t in TURNOS),
+                  tuple(tuple(ASIGN_DEF[t]) for t in TURNOS), tuple(ORDEN_LIBRE), ("Alina",))
+
+@lru_cache(maxsize=256)
+def generar_sitio(sitio: Sitio, anchor_monday: dt.date, first: dt.date, last: dt.date, offset_week: int) -> pd.DataFrame:
+    """
+    Turnos de `sitio` en first..last (sólo fechas >= anchor) en forma cerrada, sin loop por día:
+    - Francos del día: orden[((semana + dia + offset) * L + j) % N], j < L (L = len(cobertura)).
+    - Cada titular de franco lo cubre la primera persona de cobertura que no tenga franco ese día
+      (hay tantas libres como titulares de franco). Si el franco es de cobertura, titulares normal.
+    Cacheada por proceso: no modificar el DataFrame devuelto.
+    """
+    first = max(first, anchor_monday)
+    n = (last - first).days + 1
+    if n <= 0 or not sitio.turnos:
+        return pd.DataFrame(columns=CAL_COLS)
+    off = np.arange((first - anchor_monday).days, (first - anchor_monday).days + n)
+    wd = (anchor_monday.weekday() + off) % 7
+    orden = np.asarray(sitio.orden_libre, dtype=object)
+    cob = np.asarray(sitio.cobertura, dtype=object)
+    L = len(cob) if len(orden) else 0
+    libres = orden[((off // 7 + wd + offset_week)[:, None] * L + np.arange(L)) % max(len(orden), 1)]   # (n, L)
+
+    tit = np.asarray([p for ab in sitio.titulares for p in ab], dtype=object)          # (2M,) A0 B0 A1 B1 ...
+    asignado = np.broadcast_to(tit, (n, tit.size))
+    if L:
+        franco = (tit[None, :, None] == libres[:, None, :]).any(axis=2)                  # (n, 2M)
+        cob_franco = (cob[None, :, None] == libres[:, None, :]).any(axis=2)              # (n, L)
+        disponibles = np.argsort(cob_franco, axis=1, kind="stable")                      # libres primero
+        rank = np.clip(np.cumsum(franco, axis=1) - 1, 0, L - 1)
+        cubre = cob[disponibles[np.arange(n)[:, None], rank]]
+        asignado = np.where(franco, cubre, asignado)
+
+    k = len(sitio.turnos)
+    libre = libres[:, 0] if L == 1 else np.asarray([", ".join(d) for d in libres], dtype=object)
+    return pd.DataFrame({
+        "Fecha": np.repeat(pd.date_range(first, periods=n).date, k),
+        "Día": np.repeat(np.asarray(DIAS, dtype=object)[wd], k),
+        "Turno": np.tile(np.asarray(sitio.turnos, dtype=object), n),
+        "Hora Inicio": np.tile(np.asarray([h[0] for h in sitio.horas], dtype=object), n),
+        "Hora Fin": np.tile(np.asarray([h[1] for h in sitio.horas], dtype=object), n),
+        "Persona A": asignado[:, 0::2].reshape(-1),
+        "Persona B": asignado[:, 1::2].reshape(-1),
+        "Libre": np.repeat(libre, k) if L else "",
+    })
+
+def generar_ventana(anchor_monday: dt.date, first: dt.date, last: dt.date, offset_week: int) -> pd.DataFrame:
+    """generar_sitio del plantel por defecto (La Lucy: 7 personas, 3 turnos, Alina cubre)."""
+    return generar_sitio(SITIO_DEF, anchor_monday, first, last, offset_week)
+
+def generar_rango_rotativo(anchor_monday: dt.date, dias: int, offset_week: int) -> pd.DataFrame:
+    """`dias` días corridos desde anchor_monday (ver generar_ventana)."""
+    last = anchor_monday + dt.timedelta(days=dias - 1)
+    return generar_ventana(anchor_monday, anchor_monday, last, offset_week).copy()
+
+def rotacion(config: dict, hoy: dt.date) -> tuple[dt.date, int]:
+    """
+    (lunes de inicio, offset) de config.json "rotacion": {"inicio": "AAAA-MM-DD", "offset": 0}.
+    Sin "inicio", el lunes de la semana de `hoy` (lo mismo que propone el panel).
+    """
+    rot = config.get("rotacion") or {}
+    inicio = dt.date.fromisoformat(rot["inicio"]) if rot.get("inicio") else hoy
+    return inicio - dt.timedelta(days=inicio.weekday()), int(rot.get("offset") or 0)
+
+def rango_mes(year: int, month: int):
+    first = dt.date(year, month, 1)
+    last  = dt.date(year, month, calendar.monthrange(year, month)[1])
+    return first, last
+
+def cambiar_libre(libres: list[str], sale: str, entra: str) -> str:
+    """Libre del día después de que `sale` cubre una falta y `entra` (el ausente) queda de franco."""
+    return ", ".join(entra if p == sale else p for p in libres) or entra
+
+# ================== ÍNDICE POR FECHA ==================
+PATCH_COLS = ["Persona A","Persona B","Libre"]
+
+def _meses_entre(first: dt.date, last: dt.date):
+    y, m = first.year, first.month
+    while (y, m) <= (last.year, last.month):
+        yield y, m
+        y, m = (y + 1, 1) if m == 12 else (y, m + 1)
+
+class CalendarStore:
+    """
+    Calendario indexado por fecha y turno.
+    - `dia(fecha)` devuelve {turno: fila} en O(1), en el orden en que los generó el motor.
+    - Con `motor(first, last)`, los meses se generan recién la primera vez que se consultan
+      (horizonte abierto: se puede navegar a cualquier mes); `overrides(first, last)` se aplica
+      a cada mes recién generado.
+    - `patch(ov)` aplica overrides como parches por (Fecha, Turno): sólo toca esas filas y marca
+      sucio su mes. `rango()` reusa el DataFrame de los meses que no cambiaron.
+    Se puede compartir entre sesiones (ver turnos/compartido.py): generar, parchear y armar los
+    DataFrame de cada mes van bajo un lock; las filas que devuelve no se modifican.
+    """
+
+    def __init__(self, df: pd.DataFrame | None = None,
+                 motor: Callable[[dt.date, dt.date], pd.DataFrame] | None = None,
+                 overrides: Callable[[dt.date, dt.date], pd.DataFrame] | None = None):
+        self._cols = list(df.columns) if df is not None else list(CAL_COLS)
+        self._dias: dict[dt.date, dict[str, dict]] = {}
+        self._meses: set[tuple[int, int]] = set()
+        self._motor = motor
+        self._overrides = overrides
+        self._frames: dict[tuple[int, int], pd.DataFrame] = {}   # sin entrada = mes sucio
+        self.filas_parcheadas = 0
+        self._lock = threading.RLock()
+        if df is not None: self._cargar(df)
+
+    def _cargar(self, df: pd.DataFrame):
+        nuevos: dict[dt.date, dict[str, dict]] = {}
+        cols = list(df.columns)   # por columnas: bastante más rápido que to_dict("records")
+        for vals in zip(*(df[c].tolist() for c in cols)):
+            rec = dict(zip(cols, vals))
+            nuevos.setdefault(rec["Fecha"], {})[rec["Turno"]] = rec
+        for fecha, turnos in nuevos.items():
+            self._dias[fecha] = turnos
+            self._frames.pop((fecha.year, fecha.month), None)
+
+    def _asegurar_mes(self, year: int, month: int):
+        if self._motor is None or (year, month) in self._meses: return
+        with self._lock:
+            if (year, month) in self._meses: return   # lo generó otra sesión mientras esperaba
+            first, last = rango_mes(year, month)
+            with medir("generar calendario"):
+                df = self._motor(first, last)
+                self._cargar(df)
+            if list(df.columns) == self._cols: self._frames[(year, month)] = df   # el motor ya lo da en orden; patch lo ensucia
+            if self._overrides is not None: self.patch(self._overrides(first, last))
+            self._meses.add((year, month))
+
+    def __contains__(self, fecha: dt.date) -> bool:
+        self._asegurar_mes(fecha.year, fecha.month)
+        return fecha in self._dias
+
+    def __len__(self) -> int:
+        return len(self._dias)
+
+    def dia(self, fecha: dt.date) -> dict[str, dict]:
+        self._asegurar_mes(fecha.year, fecha.month)
+        return self._dias.get(fecha, {})
+
+    def turno(self, fecha: dt.date, turno: str) -> dict | None:
+        return self.dia(fecha).get(turno)
+
+    def plan(self, fecha: dt.date, persona: str) -> list[str]:
+        """Turnos de `persona` en `fecha`."""
+        return [t for t, r in self.dia(fecha).items() if persona in (r["Persona A"], r["Persona B"])]
+
+    def libre(self, fecha: dt.date) -> str:
+        turnos = self.dia(fecha)
+        return "" if not turnos else str(next(iter(turnos.values()))["Libre"])
+
+    def libres(self, fecha: dt.date) -> list[str]:
+        """Los francos del día por separado (Libre los junta con ", " si hay más de uno)."""
+        return [p for p in (x.strip() for x in self.libre(fecha).split(",")) if p and p != "nan"]
+
+    @medido("aplicar overrides")
+    def patch(self, ov: pd.DataFrame | list[dict]) -> int:
+        """
+        Pisa Persona A/B y Libre de las filas (Fecha, Turno) ya generadas; los valores vacíos
+        no pisan (mismo resultado que merge + fillna). Devuelve cuántas filas tocó.
+        """
+        recs = ov.to_dict("records") if isinstance(ov, pd.DataFrame) else ov
+        n = 0
+        with self._lock:
+            for rec in recs:
+                row = self._dias.get(rec.get("Fecha"), {}).get(rec.get("Turno"))
+                if row is None: continue   # mes no generado: se aplica al generarlo
+                for col in PATCH_COLS:
+                    v = rec.get(col)
+                    if v is not None and (isinstance(v, str) or not pd.isna(v)): row[col] = v
+                self._frames.pop((row["Fecha"].year, row["Fecha"].month), None)
+                n += 1
+            self.filas_parcheadas += n
+        return n
+
+    def _frame_mes(self, year: int, month: int) -> pd.DataFrame:
+        f = self._frames.get((year, month))
+        if f is None:
+            with self._lock:
+                first, last = rango_mes(year, month)
+                rows = [r for i in range((last - first).days + 1)
+                        for r in self._dias.get(first + dt.timedelta(days=i), {}).values()]
+                f = self._frames[(year, month)] = pd.DataFrame(rows, columns=self._cols)
+        return f
+
+    def _juntar(self, meses) -> pd.DataFrame:
+        frames = [f for f in (self._frame_mes(y, m) for y, m in meses) if not f.empty]
+        if not frames: return pd.DataFrame(columns=self._cols)
+        return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+    def meses(self) -> list[tuple[int, int]]:
+        """(año, mes) ya generados."""
+        return sorted(self._meses)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Todos los días ya generados, ordenados por fecha y turno. No modificar el resultado."""
+        return self._juntar(sorted({(f.year, f.month) for f in self._dias}))
+
+    def rango(self, first: dt.date, last: dt.date) -> pd.DataFrame:
+        """Filas de first..last, generando los meses que falten. No modificar el resultado."""
+        meses = list(_meses_entre(first, last))
+        for y, m in meses: self._asegurar_mes(y, m)
+        df = self._juntar(meses)
+        if (first.day == 1 and last == rango_mes(last.year, last.month)[1]) or df.empty: return df
+        return df[(df["Fecha"] >= first) & (df["Fecha"] <= last)].reset_index(drop=True)
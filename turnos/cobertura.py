@@ -0,0 +1,177 @@
+"""
+Buscador de cobertura para faltas: quién puede tomar (fecha, turno) sin pisarse con otro turno,
+respetando el descanso mínimo entre turnos y (si se puede) el tope de horas semanales.
+
+    config.json "cobertura": {"descanso_min_horas": 12, "horas_semana_max": 48}
+
+Se arma una vez por sitio y ventana (semanas completas alrededor del mes visible):
+- ocupado[p, d]: un bit por turno del sitio que la persona p hace el día d.
+- minutos[p, d]: minutos planificados ese día (la semana es una suma sobre 7 columnas).
+- choque[k, t]: turnos que el día d+k se superponen con t (o lo dejan sin descanso) el día d.
+Los candidatos de (d, t) salen de un AND por desplazamiento sobre todas las personas a la vez.
+`actualizar(filas)` aplica overrides (Fecha, Turno, Persona A/B) recalculando sólo esas celdas.
+
+El descanso es obligatorio; pasarse del tope semanal no descarta a nadie: queda como "horas extra",
+después de quienes no se pasan.
+"""
+import datetime as dt
+import math
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from turnos.calendario import FALTA, Sitio
+from turnos.perfil import medido
+
+MOTIVOS = ["", "horas extra", "descanso", "en turno", "ausente"]   # de mejor a peor
+
+
+@dataclass(frozen=True)
+class Reglas:
+    descanso_min_horas: float = 12
+    horas_semana_max: float = 48
+
+
+def reglas(config: dict) -> Reglas:
+    c = config.get("cobertura") or {}
+    return Reglas(float(c.get("descanso_min_horas", Reglas.descanso_min_horas)),
+                  float(c.get("horas_semana_max", Reglas.horas_semana_max)))
+
+
+def intervalo(inicio, fin) -> tuple[int, int]:
+    """(inicio, fin) en minutos desde las 00 del día del turno; si fin <= inicio, termina al día siguiente."""
+    (h0, m0), (h1, m1) = (map(int, str(h)[:5].split(":")) for h in (inicio, fin))
+    a, b = h0 * 60 + m0, h1 * 60 + m1
+    return a, b + 1440 if b <= a else b
+
+
+def ventana(first: dt.date, last: dt.date, sitio: Sitio, r: Reglas) -> tuple[dt.date, dt.date]:
+    """Lunes..domingo que cubre first..last más los días que alcanzan al descanso."""
+    k = _alcance(sitio, r)
+    d0, d1 = first - dt.timedelta(days=k), last + dt.timedelta(days=k)
+    return d0 - dt.timedelta(days=d0.weekday()), d1 + dt.timedelta(days=6 - d1.weekday())
+
+
+def _alcance(sitio: Sitio, r: Reglas) -> int:
+    fin = max((intervalo(*h)[1] for h in sitio.horas), default=0)
+    return max(1, math.ceil((fin + r.descanso_min_horas * 60) / 1440))
+
+
+class Cobertura:
+    """Disponibilidad de `personas` en `sitio` entre desde (lunes) y hasta (domingo)."""
+
+    @medido("armar cobertura")
+    def __init__(self, sitio: Sitio, personas: list[str], cal: pd.DataFrame, desde: dt.date, hasta: dt.date,
+                 r: Reglas = Reglas(), ausencias: pd.DataFrame | None = None):
+        self.sitio, self.reglas, self.desde = sitio, r, desde
+        self.personas = list(personas)
+        self._p = {p: i for i, p in enumerate(self.personas)}
+        self._t = {t: i for i, t in enumerate(sitio.turnos)}
+        self.dias = (hasta - desde).days + 1
+        iv = np.array([intervalo(*h) for h in sitio.horas], dtype=np.int64).reshape(-1, 2)
+        self._ini, self._fin = iv[:, 0], iv[:, 1]
+        self._dur = self._fin - self._ini
+        self.K = _alcance(sitio, r)
+        self._solape, self._sin_descanso = self._choques()
+        self.ocupado = np.zeros((len(self.personas), self.dias), dtype=np.int64)
+        self.minutos = np.zeros((len(self.personas), self.dias), dtype=np.int64)
+        self.ausente = np.zeros((len(self.personas), self.dias), dtype=bool)
+        self._asignado: dict[tuple[int, int], list[str]] = {}   # (día, turno) -> [A, B]
+        self._cargar(cal)
+        if ausencias is not None and not ausencias.empty:
+            for f, p in zip(ausencias["Fecha"], ausencias["Persona"]): self.marcar_ausente(f, p)
+
+    def _choques(self) -> tuple[np.ndarray, np.ndarray]:
+        """(2K+1, M) máscaras: turnos del día d+k que se superponen con t / quedan a menos del descanso."""
+        m = len(self._ini)
+        desc = self.reglas.descanso_min_horas * 60
+        solape = np.zeros((2 * self.K + 1, m), dtype=np.int64)
+        sin_desc = np.zeros((2 * self.K + 1, m), dtype=np.int64)
+        for j, k in enumerate(range(-self.K, self.K + 1)):
+            ini, fin = self._ini + k * 1440, self._fin + k * 1440       # turnos i el día d+k
+            for t in range(m):
+                gap = np.maximum(ini - self._fin[t], self._ini[t] - fin)   # < 0: se superponen
+                bits = 1 << np.arange(m, dtype=np.int64)
+                solape[j, t] = bits[gap < 0].sum()
+                sin_desc[j, t] = bits[(gap >= 0) & (gap < desc)].sum()
+        return solape, sin_desc
+
+    def _dia(self, fecha) -> int:
+        return (fecha - self.desde).days
+
+    def _cargar(self, cal: pd.DataFrame):
+        if cal.empty: return
+        d = (np.asarray(cal["Fecha"], dtype="datetime64[D]") - np.datetime64(self.desde, "D")).astype(np.int64)
+        t = cal["Turno"].map(self._t).to_numpy(dtype=float)
+        ok = (d >= 0) & (d < self.dias) & ~np.isnan(t)
+        d, t = d[ok], t[ok].astype(np.int64)
+        a = cal["Persona A"].to_numpy(dtype=object)[ok]
+        b = cal["Persona B"].to_numpy(dtype=object)[ok]
+        for col in (a, b):
+            p = pd.Series(col).map(self._p).to_numpy(dtype=float)
+            hay = ~np.isnan(p)
+            pi, di, ti = p[hay].astype(np.int64), d[hay], t[hay]
+            np.bitwise_or.at(self.ocupado, (pi, di), np.left_shift(1, ti))
+            np.add.at(self.minutos, (pi, di), self._dur[ti])
+        self._asignado = {(int(x), int(y)): [str(pa), str(pb)] for x, y, pa, pb in zip(d, t, a, b)}
+
+    def _recalcular(self, persona: str, d: int):
+        p = self._p.get(persona)
+        if p is None: return
+        bits = mins = 0
+        for t in range(len(self._ini)):
+            if persona in self._asignado.get((d, t), ()): bits |= 1 << t; mins += int(self._dur[t])
+        self.ocupado[p, d], self.minutos[p, d] = bits, mins
+
+    def actualizar(self, filas: list[dict]) -> int:
+        """Aplica overrides (los valores vacíos no pisan, como CalendarStore.patch). Devuelve celdas tocadas."""
+        n = 0
+        for rec in filas:
+            t = self._t.get(rec.get("Turno"))
+            d = self._dia(rec["Fecha"]) if rec.get("Fecha") is not None else -1
+            if t is None or not 0 <= d < self.dias: continue
+            par = self._asignado.setdefault((d, t), ["", ""])
+            for s, col in enumerate(("Persona A", "Persona B")):
+                v = rec.get(col)
+                if v is None or (not isinstance(v, str) and pd.isna(v)) or str(v) == par[s]: continue
+                antes, par[s] = par[s], str(v)
+                self._recalcular(antes, d); self._recalcular(par[s], d); n += 1
+        return n
+
+    def marcar_ausente(self, fecha: dt.date, persona: str):
+        p, d = self._p.get(persona), self._dia(fecha)
+        if p is not None and 0 <= d < self.dias: self.ausente[p, d] = True
+
+    @medido("candidatos cobertura")
+    def candidatos(self, fecha: dt.date, turno: str, todos: bool = False) -> pd.DataFrame:
+        """
+        Quién puede cubrir `turno` en `fecha`, mejor primero: sin horas extra y con menos horas en la
+        semana. Con `todos`, también quienes no pueden (Motivo: descanso / en turno / ausente).
+        """
+        d, t = self._dia(fecha), self._t[turno]
+        if not 0 <= d < self.dias: raise ValueError(f"{fecha} fuera de la ventana de cobertura")
+        solape = np.zeros(len(self.personas), dtype=bool)
+        sin_desc = np.zeros(len(self.personas), dtype=bool)
+        for j, k in enumerate(range(-self.K, self.K + 1)):
+            if not 0 <= d + k < self.dias: continue
+            col = self.ocupado[:, d + k]
+            solape |= (col & self._solape[j, t]) != 0
+            sin_desc |= (col & self._sin_descanso[j, t]) != 0
+        w = d - d % 7
+        semana = self.minutos[:, w:w + 7].sum(axis=1) + self._dur[t]
+        motivo = np.zeros(len(self.personas), dtype=np.int64)
+        motivo[semana > self.reglas.horas_semana_max * 60] = 1
+        motivo[sin_desc] = 2; motivo[solape] = 3; motivo[self.ausente[:, d]] = 4
+        orden = np.lexsort((np.arange(len(self.personas)), semana, motivo))
+        if not todos: orden = orden[motivo[orden] <= 1]
+        return pd.DataFrame({
+            "Persona": np.asarray(self.personas, dtype=object)[orden],
+            "Horas semana": semana[orden] / 60,
+            "Motivo": np.asarray(MOTIVOS, dtype=object)[motivo[orden]],
+        })
+
+    def mejor(self, fecha: dt.date, turno: str) -> str:
+        """El primer candidato, o FALTA si nadie puede cubrir."""
+        c = self.candidatos(fecha, turno)
+        return c["Persona"].iat[0] if len(c) else FALTA
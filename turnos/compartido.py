@@ -0,0 +1,192 @@
+"""
+Estado compartido entre sesiones del mismo proceso, para que cada pestaña abierta no cargue su
+propia copia de los datos:
+
+- Datasets: la instantánea parseada vive una vez en CACHE (turnos/cache.py). Con Copy-on-Write lo
+  que recibe cada sesión es una copia superficial: las mismas columnas, sin duplicar. Una sesión
+  sólo tiene datos propios después de escribir (la vista con sus filas nuevas), y los suelta
+  cuando otro cambia el dataset y la vista se recarga.
+- Calendario: un CalendarStore, la Cobertura de cada mes y las horas planificadas acumuladas
+  por día y mes (turnos/acumulados.py) por (sitio, rotación), compartidos.
+  Los overrides y faltas escritos desde cualquier sesión se aplican sobre ellos; si los cambia
+  otro proceso (otro server, la línea de comandos), `sincronizar()` lo detecta por la firma.
+- `memoria(st.session_state)`: cuánto ocupa una sesión, separando lo propio de lo compartido.
+"""
+import datetime as dt
+import sys
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+
+from turnos import datos
+from turnos.acumulados import Acumulado
+from turnos.cache import CACHE
+from turnos.calendario import CalendarStore, Sitio, generar_sitio, rango_mes
+from turnos.cobertura import Cobertura, Reglas, ventana
+from turnos.storage import Backend
+
+MAX_CALENDARIOS = 8   # combinaciones (sitio, rotación) vivas a la vez por proceso
+MAX_COBERTURAS = 6    # meses por calendario
+
+
+# ================== CALENDARIO COMPARTIDO ==================
+class Calendario:
+    """Calendario de un sitio con una rotación: el store y las coberturas por mes, para todas las sesiones."""
+
+    def __init__(self, b: Backend, sitio: Sitio, anchor: dt.date, offset: int, personas: list[str], r: Reglas):
+        self.b, self.sitio, self.personas, self.reglas = b, sitio, list(personas), r
+        self.store = CalendarStore(motor=lambda first, last: generar_sitio(sitio, anchor, first, last, offset),
+                                   overrides=lambda first, last: datos.load_overrides(b, first, last))
+        self._coberturas: OrderedDict[tuple[int, int], Cobertura] = OrderedDict()
+        self.plan = Acumulado("plan", ["Persona"], "Horas", lambda first, last: datos.horas_plan_dias(self.store.rango(first, last)))
+        self._lock = threading.RLock()
+        self._firmas = {n: b.firma(n) for n in ("overrides", "absences")}
+
+    def sincronizar(self):
+        """Si otro proceso cambió overrides o faltas, lo aplica (una vez por cambio, para todas las sesiones)."""
+        ov, ab = self.b.firma("overrides"), self.b.firma("absences")
+        if ov == self._firmas["overrides"] and ab == self._firmas["absences"]: return
+        with self._lock:
+            if ov is not None and ov != self._firmas["overrides"]:
+                meses = self.store.meses()
+                if meses:
+                    self.store.patch(datos.load_overrides(self.b, rango_mes(*meses[0])[0], rango_mes(*meses[-1])[1]))
+                self._coberturas.clear(); self.plan.olvidar()
+            if ab is not None and ab != self._firmas["absences"]: self._coberturas.clear()
+            self._firmas = {"overrides": ov, "absences": ab}
+
+    def cobertura(self, fecha: dt.date) -> Cobertura:
+        """Disponibilidad del mes de `fecha`: se arma una vez y la actualizan los overrides y faltas."""
+        mes = (fecha.year, fecha.month)
+        with self._lock:
+            c = self._coberturas.get(mes)
+            if c is None:
+                d0, d1 = ventana(*rango_mes(*mes), self.sitio, self.reglas)
+                c = self._coberturas[mes] = Cobertura(self.sitio, self.personas, self.store.rango(d0, d1), d0, d1,
+                                                      self.reglas, datos.load_absences(self.b, d0, d1))
+                while len(self._coberturas) > MAX_COBERTURAS: self._coberturas.popitem(last=False)
+            self._coberturas.move_to_end(mes)
+            return c
+
+    def escribir_overrides(self, rows: list[dict]) -> list[dict]:
+        """Upsert en el storage y sólo esas filas en el store, las coberturas y las horas planificadas. Devuelve las filas completas."""
+        rows = datos.upsert_overrides(self.b, rows)
+        with self._lock:
+            self.store.patch(rows)
+            for c in self._coberturas.values(): c.actualizar(rows)
+            for f in {r["Fecha"] for r in rows}: self.plan.ensuciar(f)
+            self._firmas["overrides"] = self.b.firma("overrides")
+        return rows
+
+    def registrar_falta(self, rec: dict):
+        datos.append_absence(self.b, rec)
+        with self._lock:
+            for c in self._coberturas.values(): c.marcar_ausente(rec["Fecha"], rec["Persona"])
+            self._firmas["absences"] = self.b.firma("absences")
+
+    def quitar_faltas(self, fecha: dt.date, personas_presentes: set) -> pd.DataFrame:
+        """datos.remove_absences_for_day; si borró algo, las coberturas se rearman."""
+        dels = datos.remove_absences_for_day(self.b, fecha, personas_presentes)
+        if not dels.empty:
+            with self._lock:
+                self._coberturas.clear(); self._firmas["absences"] = self.b.firma("absences")
+        return dels
+
+
+_CALENDARIOS: OrderedDict[tuple, Calendario] = OrderedDict()
+_lock = threading.Lock()
+
+
+def calendario(b: Backend, sitio: Sitio, anchor: dt.date, offset: int, personas: list[str], r: Reglas) -> Calendario:
+    """El Calendario compartido de esa combinación (se crea la primera vez; LRU de MAX_CALENDARIOS)."""
+    key = (b, sitio, anchor, int(offset), tuple(personas), r)
+    with _lock:
+        cal = _CALENDARIOS.get(key)
+        if cal is None:
+            cal = _CALENDARIOS[key] = Calendario(b, sitio, anchor, offset, personas, r)
+            while len(_CALENDARIOS) > MAX_CALENDARIOS: _CALENDARIOS.popitem(last=False)
+        _CALENDARIOS.move_to_end(key)
+    cal.sincronizar()
+    return cal
+
+
+# ================== MEMORIA POR SESIÓN ==================
+def _buffers(col: pd.Series) -> list[tuple[int, int]]:
+    """(dirección, bytes) de los buffers de una columna."""
+    arr = col.array
+    if hasattr(arr, "__arrow_array__"):
+        try:
+            pa_arr = arr.__arrow_array__()
+            chunks = pa_arr.chunks if hasattr(pa_arr, "chunks") else [pa_arr]
+            return [(buf.address, buf.size) for ch in chunks for buf in ch.buffers() if buf is not None]
+        except TypeError:
+            pass
+    a = np.asarray(arr)
+    return [(a.__array_interface__["data"][0], a.nbytes)]
+
+
+class _Compartidos:
+    """Rangos de memoria de las instantáneas de CACHE, para saber si un buffer es compartido."""
+
+    def __init__(self):
+        rangos = sorted((d, d + n) for df in CACHE.valores() for c in df.columns for d, n in _buffers(df[c]) if n)
+        self._ini = [a for a, _ in rangos]
+        self._fin = list(np.maximum.accumulate([b for _, b in rangos])) if rangos else []
+
+    def contiene(self, addr: int, n: int) -> bool:
+        i = bisect_right(self._ini, addr) - 1
+        return i >= 0 and addr + n <= self._fin[i]
+
+
+def _tam(v, visto: set, prof: int = 0) -> int:
+    if id(v) in visto or prof > 4: return 0
+    visto.add(id(v))
+    n = sys.getsizeof(v)
+    if isinstance(v, Mapping): n += sum(_tam(k, visto, prof + 1) + _tam(x, visto, prof + 1) for k, x in v.items())
+    elif isinstance(v, (list, tuple, set, frozenset)): n += sum(_tam(x, visto, prof + 1) for x in v)
+    return n
+
+
+def _frame(df: pd.DataFrame, comp: _Compartidos) -> tuple[int, int]:
+    """
+    (propios, compartidos) de un DataFrame, por buffer. Una columna object cuenta entera (con los
+    objetos a los que apunta) de un lado o del otro según su arreglo de punteros: aproximado.
+    """
+    propios = compartidos = 0
+    for c in df.columns:
+        col = df[c]
+        for addr, n in _buffers(col):
+            if col.dtype == object: n = int(col.memory_usage(deep=True, index=False))
+            if comp.contiene(addr, 1): compartidos += n
+            else: propios += n
+    return propios + int(df.index.memory_usage()), compartidos
+
+
+def _calendario(v) -> int:
+    if isinstance(v, CalendarStore):
+        return sum(int(f.memory_usage(deep=True).sum()) for f in list(v._frames.values())) + 400 * sum(map(len, v._dias.values()))
+    return sum(a.nbytes for a in (v.ocupado, v.minutos, v.ausente))
+
+
+def memoria(estado: Mapping) -> pd.DataFrame:
+    """
+    Una fila por clave de `estado` (st.session_state): KiB propios de la sesión y KiB compartidos
+    con el proceso (instantáneas de CACHE, calendario y coberturas compartidos). Aproximado.
+    """
+    comp = _Compartidos()
+    with _lock: cals = list(_CALENDARIOS.values())
+    objs = {id(c.store) for c in cals} | {id(x) for c in cals for x in list(c._coberturas.values())}
+    filas = []
+    for k, v in list(estado.items()):
+        if isinstance(v, pd.DataFrame): tipo, (p, s) = "DataFrame", _frame(v, comp)
+        elif isinstance(v, (CalendarStore, Cobertura)):
+            tipo = type(v).__name__
+            p, s = (0, _calendario(v)) if id(v) in objs else (_calendario(v), 0)
+        else: tipo, p, s = type(v).__name__, _tam(v, set()), 0
+        filas.append((str(k), tipo, p / 1024, s / 1024))
+    df = pd.DataFrame(filas, columns=["Clave", "Tipo", "Propios KiB", "Compartidos KiB"])
+    return df.sort_values("Propios KiB", ascending=False, ignore_index=True).round(1)
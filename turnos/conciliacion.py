@@ -0,0 +1,244 @@
+"""
+Plan vs fichadas: alinea las fichadas de cada persona con los turnos que tenía planificados y
+marca llegadas tarde, salidas anticipadas, turnos sin fichadas o con marcas incompletas y horas
+trabajadas fuera del plan.
+
+    config.json "conciliacion": {"tarde_min": 5, "anticipada_min": 5, "extra_min": 15}
+
+- Plan: cada persona (A o B) de cada fila del calendario, de Hora Inicio a Hora Fin (un Noche
+  termina al día siguiente). Los turnos seguidos de una persona (Mañana + Tarde) son un solo
+  bloque: una fichada de 06 a 22 los cubre a los dos.
+- Los pares Ingreso→Salida (fichadas.emparejar) se cruzan con los bloques por intervalos, para
+  todas las personas y todo el rango a la vez: se ordena por (persona, inicio) y cada par busca
+  con searchsorted el último bloque que empieza antes de su salida (y el anterior, si se solapa
+  con los dos se queda con el de más solapamiento). Las marcas sueltas van al bloque que las
+  contiene, con MARGEN_H de margen.
+- Tolerancias: hasta `tarde_min` / `anticipada_min` minutos no cuentan como tarde o anticipada;
+  las horas fuera del plan se informan siempre, pero "horas extra" sólo pasando `extra_min`.
+"""
+import datetime as dt
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from turnos.calendario import FALTA
+from turnos.cobertura import intervalo
+from turnos.fichadas import emparejar
+from turnos.perfil import medido
+
+MARGEN_H = 3   # una marca suelta hasta 3 h antes o después de un bloque es de ese bloque
+DETALLE_COLS = ["Persona","Fecha","Turno","Inicio","Fin","Ingreso","Salida","Horas plan","Horas fichadas",
+                "Horas fuera de plan","Tarde min","Anticipada min","Marcas","Estado"]
+DESVIOS_COLS = ["Turnos","Llegadas tarde","Min tarde","Salidas anticipadas","Min anticipada","Sin fichadas",
+                "Faltas registradas","Marcas incompletas","Horas plan","Horas fichadas","Horas fuera de plan","Diferencia"]
+AGRUPAR = {"Total": None, "Mes": "M", "Semana": "W"}
+
+
+@dataclass(frozen=True)
+class Tolerancias:
+    tarde_min: float = 5
+    anticipada_min: float = 5
+    extra_min: float = 15
+
+
+def tolerancias(config: dict) -> Tolerancias:
+    c = config.get("conciliacion") or {}
+    return Tolerancias(*(float(c.get(k, getattr(Tolerancias, k))) for k in ("tarde_min", "anticipada_min", "extra_min")))
+
+
+def turnos_plan(cal: pd.DataFrame) -> pd.DataFrame:
+    """Un turno planificado por fila: Persona, Fecha, Turno, Inicio, Fin (Timestamps)."""
+    personas = pd.concat([cal["Persona A"], cal["Persona B"]], ignore_index=True)
+    ok = np.flatnonzero((personas.notna() & ~personas.isin(["", FALTA])).to_numpy())
+    fila = ok % max(len(cal), 1)
+    # horarios y fechas se convierten una vez por valor distinto (pocos) y se expanden por código
+    hc, hs = pd.factorize(cal["Hora Inicio"].astype(str) + "|" + cal["Hora Fin"].astype(str))
+    mins = np.array([intervalo(*h.split("|")) for h in hs], dtype=np.int64).reshape(-1, 2)
+    fc, fs = pd.factorize(cal["Fecha"])
+    base = pd.to_datetime(pd.Series(fs, dtype=object)).to_numpy().astype("datetime64[m]")[fc[fila]]
+    return pd.DataFrame({"Persona": personas.to_numpy()[ok], "Fecha": cal["Fecha"].to_numpy()[fila],
+                         "Turno": cal["Turno"].to_numpy()[fila],
+                         "Inicio": (base + mins[hc[fila], 0]).astype("datetime64[s]"),
+                         "Fin": (base + mins[hc[fila], 1]).astype("datetime64[s]")})
+
+
+def proximo_fin(cal: pd.DataFrame, momento: pd.Timestamp) -> pd.Timestamp | None:
+    """
+    Fin del primer turno de `cal` que termina después de `momento` (None si ya terminaron todos).
+    Hasta entonces conciliar(..., momento=) da el mismo resultado: sirve de vencimiento de un cache.
+    """
+    if cal.empty: return None
+    momento = pd.Timestamp(momento)
+    h = cal.loc[cal["Fecha"] >= momento.date() - dt.timedelta(days=1), ["Fecha","Hora Inicio","Hora Fin"]].drop_duplicates()   # un turno dura menos de un día
+    fines = [pd.Timestamp(f) + pd.Timedelta(minutes=intervalo(a, b)[1]) for f, a, b in h.itertuples(index=False)]
+    return min((f for f in fines if f > momento), default=None)
+
+
+def _bloques(plan: pd.DataFrame) -> pd.DataFrame:
+    """Une los turnos seguidos o solapados de cada persona: Persona, Fecha (la del primero), Inicio, Fin, Turno."""
+    if plan.empty: return pd.DataFrame(columns=["Persona","Fecha","Inicio","Fin","Turno"])
+    pc, pu = pd.factorize(plan["Persona"])
+    ini, fin = _segundos(plan["Inicio"]), _segundos(plan["Fin"])
+    o = np.lexsort((ini, pc))
+    pc, ini, fin = pc[o], ini[o], fin[o]
+    # el máximo acumulado de Fin por persona sale de uno global sobre (persona, fin): las claves crecen con la persona
+    t0, span = int(ini.min()), int(fin.max() - ini.min()) + 1
+    hasta = np.maximum.accumulate(pc * span + (fin - t0))
+    nuevo = np.r_[True, (pc[1:] != pc[:-1]) | (pc[1:] * span + (ini[1:] - t0) > hasta[:-1])]
+    cortes = np.flatnonzero(nuevo)
+    turno = plan["Turno"].to_numpy(dtype=object)[o]
+    turnos = turno[cortes]
+    n = np.diff(np.r_[cortes, len(o)])
+    for k in np.flatnonzero(n > 1): turnos[k] = ", ".join(turno[cortes[k]:cortes[k] + n[k]])
+    return pd.DataFrame({"Persona": pu.to_numpy()[pc[cortes]], "Fecha": plan["Fecha"].to_numpy()[o][cortes],
+                         "Inicio": ini[cortes].astype("datetime64[s]"),
+                         "Fin": np.maximum.reduceat(fin, cortes).astype("datetime64[s]"), "Turno": turnos})
+
+
+def _segundos(t) -> np.ndarray:
+    return pd.to_datetime(t).to_numpy().astype("datetime64[s]").astype(np.int64)
+
+
+class _Indice:
+    """Bloques ordenados por (persona, inicio) para buscar con searchsorted sobre una clave combinada."""
+
+    def __init__(self, b: pd.DataFrame, codigos: pd.Index):
+        cod = codigos.get_indexer(b["Persona"]).astype(np.int64)
+        ini, fin = _segundos(b["Inicio"]), _segundos(b["Fin"])
+        self.t0 = int(ini.min()) - 86400 * 2 if len(b) else 0
+        self.span = int(fin.max()) - self.t0 + 86400 * 4 if len(b) else 1
+        self.clave = cod * self.span + (ini - self.t0)
+        # un bloque centinela al final (que buscar nunca devuelve): indexar con -1 no falla aunque no haya bloques
+        self.cod, self.ini, self.fin = np.r_[cod, -2], np.r_[ini, 0], np.r_[fin, 0]
+
+    def buscar(self, cod: np.ndarray, t: np.ndarray, antes_s: int = 0) -> np.ndarray:
+        """Índice del último bloque de `cod` que empieza antes de t (+ antes_s), o -1."""
+        if not len(self.clave): return np.full(len(t), -1)
+        rel = np.clip(t - self.t0 + antes_s, 0, self.span - 1)
+        j = np.searchsorted(self.clave, cod * self.span + rel, side="left") - 1
+        return np.where((j >= 0) & (cod >= 0) & (self.cod[j] == cod), j, -1)
+
+
+def _solape(idx: _Indice, j: np.ndarray, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    s = np.minimum(idx.fin[j], b) - np.maximum(idx.ini[j], a)
+    return np.where(j >= 0, np.maximum(s, 0), 0)
+
+
+@medido("conciliar plan y fichadas")
+def conciliar(cal: pd.DataFrame, logs: pd.DataFrame, first: dt.date, last: dt.date, faltas: pd.DataFrame | None = None,
+              tol: Tolerancias = Tolerancias(), momento: pd.Timestamp | None = None) -> pd.DataFrame:
+    """
+    Una fila por bloque planificado de first..last (con el primer Ingreso y la última Salida
+    que le tocaron) y una por par o marca fuera del plan. `logs`: fichadas de first-1..last+1
+    (un Noche sale al día siguiente). `faltas` (Fecha, Persona): un bloque sin fichadas con falta
+    registrada no cuenta como "sin fichadas". Con `momento`, los bloques que no terminaron no entran.
+    """
+    cal = cal[(cal["Fecha"] >= first) & (cal["Fecha"] <= last)] if not cal.empty else cal
+    b = _bloques(turnos_plan(cal)) if not cal.empty else pd.DataFrame(columns=["Persona","Fecha","Inicio","Fin","Turno"])
+    if momento is not None and not b.empty: b = b[b["Fin"] <= pd.Timestamp(momento)].reset_index(drop=True)
+    pares, sueltos = emparejar(logs)
+    sueltos = sueltos[sueltos["Timestamp"].notna()]
+    codigos = pd.Index(pd.unique(np.concatenate([b["Persona"].to_numpy(dtype=object), pares["Persona"].to_numpy(dtype=object),
+                                                 sueltos["Persona"].to_numpy(dtype=object)])))
+    idx = _Indice(b, codigos)
+
+    # pares -> bloque con más solapamiento (el último que empieza antes de la salida, o el anterior)
+    pc = codigos.get_indexer(pares["Persona"]).astype(np.int64)
+    ing, sal = _segundos(pares["Ingreso"]), _segundos(pares["Salida"])
+    j1 = idx.buscar(pc, sal)
+    j0 = np.where(j1 > 0, j1 - 1, -1)
+    j0 = np.where(idx.cod[j0] == pc, j0, -1)
+    s1, s0 = _solape(idx, j1, ing, sal), _solape(idx, j0, ing, sal)
+    j = np.where(s0 > s1, j0, j1); solape = np.maximum(s0, s1)
+    j = np.where(solape > 0, j, -1)
+    dur = sal - ing
+
+    nb = len(b)
+    en = j >= 0
+    primer = np.full(nb, np.iinfo(np.int64).max); ultima = np.full(nb, np.iinfo(np.int64).min)
+    np.minimum.at(primer, j[en], ing[en]); np.maximum.at(ultima, j[en], sal[en])
+    fichado = np.bincount(j[en], weights=dur[en], minlength=nb) / 3600
+    fuera = np.bincount(j[en], weights=(dur - solape)[en], minlength=nb) / 3600
+    con_par = np.bincount(j[en], minlength=nb) > 0
+
+    # marcas sueltas -> bloque que las contiene (± MARGEN_H)
+    sc, st = codigos.get_indexer(sueltos["Persona"]).astype(np.int64), _segundos(sueltos["Timestamp"])
+    js = idx.buscar(sc, st, antes_s=MARGEN_H * 3600)
+    js = np.where((js >= 0) & (st <= idx.fin[js] + MARGEN_H * 3600), js, -1)
+    incompleta = np.bincount(js[js >= 0], minlength=nb) > 0
+
+    ini, fin = idx.ini[:nb], idx.fin[:nb]
+    tarde = np.where(con_par, (primer - ini) / 60, 0.0)
+    anticipada = np.where(con_par, (fin - ultima) / 60, 0.0)
+    tarde = np.where(tarde > tol.tarde_min, np.round(tarde), 0.0)
+    anticipada = np.where(anticipada > tol.anticipada_min, np.round(anticipada), 0.0)
+    falta = np.zeros(nb, dtype=bool)
+    if faltas is not None and not faltas.empty and nb:
+        f = faltas[["Fecha","Persona"]].drop_duplicates().assign(_f=True)
+        falta = b[["Fecha","Persona"]].merge(f, on=["Fecha","Persona"], how="left")["_f"].notna().to_numpy()
+    sin = ~con_par & ~incompleta
+    marcas = np.select([sin & falta, sin, incompleta], ["falta registrada", "sin fichadas", "incompletas"], "ok")
+    flags = pd.DataFrame({"tarde": tarde > 0, "salida anticipada": anticipada > 0, "sin fichadas": sin & ~falta,
+                          "falta registrada": sin & falta, "marca incompleta": incompleta,
+                          "horas extra": fuera * 60 > tol.extra_min})
+    planificados = pd.DataFrame({
+        "Persona": b["Persona"].to_numpy(), "Fecha": b["Fecha"].to_numpy(), "Turno": b["Turno"].to_numpy(),
+        "Inicio": b["Inicio"].to_numpy(), "Fin": b["Fin"].to_numpy(),
+        "Ingreso": pd.to_datetime(np.where(con_par, primer, 0), unit="s").where(con_par),
+        "Salida": pd.to_datetime(np.where(con_par, ultima, 0), unit="s").where(con_par),
+        "Horas plan": (fin - ini) / 3600, "Horas fichadas": fichado, "Horas fuera de plan": fuera,
+        "Tarde min": tarde, "Anticipada min": anticipada, "Marcas": marcas, "Estado": _estado(flags)})
+
+    # lo que no cayó en ningún bloque: trabajo fuera del plan (en first..last)
+    libres = pares[~en]
+    libres = libres[(libres["Fecha"] >= first) & (libres["Fecha"] <= last)]
+    fuera_p = pd.DataFrame({"Persona": libres["Persona"].to_numpy(), "Fecha": libres["Fecha"].to_numpy(), "Turno": "", "Inicio": pd.NaT, "Fin": pd.NaT,
+                            "Ingreso": libres["Ingreso"].to_numpy(), "Salida": libres["Salida"].to_numpy(),
+                            "Horas plan": 0.0, "Horas fichadas": libres["Horas"].to_numpy(), "Horas fuera de plan": libres["Horas"].to_numpy(),
+                            "Tarde min": 0.0, "Anticipada min": 0.0, "Marcas": "sin plan", "Estado": "fuera de plan"})
+    sueltas = sueltos[(js < 0)]
+    sueltas = sueltas[(sueltas["Fecha"] >= first) & (sueltas["Fecha"] <= last)]
+    fuera_s = pd.DataFrame({"Persona": sueltas["Persona"].to_numpy(), "Fecha": sueltas["Fecha"].to_numpy(), "Turno": "", "Inicio": pd.NaT, "Fin": pd.NaT,
+                            "Ingreso": sueltas["Timestamp"].where(sueltas["Tipo"] == "Ingreso").to_numpy(),
+                            "Salida": sueltas["Timestamp"].where(sueltas["Tipo"] == "Salida").to_numpy(),
+                            "Horas plan": 0.0, "Horas fichadas": 0.0, "Horas fuera de plan": 0.0, "Tarde min": 0.0,
+                            "Anticipada min": 0.0, "Marcas": "incompletas", "Estado": "marca fuera de plan"})
+    partes = [p for p in (planificados, fuera_p, fuera_s) if not p.empty]
+    if not partes: return pd.DataFrame(columns=DETALLE_COLS)
+    out = pd.concat(partes, ignore_index=True) if len(partes) > 1 else partes[0]
+    orden = out["Inicio"].fillna(out["Ingreso"]).fillna(out["Salida"])
+    return out.assign(_o=orden).sort_values(["Fecha","_o","Persona"], kind="stable", ignore_index=True)[DETALLE_COLS]
+
+
+def _estado(flags: pd.DataFrame) -> np.ndarray:
+    """"tarde, horas extra" por fila a partir de columnas booleanas ("ok" si no hay ninguna)."""
+    texto = flags.dot(pd.Index(flags.columns) + ", ").str.rstrip(", ") if len(flags) else pd.Series([], dtype=object)
+    return texto.where(texto != "", "ok").to_numpy(dtype=object)
+
+
+def _periodo(fecha: pd.Series, agrupar: str | None) -> np.ndarray:
+    if agrupar is None: return np.full(len(fecha), "Total", dtype=object)
+    codes, fechas = pd.factorize(fecha)   # una etiqueta por fecha distinta
+    f = pd.to_datetime(pd.Series(fechas))
+    if agrupar == "M": etiquetas = f.dt.strftime("%Y-%m")
+    else:
+        iso = f.dt.isocalendar()
+        etiquetas = iso["year"].astype(str) + "-S" + iso["week"].astype(str).str.zfill(2)
+    return etiquetas.to_numpy(dtype=object)[codes]
+
+
+@medido("desvíos por persona")
+def desvios(detalle: pd.DataFrame, agrupar: str | None = "M") -> pd.DataFrame:
+    """Desvíos por Persona y Periodo ("Total", "AAAA-MM" o "AAAA-Snn" según `agrupar`: None, "M", "W")."""
+    if detalle.empty: return pd.DataFrame(columns=["Persona","Periodo", *DESVIOS_COLS])
+    d = detalle.assign(Periodo=_periodo(detalle["Fecha"], agrupar), _plan=detalle["Marcas"] != "sin plan")
+    d = d.assign(_tarde=d["Tarde min"] > 0, _ant=d["Anticipada min"] > 0, _sin=d["Marcas"] == "sin fichadas",
+                 _falta=d["Marcas"] == "falta registrada", _inc=d["Marcas"] == "incompletas")
+    out = d.groupby(["Persona","Periodo"], as_index=False, sort=True).agg(**{
+        "Turnos": ("_plan", "sum"), "Llegadas tarde": ("_tarde", "sum"), "Min tarde": ("Tarde min", "sum"),
+        "Salidas anticipadas": ("_ant", "sum"), "Min anticipada": ("Anticipada min", "sum"), "Sin fichadas": ("_sin", "sum"),
+        "Faltas registradas": ("_falta", "sum"), "Marcas incompletas": ("_inc", "sum"), "Horas plan": ("Horas plan", "sum"),
+        "Horas fichadas": ("Horas fichadas", "sum"), "Horas fuera de plan": ("Horas fuera de plan", "sum")})
+    out["Diferencia"] = out["Horas fichadas"] - out["Horas plan"]
+    return out.round(2)
@@ -0,0 +1,410 @@
+"""
+Datasets de la app sin Streamlit: parseo de tipos, lecturas por rango (cacheadas por proceso)
+y escrituras como operaciones de journal. La app sólo agrega encima la vista en memoria de la sesión.
+
+    from turnos import datos
+    from turnos.storage import get_backend
+
+    b = get_backend()
+    datos.load_timelog(b, dt.date(2025, 1, 1), dt.date(2025, 12, 31))
+"""
+import datetime as dt
+import threading
+
+import numpy as np
+import pandas as pd
+
+from turnos.acumulados import Acumulado
+from turnos.cache import cargar, escribir, escribir_lote, reemplazar
+from turnos.calendario import FALTA, TURNOS
+from turnos.cobertura import intervalo
+from turnos.fichadas import Abiertos, a_local, ahora, emparejar, parse_timelog
+from turnos.perfil import medido
+from turnos.storage import DATASETS, Backend
+
+
+# ================== PARSEO ==================
+def parse_overrides(df: pd.DataFrame) -> pd.DataFrame:
+    if "Fecha" in df: df["Fecha"] = pd.to_datetime(df["Fecha"]).dt.date
+    return df
+
+def parse_absences(df: pd.DataFrame) -> pd.DataFrame:
+    df["Fecha"] = pd.to_datetime(df["Fecha"]).dt.date
+    return df
+
+def parse_tasks(df: pd.DataFrame) -> pd.DataFrame:
+    if "Fecha" in df: df["Fecha"] = pd.to_datetime(df["Fecha"]).dt.date
+    if "Due" in df: df["Due"] = pd.to_datetime(df["Due"], errors="coerce").dt.date
+    return df
+
+
+# ================== OVERRIDES ==================
+def load_overrides(b: Backend, first: dt.date | None = None, last: dt.date | None = None) -> pd.DataFrame:
+    return cargar(b, "overrides", parse_overrides, first, last)
+
+def filas_overrides_dia(fecha: dt.date, valores: dict, libre_override=None) -> list[dict]:
+    """Filas de upsert para los turnos de `fecha` (valores = {turno: {"A":..., "B":...}})."""
+    rows = []
+    for t in valores:
+        row = {"Fecha":fecha,"Turno":t,"Persona A":valores[t]["A"],"Persona B":valores[t]["B"]}
+        if libre_override is not None: row["Libre"]=libre_override
+        rows.append(row)
+    return rows
+
+def filas_libre_dia(fecha: dt.date, nuevo_libre: str, turnos=TURNOS) -> list[dict]:
+    return [{"Fecha":fecha,"Turno":t,"Libre":nuevo_libre} for t in turnos]
+
+def _completar(name: str, rows: list[dict], actual: pd.DataFrame) -> list[dict]:
+    """
+    Filas enteras para un upsert (que reemplaza la fila): las columnas que una fila no trae
+    conservan el valor guardado en `actual`; una columna que trae vacía queda vacía.
+    """
+    d = DATASETS[name]
+    clave = lambda r: tuple(str(r[k]) for k in d.key)
+    guardadas = {clave(r): r for r in actual.to_dict("records")} if not actual.empty else {}
+    return [{**{c: guardadas.get(clave(r), {}).get(c) for c in d.cols}, **r} for r in rows]
+
+def upsert_overrides(b: Backend, rows: list[dict]) -> list[dict]:
+    """Upsert por (Fecha, Turno): las columnas ausentes conservan su valor. Devuelve las filas completas escritas."""
+    with b.bloqueo("overrides"):
+        fechas = [r["Fecha"] for r in rows]
+        rows = _completar("overrides", rows, load_overrides(b, min(fechas), max(fechas)) if rows else pd.DataFrame())
+        escribir(b, "overrides", "upsert", rows)
+    return rows
+
+
+# ================== FALTAS ==================
+def load_absences(b: Backend, first: dt.date | None = None, last: dt.date | None = None) -> pd.DataFrame:
+    return cargar(b, "absences", parse_absences, first, last)
+
+def append_absence(b: Backend, rec: dict):
+    antes = _antes(b, "absences")
+    escribir(b, "absences", "add", [rec])
+    _al_escribir(b, "absences", antes, lambda a: a.sumar(rec["Fecha"], (rec["Persona"], rec.get("Turno") or "")))
+
+def remove_absences_for_day(b: Backend, fecha: dt.date, personas_presentes: set) -> pd.DataFrame:
+    """Borra las faltas de `fecha` de quienes sí están. Devuelve las claves borradas (vacío: nada)."""
+    df = load_absences(b, fecha, fecha)
+    hits = df[df["Persona"].isin(list(personas_presentes))]
+    dels = hits[DATASETS["absences"].key].drop_duplicates()
+    if not dels.empty:
+        antes = _antes(b, "absences")
+        escribir(b, "absences", "del", dels.to_dict("records"))
+        _al_escribir(b, "absences", antes, lambda a: a.ensuciar(fecha))
+    return dels
+
+
+# ================== TAREAS ==================
+def load_tasks(b: Backend, first: dt.date | None = None, last: dt.date | None = None) -> pd.DataFrame:
+    return cargar(b, "tasks", parse_tasks, first, last)
+
+def save_tasks(b: Backend, df: pd.DataFrame):
+    reemplazar(b, "tasks", df)
+
+def add_task(b: Backend, row: dict, clave: str | None = None) -> dict:
+    """Agrega una tarea (el backend asigna el id). Con `clave`, un doble clic no la duplica."""
+    return escribir(b, "tasks", "add", [row], auto_id="id", clave=clave)[0]
+
+def clave_tarea(row: dict) -> str:
+    """Misma tarea (fecha, turno, persona, título) dentro de la ventana de idempotencia = un solo alta."""
+    return "tarea|" + "|".join(str(row.get(c) or "") for c in ("Fecha", "Turno", "Persona", "Titulo"))
+
+def filtrar_tareas(tasks: pd.DataFrame, first: dt.date, last: dt.date,
+                   turno: str | None = None, persona: str | None = None, estado: str | None = None) -> pd.DataFrame:
+    """Tareas de first..last (y del turno/persona/estado, si se pasan), ordenadas como en la lista."""
+    if tasks.empty: return tasks
+    fechas = pd.to_datetime(tasks["Fecha"], errors="coerce")
+    mask = ((fechas >= pd.Timestamp(first)) & (fechas <= pd.Timestamp(last))).to_numpy(copy=True)
+    if turno: mask &= (tasks["Turno"] == turno).to_numpy()
+    if persona: mask &= (tasks["Persona"] == persona).to_numpy()
+    if estado: mask &= (tasks["Estado"] == estado).to_numpy()
+    return tasks[mask].sort_values(["Fecha","Turno","Persona","Estado","id"])
+
+def diff_tasks(antes: pd.DataFrame, despues: pd.DataFrame) -> tuple[list[dict], list[dict]]:
+    """(cambios de Estado, borrados) entre la página mostrada y la editada (mismas filas, mismo orden)."""
+    ids = antes["id"].to_numpy()
+    hecha = despues["Hecha"].to_numpy(dtype=bool)
+    borrar = despues["Borrar"].to_numpy(dtype=bool)
+    cambio = (hecha != antes["Hecha"].to_numpy(dtype=bool)) & ~borrar
+    estados = [{"id": int(i), "Estado": "Hecho" if h else "Pendiente"} for i, h in zip(ids[cambio], hecha[cambio])]
+    return estados, [{"id": int(i)} for i in ids[borrar]]
+
+def commit_tasks(b: Backend, estados: list[dict], borrados: list[dict]) -> list[dict]:
+    """Una escritura por tipo de operación, sin reescribir tasks.csv. Devuelve las tareas completas con su Estado nuevo."""
+    with b.bloqueo("tasks"):
+        if estados: estados = _completar("tasks", estados, load_tasks(b)); escribir(b, "tasks", "upsert", estados)
+        if borrados: escribir(b, "tasks", "del", borrados)
+    return estados
+
+
+# ================== FICHADAS ==================
+def load_timelog(b: Backend, first: dt.date | None = None, last: dt.date | None = None) -> pd.DataFrame:
+    return cargar(b, "timelog", parse_timelog, first, last)
+
+def save_timelog(b: Backend, df: pd.DataFrame):
+    reemplazar(b, "timelog", df)
+    _al_escribir(b, "timelog", None, Acumulado.olvidar)
+
+def append_timelog(b: Backend, row: dict, por: str | None = None, tz: dt.timezone | None = None,
+                   clave: str | None = None) -> dict:
+    """
+    Normaliza Timestamp a hora local de `tz` (sin Timestamp: ahora) y agrega una fila al timelog
+    (el backend asigna el id). Registra el alta como versión 1 en el historial (CreadoPor: `por`,
+    o la Fuente) y la pasa al índice de ingresos abiertos. Con `clave` (ver clave_fichada), un
+    reintento o doble toque no agrega nada: devuelve la fila con el id de la primera y "_repetida".
+    """
+    row["Timestamp"] = a_local(row["Timestamp"], tz) if "Timestamp" in row else ahora(tz)
+    antes = _antes(b, "timelog")
+    row = escribir(b, "timelog", "add", [row], auto_id="id", clave=clave)[0]
+    if row.get("_repetida"): return row
+    escribir(b, "fichadas_hist", "add", [_version(row, 1, CreadoPor=por or row.get("Fuente"), CreadoEn=ahora(tz))])
+    e = _ABIERTOS.get(b)
+    if e is not None: e[0].registrar(row)
+    _al_escribir(b, "timelog", antes, lambda a: a.ensuciar(row["Fecha"] - dt.timedelta(days=1), row["Fecha"]))
+    return row
+
+
+def append_timelog_lote(b: Backend, df: pd.DataFrame, por: str | None = None, tz: dt.timezone | None = None) -> pd.DataFrame:
+    """
+    append_timelog para muchas fichadas (importaciones): una escritura al timelog y otra al
+    historial, sin clave. `df` trae las columnas de timelog con Timestamp ya en hora local.
+    Devuelve `df` con los ids. El índice de ingresos abiertos se rearma en la próxima consulta.
+    """
+    if df.empty: return df
+    antes = _antes(b, "timelog")
+    df = escribir_lote(b, "timelog", df.reindex(columns=DATASETS["timelog"].cols), auto_id="id")
+    escribir_lote(b, "fichadas_hist", pd.DataFrame({
+        "ID": df["id"], "Version": 1, "Persona": df["Persona"], "Fecha": df["Fecha"], "Evento": df["Tipo"],
+        "Timestamp": df["Timestamp"], "Turno": df["Turno"], "Fuente": df["Fuente"], "Eliminado": False,
+        "CreadoPor": por if por is not None else df["Fuente"], "CreadoEn": ahora(tz)}))
+    desde, hasta = df["Fecha"].min(), df["Fecha"].max()
+    _olvidar_abiertos(b, desde - dt.timedelta(days=1))
+    _al_escribir(b, "timelog", antes, lambda a: a.ensuciar(desde - dt.timedelta(days=1), hasta))
+    return df
+
+
+def clave_fichada(persona: str, tipo: str, previa: dict | None) -> str:
+    """
+    Clave de idempotencia de un toque: persona, evento y el último evento que se veía al tocar.
+    Dos toques (o dos kioscos) sobre el mismo estado son la misma fichada; tras registrarla, el
+    próximo toque ya parte de otro evento previo y tiene otra clave.
+    """
+    return f"fichada|{persona}|{tipo}|{'' if previa is None else int(previa['id'])}"
+
+
+# ================== INGRESOS ABIERTOS ==================
+VENTANA_ABIERTOS = 3   # días hacia atrás que se releen cuando el timelog cambió (ahí escriben kioscos y auto-cierre)
+_ABIERTOS: dict[Backend, list] = {}   # backend -> [Abiertos, firma del timelog al sincronizar, rearmar desde]
+_abiertos_lock = threading.Lock()
+
+def abiertos(b: Backend, hoy: dt.date) -> Abiertos:
+    """
+    Índice de ingresos abiertos del proceso. La primera vez recorre todo el timelog (un Ingreso de
+    hace una semana que nadie cerró sigue abierto); después sólo incorpora las filas con id nuevo de
+    los últimos VENTANA_ABIERTOS días cuando el timelog cambió (otros procesos / kioscos). Las
+    fichadas de este proceso entran directo al agregarlas; tras una corrección se rearma desde su
+    Fecha o desde el ingreso abierto más viejo, lo que sea anterior.
+    """
+    with _abiertos_lock:
+        e = _ABIERTOS.get(b)
+        if e is None or e[2] is not None:
+            desde = None if e is None else min([e[2], hoy - dt.timedelta(days=VENTANA_ABIERTOS)] + [f["Fecha"] for f in e[0].todos()])
+            e = _ABIERTOS[b] = [Abiertos(), b.firma("timelog"), None]
+            e[0].aplicar(load_timelog(b, desde))
+            return e[0]
+        f = b.firma("timelog")
+        if f is None or f != e[1]:   # sin firma (no cacheable): consulta la ventana cada vez
+            logs = load_timelog(b, hoy - dt.timedelta(days=VENTANA_ABIERTOS), hoy + dt.timedelta(days=1))
+            e[0].aplicar(logs[pd.to_numeric(logs["id"], errors="coerce") > e[0].visto])
+            e[1] = f
+        return e[0]
+
+def _olvidar_abiertos(b: Backend, desde: dt.date):
+    """Una corrección cambia filas ya vistas: el índice se rearma desde `desde` en la próxima consulta."""
+    with _abiertos_lock:
+        e = _ABIERTOS.get(b)
+        if e is not None: e[2] = desde if e[2] is None else min(e[2], desde)
+
+
+# ================== HISTORIAL DE FICHADAS ==================
+# Cada alta, corrección o eliminación agrega una versión a fichadas_hist; nunca se reescribe.
+# timelog sigue siendo el estado vigente (con sus índices y su archivo): las vistas no leen el historial.
+# La Fecha de una fichada no se corrige (se elimina y se carga otra), así todas sus versiones
+# comparten Fecha y el historial se consulta por rango igual que timelog.
+def parse_historial(df: pd.DataFrame) -> pd.DataFrame:
+    df = parse_timelog(df)
+    for c in ("CreadoEn","EditadoEn","EliminadoEn"): df[c] = pd.to_datetime(df[c], errors="coerce", format="ISO8601")
+    for c in ("ID","Version"): df[c] = pd.to_numeric(df[c], errors="coerce").astype("Int64")
+    df["Eliminado"] = df["Eliminado"].astype(str).str.lower().isin(["true","1","1.0"])
+    return df
+
+def load_historial(b: Backend, first: dt.date | None = None, last: dt.date | None = None) -> pd.DataFrame:
+    return cargar(b, "fichadas_hist", parse_historial, first, last)
+
+def _version(fila: dict, version: int, **auditoria) -> dict:
+    return {"ID": int(fila["id"]), "Version": version, "Persona": fila["Persona"], "Fecha": fila["Fecha"],
+            "Evento": fila["Tipo"], "Timestamp": fila["Timestamp"], "Turno": fila.get("Turno"),
+            "Fuente": fila.get("Fuente"), "Eliminado": False, **auditoria}
+
+def historial_fichada(b: Backend, fila: dict) -> pd.DataFrame:
+    """Versiones de la fichada `fila` (una fila de timelog), de la primera a la última."""
+    h = load_historial(b, fila["Fecha"], fila["Fecha"])
+    return h[h["ID"] == int(fila["id"])].sort_values("Version").reset_index(drop=True)
+
+def _previas(b: Backend, fila: dict) -> tuple[list[dict], int, dict]:
+    """(versiones que faltan escribir, número de la nueva, auditoría que arrastra la nueva)."""
+    h = historial_fichada(b, fila)
+    if h.empty:   # fichada anterior al historial: su estado actual queda como versión 1
+        alta = {"CreadoPor": fila.get("Fuente"), "CreadoEn": fila["Timestamp"]}
+        return [_version(fila, 1, **alta)], 2, alta
+    u = h.iloc[-1]
+    if u["Eliminado"]: raise ValueError(f"La fichada {int(fila['id'])} está eliminada")
+    return [], int(u["Version"]) + 1, {c: u[c] for c in ("Ciclo","CreadoPor","CreadoEn","EditadoPor","EditadoEn")}
+
+def editar_fichada(b: Backend, fila: dict, cambios: dict, por: str, observaciones: str | None = None,
+                   tz: dt.timezone | None = None) -> dict:
+    """
+    Corrige Tipo/Timestamp/Turno de una fichada: agrega una versión al historial y reemplaza la
+    fila vigente (mismo id). Devuelve la fila nueva. ValueError si se intenta cambiar id o Fecha.
+    """
+    if {"id","Fecha"} & set(cambios): raise ValueError("El id y la Fecha no se corrigen: eliminar la fichada y cargar otra")
+    with b.bloqueo("timelog"):   # versión y fila vigente sin que otra corrección se intercale
+        previas, n, arrastre = _previas(b, fila)
+        nueva = {**{c: fila.get(c) for c in DATASETS["timelog"].cols}, **cambios, "id": int(fila["id"])}
+        if "Timestamp" in cambios: nueva["Timestamp"] = a_local(cambios["Timestamp"], tz)
+        version = _version(nueva, n, **{**arrastre, "EditadoPor": por, "EditadoEn": ahora(tz), "Observaciones": observaciones})
+        escribir(b, "fichadas_hist", "add", previas + [version])   # primero el historial: es la fuente de verdad
+        antes = _antes(b, "timelog")
+        escribir(b, "timelog", "upsert", [nueva])   # una línea de journal / una transacción: la fila nunca falta
+        _olvidar_abiertos(b, nueva["Fecha"] - dt.timedelta(days=1))
+        _al_escribir(b, "timelog", antes, lambda a: a.ensuciar(nueva["Fecha"] - dt.timedelta(days=1), nueva["Fecha"]))
+    return nueva
+
+def eliminar_fichada(b: Backend, fila: dict, por: str, motivo: str, tz: dt.timezone | None = None):
+    """Baja lógica: versión con Eliminado en el historial; la fila sale de timelog."""
+    with b.bloqueo("timelog"):
+        previas, n, arrastre = _previas(b, fila)
+        version = _version(fila, n, **arrastre, Eliminado=True, EliminadoPor=por,
+                           EliminadoEn=ahora(tz), MotivoEliminacion=motivo)
+        escribir(b, "fichadas_hist", "add", previas + [version])
+        antes = _antes(b, "timelog")
+        escribir(b, "timelog", "del", [{"id": int(fila["id"])}])
+        _olvidar_abiertos(b, fila["Fecha"] - dt.timedelta(days=1))
+        _al_escribir(b, "timelog", antes, lambda a: a.ensuciar(fila["Fecha"] - dt.timedelta(days=1), fila["Fecha"]))
+
+def vigente_desde(h: pd.DataFrame) -> pd.Series:
+    """Momento en que cada versión pasó a ser la vigente."""
+    return h["EliminadoEn"].where(h["Eliminado"], h["EditadoEn"].fillna(h["CreadoEn"]))
+
+@medido("fichadas al")
+def fichadas_al(b: Backend, momento: dt.datetime, first: dt.date | None = None, last: dt.date | None = None) -> pd.DataFrame:
+    """
+    Fichadas de first..last como estaban registradas en `momento` (columnas de timelog).
+    Las fichadas sin historial (anteriores a él) cuentan desde su Timestamp, tal como están hoy.
+    """
+    momento = pd.Timestamp(momento)
+    h = load_historial(b, first, last)
+    ya = h[(vigente_desde(h) <= momento).to_numpy()]
+    ult = ya.sort_values(["ID","Version"]).drop_duplicates("ID", keep="last")
+    vivas = ult[~ult["Eliminado"]].rename(columns={"ID": "id", "Evento": "Tipo"})
+    vivas = vivas.assign(id=vivas["id"].astype("int64"))[DATASETS["timelog"].cols]
+    actual = load_timelog(b, first, last)
+    viejas = actual[~actual["id"].isin(h["ID"].dropna().astype("int64")) & (actual["Timestamp"] <= momento)]
+    partes = [p for p in (viejas, vivas) if not p.empty]
+    if not partes: return actual.iloc[:0]
+    out = partes[0] if len(partes) == 1 else pd.concat(partes, ignore_index=True)
+    return out.sort_values(["Timestamp","id"], kind="stable").reset_index(drop=True)
+
+
+# ================== AGREGADOS ==================
+def _duracion(inicio: str, fin: str) -> float:
+    """Horas entre "HH:MM" y "HH:MM" (si fin <= inicio, termina al día siguiente)."""
+    a, b = intervalo(inicio, fin)
+    return (b - a) / 60
+
+def _duraciones(cal: pd.DataFrame, horas_turno: float | None = None) -> np.ndarray:
+    if horas_turno is not None: return np.full(len(cal), float(horas_turno))
+    pares = cal["Hora Inicio"].astype(str) + "|" + cal["Hora Fin"].astype(str)
+    return pares.map({p: _duracion(*p.split("|")) for p in pares.unique()}).to_numpy(dtype=float)
+
+@medido("horas planificadas")
+def horas_planificadas(cal: pd.DataFrame, horas_turno: float | None = None) -> pd.DataFrame:
+    """
+    Horas por persona según el calendario (A y B de cada turno), de mayor a menor.
+    La duración de cada turno sale de Hora Inicio/Fin (o `horas_turno` para todos, si se pasa).
+    """
+    if cal.empty: return pd.DataFrame(columns=["Persona","Horas"])
+    dur = _duraciones(cal, horas_turno)
+    codes, quienes = pd.factorize(np.concatenate([cal["Persona A"].to_numpy(dtype=object), cal["Persona B"].to_numpy(dtype=object)]))
+    tot = np.bincount(codes[codes >= 0], weights=np.concatenate([dur, dur])[codes >= 0], minlength=len(quienes))
+    out = pd.DataFrame({"Persona": quienes, "Horas": tot})
+    out = out[out["Persona"] != FALTA]
+    return out.sort_values(["Horas","Persona"], ascending=[False, True], kind="stable").reset_index(drop=True)
+
+def horas_plan_dias(cal: pd.DataFrame) -> pd.DataFrame:
+    """Fecha, Persona, Horas: una fila por persona asignada (A o B) a cada turno de `cal`."""
+    if cal.empty: return pd.DataFrame(columns=["Fecha","Persona","Horas"])
+    dur = _duraciones(cal)
+    df = pd.DataFrame({"Fecha": np.concatenate([cal["Fecha"].to_numpy(dtype=object)] * 2),
+                       "Persona": np.concatenate([cal["Persona A"].to_numpy(dtype=object), cal["Persona B"].to_numpy(dtype=object)]),
+                       "Horas": np.concatenate([dur, dur])})
+    return df[df["Persona"].notna() & ~df["Persona"].isin([FALTA, ""])]
+
+
+# ================== ACUMULADOS ==================
+# Totales por día y mes para rangos largos (turnos/acumulados.py), uno por backend y dataset; las
+# horas planificadas dependen de la rotación y van con el calendario compartido (turnos/compartido.py).
+# Las escrituras de este proceso los actualizan al escribir. Las de otros procesos se notan por la
+# firma: las faltas se rearman enteras y de las fichadas, los últimos VENTANA_ABIERTOS días (ahí
+# escriben los kioscos y el auto-cierre); una corrección vieja hecha desde otro proceso se ve al
+# rearmar (p. ej. con `olvidar_acumulados`).
+_ACUMULADOS: dict[tuple[Backend, str], list] = {}   # (backend, dataset) -> [Acumulado, firma al sincronizar]
+_acumulados_lock = threading.Lock()
+
+def _faltas_dias(b: Backend, first: dt.date, last: dt.date) -> pd.DataFrame:
+    df = load_absences(b, first, last)
+    return pd.DataFrame({"Fecha": df["Fecha"], "Persona": df["Persona"].fillna(""), "Turno": df["Turno"].fillna(""), "Faltas": 1.0})
+
+def _horas_dias(b: Backend, first: dt.date, last: dt.date) -> pd.DataFrame:
+    """Pares con Ingreso en first..last (se lee un día más, por la salida del Noche del último)."""
+    pares, _ = emparejar(load_timelog(b, first, last + dt.timedelta(days=1)))
+    return pares[(pares["Fecha"] >= first) & (pares["Fecha"] <= last) & (pares["Horas"] > 0)]
+
+def _acumulado(b: Backend, name: str, crear, sincronizar) -> Acumulado:
+    with _acumulados_lock:
+        e = _ACUMULADOS.get((b, name))
+        if e is None: e = _ACUMULADOS[(b, name)] = [crear(), b.firma(name)]
+        f = b.firma(name)
+        if f is None or f != e[1]: sincronizar(e[0]); e[1] = f
+        return e[0]
+
+def faltas_acumuladas(b: Backend) -> Acumulado:
+    """Faltas por Persona y Turno."""
+    return _acumulado(b, "absences", lambda: Acumulado("faltas", ["Persona","Turno"], "Faltas", lambda f, l: _faltas_dias(b, f, l)),
+                      Acumulado.olvidar)
+
+def horas_fichadas(b: Backend, hoy: dt.date) -> Acumulado:
+    """Horas fichadas por Persona (pares Ingreso→Salida, al día del Ingreso, como emparejar)."""
+    return _acumulado(b, "timelog", lambda: Acumulado("fichadas", ["Persona"], "Horas", lambda f, l: _horas_dias(b, f, l)),
+                      lambda a: a.ensuciar(hoy - dt.timedelta(days=VENTANA_ABIERTOS), hoy))
+
+def olvidar_acumulados(b: Backend):
+    with _acumulados_lock:
+        for (bb, _), e in _ACUMULADOS.items():
+            if bb is b: e[0].olvidar()
+
+def _antes(b: Backend, name: str):
+    """Firma previa a una escritura, sólo si hay un acumulado de `name` que mantener."""
+    return b.firma(name) if (b, name) in _ACUMULADOS else None
+
+def _al_escribir(b: Backend, name: str, antes, fn):
+    """
+    `fn(acumulado)` tras una escritura de este proceso. Si el acumulado ya estaba al día (`antes`
+    es la firma con que se sincronizó), queda al día con la firma nueva; si no, se sincroniza igual
+    en la próxima consulta.
+    """
+    with _acumulados_lock:
+        e = _ACUMULADOS.get((b, name))
+        if e is None: return
+        fn(e[0])
+        if antes is not None and e[1] == antes: e[1] = b.firma(name)
@@ -0,0 +1,151 @@
+"""
+Exportación a Excel para liquidación: horas planificadas y fichadas por persona, faltas y tareas
+de cualquier rango de fechas.
+
+Se procesa mes por mes y se escribe con xlsxwriter en modo constant_memory (cada fila va a un
+temporal apenas se escribe), así un año de todo el personal nunca está entero en un DataFrame.
+Lo único que se acumula es el resumen por persona.
+
+    python -m turnos.exportar --desde 2025-01-01 --hasta 2025-12-31 -o liquidacion.xlsx
+"""
+import argparse
+import datetime as dt
+from pathlib import Path
+from typing import BinaryIO
+
+import numpy as np
+import pandas as pd
+import xlsxwriter
+
+from turnos import datos
+from turnos.calendario import MESES, CalendarStore, _meses_entre, generar_sitio, rango_mes, rotacion
+from turnos.fichadas import PARES_COLS, SUELTOS_COLS, emparejar, horas_por_persona
+from turnos.perfil import medido
+from turnos.plantel import Plantel, cargar_plantel
+from turnos.storage import DATASETS, Backend, get_backend, leer_config
+
+TOTALES = ["Horas plan.","Horas fichadas","Diferencia","Faltas","Tareas hechas","Tareas pendientes"]
+HOJAS = {
+    "Resumen": ["Persona"] + TOTALES,
+    "Mensual": ["Mes","Persona"] + TOTALES,
+    "Horas":   PARES_COLS,
+    "Sin par": SUELTOS_COLS,
+    "Faltas":  DATASETS["absences"].cols,
+    "Tareas":  DATASETS["tasks"].cols,
+}
+
+
+def meses(first: dt.date, last: dt.date):
+    """(desde, hasta) de cada mes tocado por first..last, recortados al rango."""
+    for y, m in _meses_entre(first, last):
+        mf, ml = rango_mes(y, m)
+        yield max(mf, first), min(ml, last)
+
+
+def _celda(v):
+    if v is None or (not isinstance(v, str) and pd.isna(v)): return None
+    return v.item() if isinstance(v, np.generic) else v
+
+
+class _Hoja:
+    """Hoja en la que sólo se agregan filas hacia abajo (lo que exige constant_memory)."""
+
+    def __init__(self, wb: xlsxwriter.Workbook, nombre: str, cols: list[str], negrita):
+        self.ws = wb.add_worksheet(nombre)
+        self.cols = cols
+        self.ws.write_row(0, 0, cols, negrita)
+        self.ws.freeze_panes(1, 0)
+        self.ws.set_column(0, len(cols) - 1, 14)
+        self.fila = 1
+
+    def agregar(self, df: pd.DataFrame):
+        for rec in df.reindex(columns=self.cols).itertuples(index=False, name=None):
+            self.ws.write_row(self.fila, 0, [_celda(v) for v in rec]); self.fila += 1
+
+
+def totales_mes(b: Backend, plantel: Plantel, anchor: dt.date, offset: int, first: dt.date, last: dt.date):
+    """
+    Un mes (o parte): (totales por persona, pares, sueltos, faltas, tareas), de todos los sitios.
+    Las fichadas se leen de first - 1 a last + 1: la salida del Noche anterior a first se empareja
+    (y queda en el mes anterior) y el Noche del último día se cierra.
+    """
+    ov = datos.load_overrides(b, first, last)
+    cal = []
+    for sitio in plantel.sitios:
+        store = CalendarStore(motor=lambda f, l, s=sitio: generar_sitio(s, anchor, f, l, offset), overrides=lambda f, l: ov)
+        cal.append(store.rango(first, last))
+    plan = datos.horas_planificadas(pd.concat(cal, ignore_index=True)).set_index("Persona")["Horas"]
+
+    pares, sueltos = emparejar(datos.load_timelog(b, first - dt.timedelta(days=1), last + dt.timedelta(days=1)))
+    pares = pares[(pares["Fecha"] >= first) & (pares["Fecha"] <= last)]
+    sueltos = sueltos[(sueltos["Fecha"] >= first) & (sueltos["Fecha"] <= last)]
+    fichadas = horas_por_persona(pares[pares["Horas"] > 0]).set_index("Persona")["Horas"]
+
+    faltas = datos.load_absences(b, first, last).sort_values(["Fecha","Turno","Slot"])
+    tareas = datos.load_tasks(b, first, last).sort_values(["Fecha","Turno","Persona","id"])
+    estado = tareas["Estado"] if not tareas.empty else pd.Series(dtype=object)
+
+    tot = pd.DataFrame({
+        "Horas plan.": plan,
+        "Horas fichadas": fichadas,
+        "Faltas": faltas["Persona"].value_counts(),
+        "Tareas hechas": tareas.loc[estado == "Hecho", "Persona"].value_counts(),
+        "Tareas pendientes": tareas.loc[estado != "Hecho", "Persona"].value_counts(),
+    }).fillna(0)
+    tot = tot[tot.index.notna() & (tot.index != "")]
+    tot["Diferencia"] = tot["Horas fichadas"] - tot["Horas plan."]
+    orden = {p.nombre: i for i, p in enumerate(plantel.personas)}
+    tot = tot.sort_index(key=lambda s: s.map(lambda p: (orden.get(p, len(orden)), p)))
+    return tot.rename_axis("Persona").reset_index()[HOJAS["Resumen"]], pares, sueltos, faltas, tareas
+
+
+@medido("exportar excel")
+def exportar(b: Backend, destino: str | Path | BinaryIO, first: dt.date, last: dt.date,
+             anchor: dt.date, offset: int = 0, plantel: Plantel | None = None) -> dict[str, int]:
+    """Escribe el libro en `destino` (ruta o archivo binario). Devuelve filas escritas por hoja."""
+    plantel = plantel or cargar_plantel(leer_config())
+    wb = xlsxwriter.Workbook(destino, {"constant_memory": True, "default_date_format": "dd/mm/yyyy"})
+    negrita = wb.add_format({"bold": True})
+    hojas = {n: _Hoja(wb, n, cols, negrita) for n, cols in HOJAS.items()}
+    for n in ("Horas", "Sin par"):
+        hojas[n].ws.set_column(2, 3, 18, wb.add_format({"num_format": "dd/mm/yyyy hh:mm"}))
+
+    resumen = []   # totales por persona de cada mes: unas pocas filas por mes
+    for mf, ml in meses(first, last):
+        tot, pares, sueltos, faltas, tareas = totales_mes(b, plantel, anchor, offset, mf, ml)
+        hojas["Mensual"].agregar(tot.assign(Mes=f"{MESES[mf.month-1].capitalize()} {mf.year}").round(2))
+        hojas["Horas"].agregar(pares.sort_values(["Fecha","Persona","Ingreso"]).round({"Horas": 2}))
+        hojas["Sin par"].agregar(sueltos.sort_values(["Fecha","Persona"]))
+        hojas["Faltas"].agregar(faltas)
+        hojas["Tareas"].agregar(tareas)
+        resumen.append(tot)
+    if resumen:
+        hojas["Resumen"].agregar(pd.concat(resumen).groupby("Persona", sort=False, as_index=False).sum().round(2))
+    wb.close()
+    return {n: h.fila - 1 for n, h in hojas.items()}
+
+
+def main():
+    ap = argparse.ArgumentParser(prog="python -m turnos.exportar", description="Exportar liquidación a Excel")
+    ap.add_argument("--desde", required=True, type=dt.date.fromisoformat)
+    ap.add_argument("--hasta", required=True, type=dt.date.fromisoformat)
+    ap.add_argument("-o", "--salida", default=None, help="por defecto liquidacion_<desde>_<hasta>.xlsx")
+    ap.add_argument("--data", default="data")
+    ap.add_argument("--inicio", type=dt.date.fromisoformat, default=None,
+                    help="inicio de rotación (por defecto el de config.json)")
+    ap.add_argument("--offset", type=int, default=None)
+    args = ap.parse_args()
+    if args.hasta < args.desde: ap.error("--hasta es anterior a --desde")
+
+    config = leer_config()
+    anchor, offset = rotacion(config, dt.date.today())
+    if args.inicio: anchor = args.inicio - dt.timedelta(days=args.inicio.weekday())
+    if args.offset is not None: offset = args.offset
+    salida = args.salida or f"liquidacion_{args.desde}_{args.hasta}.xlsx"
+    n = exportar(get_backend(Path(args.data), config), salida, args.desde, args.hasta, anchor, offset, cargar_plantel(config))
+    for hoja, filas in n.items(): print(f"{hoja}: {filas} filas")
+    print(f"-> {salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Emparejado de fichadas Ingreso→Salida con operaciones sobre arrays, por persona y sobre
+todo el rango (no por Fecha), así un turno Noche que sale al día siguiente queda emparejado.
+
+Las fichadas se guardan en hora de pared local, sin zona: la de config.json
+"timezone_offset_minutes" (p. ej. -180 = UTC-3), no la del servidor (ver `ahora`).
+"""
+import datetime as dt
+import threading
+
+import numpy as np
+import pandas as pd
+
+from turnos.perfil import medido
+
+MAX_HORAS_PAR = 16.0   # un Ingreso→Salida más largo se considera olvido de salida
+
+PARES_COLS   = ["Persona","Fecha","Ingreso","Salida","Horas"]
+SUELTOS_COLS = ["Persona","Fecha","Tipo","Timestamp","Motivo"]
+
+
+def parse_timelog(df: pd.DataFrame) -> pd.DataFrame:
+    if "Fecha" in df: df["Fecha"] = pd.to_datetime(df["Fecha"]).dt.date
+    # ISO8601: con y sin microsegundos en la misma columna (si no, pandas infiere el formato de la primera)
+    if "Timestamp" in df: df["Timestamp"] = pd.to_datetime(df["Timestamp"], errors="coerce", format="ISO8601")
+    return df
+
+
+# ================== HORA LOCAL ==================
+def zona(config: dict) -> dt.timezone | None:
+    """Zona fija de config.json "timezone_offset_minutes". None: la del servidor."""
+    m = config.get("timezone_offset_minutes")
+    return None if m is None else dt.timezone(dt.timedelta(minutes=int(m)))
+
+def ahora(tz: dt.timezone | None = None) -> pd.Timestamp:
+    """Hora de pared en `tz`, sin zona (como se guardan las fichadas)."""
+    return pd.Timestamp.now(tz).tz_localize(None) if tz is not None else pd.Timestamp.now()
+
+def a_local(v, tz: dt.timezone | None = None) -> pd.Timestamp:
+    """Timestamp con zona -> hora de pared en `tz`; uno sin zona se toma como ya local."""
+    t = pd.to_datetime(v, errors="coerce")
+    if pd.isna(t) or t.tzinfo is None: return t
+    return t.tz_convert(tz if tz is not None else dt.datetime.now().astimezone().tzinfo).tz_localize(None)
+
+
+# ================== INGRESOS ABIERTOS ==================
+class Abiertos:
+    """
+    Ingreso abierto por persona (su último evento con hora es un Ingreso): las vistas y el
+    auto-cierre lo consultan en O(1) en lugar de recorrer las fichadas. Se alimenta con cada
+    fichada nueva (`registrar`) o con un lote (`aplicar`); un evento más viejo que el último
+    conocido de esa persona no cambia nada. `visto` = mayor id de los lotes incorporados (una fila
+    registrada suelta no lo mueve: otro proceso pudo haber escrito un id menor que todavía no llegó).
+    """
+
+    def __init__(self):
+        self._abierto: dict[str, dict] = {}
+        self._ultimo: dict[str, dict] = {}   # último evento (Ingreso o Salida) por persona
+        self._lock = threading.Lock()
+        self.visto = 0
+
+    def registrar(self, fila: dict):
+        ts, p = fila.get("Timestamp"), fila["Persona"]
+        with self._lock:
+            if ts is None or pd.isna(ts) or (p in self._ultimo and ts < self._ultimo[p]["Timestamp"]): return
+            self._ultimo[p] = dict(fila)
+            if fila["Tipo"] == "Ingreso": self._abierto[p] = dict(fila)
+            else: self._abierto.pop(p, None)
+
+    def aplicar(self, logs: pd.DataFrame):
+        """Incorpora un lote: sólo cuenta el último evento de cada persona."""
+        if logs.empty: return
+        with self._lock:
+            self.visto = max(self.visto, int(pd.to_numeric(logs["id"], errors="coerce").max()))
+        ok = logs[logs["Timestamp"].notna()].sort_values(["Timestamp","id"], kind="stable")
+        for fila in ok.drop_duplicates("Persona", keep="last").to_dict("records"): self.registrar(fila)
+
+    def de(self, persona: str) -> dict | None:
+        """El Ingreso abierto de `persona`, o None."""
+        return self._abierto.get(persona)
+
+    def ultimo(self, persona: str) -> dict | None:
+        """El último evento con hora de `persona` (para la clave de idempotencia del próximo toque)."""
+        return self._ultimo.get(persona)
+
+    def todos(self) -> list[dict]:
+        with self._lock: return list(self._abierto.values())
+
+
+def del_dia(logs: pd.DataFrame, persona: str, fecha: dt.date) -> pd.DataFrame:
+    """Fichadas de `persona` en `fecha`, en orden (las sin hora al final)."""
+    return logs[(logs["Persona"] == persona) & (logs["Fecha"] == fecha)].sort_values("Timestamp", na_position="last")
+
+
+@medido("emparejar fichadas")
+def emparejar(logs: pd.DataFrame, max_horas: float = MAX_HORAS_PAR) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Empareja cada Ingreso con la Salida que le sigue inmediatamente (misma persona, orden por Timestamp).
+    - El par se atribuye a la Fecha del Ingreso (un Noche cuenta en el día en que empezó).
+    - Devuelve (pares, sueltos): los sueltos son ingresos sin salida, salidas sin ingreso,
+      fichadas sin hora y pares que superan `max_horas`.
+    """
+    if logs.empty:
+        return pd.DataFrame(columns=PARES_COLS), pd.DataFrame(columns=SUELTOS_COLS)
+    ts = pd.to_datetime(logs["Timestamp"], errors="coerce")
+    fecha = logs["Fecha"] if "Fecha" in logs else ts.dt.date
+    d = pd.DataFrame({"Persona": logs["Persona"].to_numpy(), "Fecha": fecha.to_numpy(),
+                      "Tipo": logs["Tipo"].to_numpy(), "Timestamp": ts.to_numpy()})
+    sin_hora = d["Timestamp"].isna().to_numpy()
+    d_ok = d[~sin_hora].sort_values(["Persona","Timestamp"], kind="stable").reset_index(drop=True)
+
+    per = d_ok["Persona"].to_numpy()
+    tipo = d_ok["Tipo"].to_numpy()
+    t = d_ok["Timestamp"].to_numpy()
+    n = len(d_ok)
+
+    # Ingreso en i y Salida en i+1 de la misma persona
+    sig_misma = np.zeros(n, dtype=bool); sig_misma[:-1] = per[1:] == per[:-1]
+    sig_salida = np.zeros(n, dtype=bool); sig_salida[:-1] = tipo[1:] == "Salida"
+    par = (tipo == "Ingreso") & sig_misma & sig_salida
+    dur = np.zeros(n, dtype="timedelta64[ns]"); dur[:-1] = t[1:] - t[:-1]
+    largo = par & (dur > np.timedelta64(int(max_horas * 3600), "s"))
+    par &= ~largo
+
+    i_in = np.flatnonzero(par)
+    pares = pd.DataFrame({
+        "Persona": per[i_in], "Fecha": d_ok["Fecha"].to_numpy()[i_in],
+        "Ingreso": t[i_in], "Salida": t[i_in + 1],
+        "Horas": dur[i_in] / np.timedelta64(1, "h"),
+    }, columns=PARES_COLS)
+
+    usado = np.zeros(n, dtype=bool); usado[i_in] = True; usado[i_in + 1] = True
+    motivo = np.where(tipo == "Ingreso", "ingreso sin salida", "salida sin ingreso").astype(object)
+    i_largo = np.flatnonzero(largo)
+    motivo[i_largo] = motivo[i_largo + 1] = f"par de más de {max_horas:g} h"
+    sueltos = d_ok[~usado].assign(Motivo=motivo[~usado])
+    if sin_hora.any():
+        sueltos = pd.concat([sueltos, d[sin_hora].assign(Motivo="sin hora")], ignore_index=True)
+    return pares, sueltos.reset_index(drop=True)[SUELTOS_COLS]
+
+
+@medido("horas por persona")
+def horas_por_persona(pares: pd.DataFrame) -> pd.DataFrame:
+    """Total de horas por persona, de mayor a menor."""
+    if pares.empty: return pd.DataFrame(columns=["Persona","Horas"])
+    out = pares.groupby("Persona", as_index=False)["Horas"].sum().sort_values("Horas", ascending=False)
+    out["Horas"] = out["Horas"].round(2)
+    return out
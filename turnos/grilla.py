@@ -0,0 +1,43 @@
+"""
+Grilla del mes como un único bloque HTML: un solo elemento de Streamlit en lugar de
+~10 por día (contenedor, botón, encabezado, libre y chips). Usa las mismas clases
+.daybox/.chip que el render por casilleros.
+"""
+import datetime as dt
+from html import escape
+
+from turnos.calendario import DIAS_ABBR, CalendarStore
+from turnos.perfil import medido
+from turnos.plantel import chip_cls
+
+
+def _chip(nombre) -> str:
+    n = str(nombre)
+    return f"<span class='chip {chip_cls(n)}'>{escape(n)}</span>"
+
+
+def dia_html(store: CalendarStore, day: dt.date, sel: dt.date | None = None) -> str:
+    out = [f"<div class='daybox{' sel' if day == sel else ''}'>"
+           f"<div class='dayhead'><span class='daynum'>{DIAS_ABBR[day.weekday()]} {day.day}</span></div>"]
+    turnos = store.dia(day)
+    if not turnos:
+        out.append("<div class='small'>—</div>")
+    else:
+        out.append(f"<div class='small'>🟢 Libre: {escape(str(store.libre(day)))}</div>")
+        for t, row in turnos.items():
+            out.append(f"<div class='row'><span class='ttl'>{t}</span> "
+                       f"<span class='horas'>({row['Hora Inicio']}–{row['Hora Fin']})</span></div>"
+                       f"<div class='row'>{_chip(row['Persona A'])}{_chip(row['Persona B'])}</div>")
+    out.append("</div>")
+    return "".join(out)
+
+
+@medido("render grilla")
+def mes_html(store: CalendarStore, first: dt.date, last: dt.date, sel: dt.date | None = None) -> str:
+    """Todo el mes en una grilla CSS de 7 columnas (los huecos iniciales alinean el día de la semana)."""
+    celdas = ["<div class='daybox vacio'></div>"] * first.weekday()
+    day = first
+    while day <= last:
+        celdas.append(dia_html(store, day, sel))
+        day += dt.timedelta(days=1)
+    return "<div class='mesgrid'>" + "".join(celdas) + "</div>"
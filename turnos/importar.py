@@ -0,0 +1,160 @@
+"""
+Importación de fichadas desde los exports de los relojes biométricos (CSV, cientos de miles de
+marcas por año), en lugar de cargarlas a mano desde el kiosco.
+
+    personas.csv   columna Credencial: el id de cada persona en el reloj
+    config.json    "importar": {"credencial": "AC-No.", "momento": "Time", "tipo": "State",
+                                "formato": "%d/%m/%Y %H:%M",          # por defecto ISO 8601
+                                "tipos": {"C/In": "Ingreso", "C/Out": "Salida"},
+                                "zona_reloj_minutos": 0}               # si el reloj no marca en hora local
+    python -m turnos.importar export.csv [--data data] [--simular] [--informe informe.json]
+
+El archivo se lee por bloques de `--bloque` filas y cada bloque se normaliza con operaciones por
+columna: credencial -> persona (Plantel.credenciales), momento -> hora local de pared (como
+append_timelog), estado -> Ingreso/Salida. Lo que no se puede mapear queda contado en el informe.
+Las repetidas dentro del archivo y las que ya están en timelog (misma Persona, Tipo y Timestamp)
+se descartan con un merge, así reimportar el mismo export, o uno que se solapa, no duplica.
+Lo nuevo se escribe en un solo lote (datos.append_timelog_lote), bajo el bloqueo del timelog.
+"""
+import argparse
+import datetime as dt
+import json
+import time
+from collections import Counter
+from pathlib import Path
+
+import pandas as pd
+
+from turnos import datos
+from turnos.fichadas import zona
+from turnos.perfil import medir
+from turnos.plantel import cargar_plantel
+from turnos.storage import Backend, get_backend, leer_config
+
+DEFAULTS = {"credencial": "AC-No.", "momento": "Time", "tipo": "State", "formato": "ISO8601",
+            "tipos": {"C/In": "Ingreso", "C/Out": "Salida", "Entrada": "Ingreso", "Salida": "Salida",
+                      "Ingreso": "Ingreso", "0": "Ingreso", "1": "Salida"},
+            "zona_reloj_minutos": None, "separador": ",", "fuente": "reloj"}
+BLOQUE = 200_000   # filas por bloque al leer el export
+CLAVE = ["Persona", "Tipo", "Timestamp"]
+
+
+def opciones(config: dict) -> dict:
+    """Opciones de config.json "importar" sobre DEFAULTS."""
+    return {**DEFAULTS, **(config.get("importar") or {})}
+
+
+def _local(ts: pd.Series, op: dict, tz: dt.timezone | None) -> pd.Series:
+    """Como fichadas.a_local por columna: con zona (o con "zona_reloj_minutos") -> hora de pared en `tz`."""
+    if ts.dt.tz is None:
+        if op["zona_reloj_minutos"] is None: return ts
+        ts = ts.dt.tz_localize(dt.timezone(dt.timedelta(minutes=int(op["zona_reloj_minutos"]))))
+    return ts.dt.tz_convert(tz if tz is not None else dt.datetime.now().astimezone().tzinfo).dt.tz_localize(None)
+
+
+def _normalizar(parte: pd.DataFrame, op: dict, credenciales: dict[str, str], tz: dt.timezone | None,
+                informe: dict, desconocidas: Counter) -> pd.DataFrame:
+    """Un bloque del export -> Persona, Tipo, Timestamp (local) de las filas que se pudieron mapear."""
+    cred = parte[op["credencial"]].str.strip()
+    persona = cred.map(credenciales)
+    ts = _local(pd.to_datetime(parte[op["momento"]].str.strip(), errors="coerce", format=op["formato"]), op, tz)
+    tipo = parte[op["tipo"]].str.strip().map(op["tipos"]) if op["tipo"] in parte else pd.Series(None, index=parte.index)
+    sin_persona, sin_hora = persona.isna(), ts.isna()
+    sin_tipo = ~tipo.isin(["Ingreso", "Salida"])
+    informe["leidas"] += len(parte)
+    informe["sin_persona"] += int(sin_persona.sum())
+    informe["sin_hora"] += int((sin_hora & ~sin_persona).sum())
+    informe["tipo_desconocido"] += int((sin_tipo & ~sin_persona & ~sin_hora).sum())
+    desconocidas.update(cred[sin_persona].fillna("").value_counts().to_dict())
+    ok = (~(sin_persona | sin_hora | sin_tipo)).to_numpy()
+    personas = sorted(set(credenciales.values()))
+    return pd.DataFrame({"Persona": pd.Categorical(persona[ok], categories=personas),
+                         "Tipo": pd.Categorical(tipo[ok], categories=["Ingreso", "Salida"]),
+                         "Timestamp": ts[ok].astype("datetime64[us]")})
+
+
+def leer(fuente, op: dict, credenciales: dict[str, str], tz: dt.timezone | None = None,
+         bloque: int = BLOQUE) -> tuple[pd.DataFrame, dict]:
+    """(fichadas normalizadas y sin repetir dentro del archivo, informe parcial). `fuente`: ruta o archivo abierto."""
+    informe = {"leidas": 0, "sin_persona": 0, "sin_hora": 0, "tipo_desconocido": 0}
+    desconocidas, partes = Counter(), []
+    cols = [op["credencial"], op["momento"], op["tipo"]]
+    with medir("leer export"):
+        for parte in pd.read_csv(fuente, sep=op["separador"], dtype=str, chunksize=bloque, skipinitialspace=True,
+                                 usecols=lambda c: c.strip() in cols):
+            parte.columns = parte.columns.str.strip()
+            faltan = [c for c in cols[:2] if c not in parte]
+            if faltan: raise ValueError(f"El export no tiene la(s) columna(s) {', '.join(faltan)} (ver config.json \"importar\")")
+            partes.append(_normalizar(parte, op, credenciales, tz, informe, desconocidas))
+    df = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame(columns=CLAVE)
+    rep = df.duplicated(CLAVE).to_numpy()
+    informe["repetidas_archivo"] = int(rep.sum())
+    informe["credenciales_desconocidas"] = dict(desconocidas.most_common(20))
+    return df[~rep].sort_values(["Timestamp", "Persona"], kind="stable", ignore_index=True), informe
+
+
+def _nuevas(b: Backend, df: pd.DataFrame) -> pd.DataFrame:
+    """Las filas de `df` que no están ya en timelog (merge por Persona, Tipo y Timestamp)."""
+    desde, hasta = df["Timestamp"].min().date(), df["Timestamp"].max().date()
+    ya = datos.load_timelog(b, desde, hasta)
+    ya = ya.loc[ya["Timestamp"].notna(), CLAVE].astype({"Persona": str, "Tipo": str, "Timestamp": "datetime64[us]"})
+    m = df.astype({"Persona": str, "Tipo": str}).merge(ya.drop_duplicates(), on=CLAVE, how="left", indicator=True)
+    return df[(m["_merge"] == "left_only").to_numpy()]
+
+
+def importar(b: Backend, fuente, credenciales: dict[str, str], op: dict = DEFAULTS, tz: dt.timezone | None = None,
+             por: str | None = None, simular: bool = False, bloque: int = BLOQUE) -> dict:
+    """
+    Importa un export del reloj al timelog y devuelve el informe: filas leídas, descartadas por
+    motivo, repetidas (en el archivo / ya cargadas), importadas, rango de fechas y segundos.
+    Con `simular`, el informe de lo que importaría, sin escribir.
+    """
+    t0 = time.perf_counter()
+    df, informe = leer(fuente, op, credenciales, tz, bloque)
+    informe.update(ya_cargadas=0, importadas=0, desde=None, hasta=None)
+    if not df.empty:
+        with b.bloqueo("timelog"), medir("importar fichadas"):
+            nuevas = _nuevas(b, df)
+            informe["ya_cargadas"] = len(df) - len(nuevas)
+            if not nuevas.empty:
+                fecha = nuevas["Timestamp"].dt.date
+                informe.update(importadas=len(nuevas), desde=fecha.min().isoformat(), hasta=fecha.max().isoformat())
+                if not simular:
+                    datos.append_timelog_lote(b, pd.DataFrame({
+                        "Fecha": fecha, "Persona": nuevas["Persona"].astype(str), "Tipo": nuevas["Tipo"].astype(str),
+                        "Timestamp": nuevas["Timestamp"], "Turno": None, "Fuente": op["fuente"]}), por=por, tz=tz)
+    informe["segundos"] = round(time.perf_counter() - t0, 2)
+    return informe
+
+
+def resumen(informe: dict) -> str:
+    """El informe en una línea, para la línea de comandos y la app."""
+    descartadas = informe["sin_persona"] + informe["sin_hora"] + informe["tipo_desconocido"]
+    rango = f" ({informe['desde']} a {informe['hasta']})" if informe["desde"] else ""
+    return (f"{informe['importadas']} importada(s){rango} de {informe['leidas']} leída(s): "
+            f"{informe['ya_cargadas']} ya cargada(s), {informe['repetidas_archivo']} repetida(s) en el archivo, "
+            f"{descartadas} descartada(s) (sin persona {informe['sin_persona']}, sin hora {informe['sin_hora']}, "
+            f"evento desconocido {informe['tipo_desconocido']}) · {informe['segundos']} s")
+
+
+def main():
+    ap = argparse.ArgumentParser(prog="python -m turnos.importar", description="Importar fichadas de un export del reloj")
+    ap.add_argument("archivo")
+    ap.add_argument("--data", default="data")
+    ap.add_argument("--simular", action="store_true", help="informar qué importaría, sin escribir")
+    ap.add_argument("--bloque", type=int, default=BLOQUE, help="filas por bloque al leer")
+    ap.add_argument("--informe", help="guardar el informe en este JSON")
+    args = ap.parse_args()
+
+    config = leer_config()
+    credenciales = cargar_plantel(config).credenciales()
+    if not credenciales: raise SystemExit("personas.csv no tiene la columna Credencial (el id de cada persona en el reloj)")
+    informe = importar(get_backend(Path(args.data), config), args.archivo, credenciales, opciones(config), zona(config),
+                       por=f"importación {Path(args.archivo).name}", simular=args.simular, bloque=args.bloque)
+    print(("(simulado) " if args.simular else "") + resumen(informe))
+    for cred, n in informe["credenciales_desconocidas"].items(): print(f"  credencial sin persona {cred!r}: {n}")
+    if args.informe: Path(args.informe).write_text(json.dumps(informe, indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
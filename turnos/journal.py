@@ -0,0 +1,256 @@
+"""
+Journal append-only por dataset, al lado de su CSV base.
+
+    data/absences.csv                  base compactada (mismo formato de siempre)
+    data/absences.journal.csv          operaciones nuevas: columna `_op` + columnas del dataset
+    data/absences.journal.sealed.csv   journal congelado por una compactación en curso
+    data/absences.journal.lock         bloqueo de escritura (agregar / congelar el journal)
+    data/absences.compact.lock         una sola compactación a la vez, entre procesos
+
+Cada escritura agrega una línea y hace fsync: O(1) sin importar el tamaño de la base.
+La vista en memoria se arma leyendo la base y re-aplicando el journal (`load`).
+`compact()` pliega el journal en la base con reemplazo atómico; si el proceso se cae
+a mitad de camino, la próxima lectura o compactación termina el trabajo. Agregar y congelar
+el journal van bajo el mismo bloqueo: una línea nunca se escribe en un archivo que ya se
+re-aplicó, y el encabezado se escribe una sola vez.
+"""
+import csv
+import datetime as dt
+import io
+import os
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+
+OPS = ("add", "upsert", "del")
+COMPACTAR_BYTES = 256 * 1024   # compacta en segundo plano al pasar este tamaño
+
+
+class _Bloqueo:
+    """
+    Lock entre procesos: un archivo creado con O_EXCL mientras dura el bloque. Uno más viejo que
+    `abandonado` segundos quedó de un proceso caído y se descarta. TimeoutError pasada `espera`.
+    Reentrante por hilo: si el mismo hilo ya lo tiene, el bloque interno no hace nada.
+    """
+    _tenidos = threading.local()
+
+    def __init__(self, path: Path, espera: float = 30, abandonado: float = 120):
+        self.path, self.espera, self.abandonado = Path(path), espera, abandonado
+        self._propio = False
+
+    def __enter__(self):
+        tenidos = self._tenidos.__dict__.setdefault("paths", set())
+        if self.path in tenidos: return self
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        limite = time.monotonic() + self.espera
+        while True:
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.write(fd, f"{os.getpid()} {time.time():.0f}".encode()); os.close(fd)
+                tenidos.add(self.path); self._propio = True
+                return self
+            except FileExistsError:
+                try:
+                    if time.time() - self.path.stat().st_mtime > self.abandonado: self.path.unlink(missing_ok=True); continue
+                except FileNotFoundError:
+                    continue
+                if time.monotonic() > limite: raise TimeoutError(f"No se pudo tomar {self.path}")
+                time.sleep(0.05)
+
+    def __exit__(self, exc_type, exc, tb):
+        if not self._propio: return
+        self._propio = False
+        self._tenidos.paths.discard(self.path)
+        self.path.unlink(missing_ok=True)
+
+
+def _fmt(v) -> str:
+    if v is None or (not isinstance(v, str) and pd.isna(v)): return ""
+    if isinstance(v, (pd.Timestamp, dt.datetime)): return str(pd.Timestamp(v))
+    if isinstance(v, dt.date): return v.isoformat()
+    return str(v)
+
+
+def _read_csv(path: Path) -> pd.DataFrame | None:
+    """Lee un CSV ignorando una última línea incompleta (escritura cortada)."""
+    if not path.exists(): return None
+    text = path.read_text(encoding="utf-8")
+    if text and not text.endswith("\n"):
+        text = text[:text.rfind("\n") + 1]
+    if not text.strip(): return None
+    return pd.read_csv(io.StringIO(text))
+
+
+def _reparar_cola(path: Path):
+    """Trunca una última línea incompleta antes de seguir agregando (lee sólo el final)."""
+    with open(path, "rb+") as f:
+        end = f.seek(0, os.SEEK_END)
+        if end == 0: return
+        f.seek(end - 1)
+        if f.read(1) == b"\n": return
+        pos = end
+        while pos > 0:
+            start = max(0, pos - 4096)
+            f.seek(start); i = f.read(pos - start).rfind(b"\n")
+            if i >= 0:
+                f.truncate(start + i + 1); return
+            pos = start
+        f.truncate(0)
+
+
+def aplicar(df: pd.DataFrame, op: str, rows: pd.DataFrame, key: list[str] | None) -> pd.DataFrame:
+    """
+    Aplica un bloque de operaciones del mismo tipo sobre `df`:
+    - add:    agrega las filas.
+    - upsert: por `key`, la última fila reemplaza entera a las anteriores (un valor vacío también
+              pisa; quien actualiza algunas columnas manda la fila completa, ver datos._completar).
+              El orden es el de la primera aparición de cada clave; las claves vacías cuentan.
+    - del:    borra las filas de `df` que coinciden en `key` con alguna de `rows`.
+    """
+    if rows.empty: return df
+    if op == "add":
+        return rows.copy() if df.empty else pd.concat([df, rows], ignore_index=True)
+    if op == "upsert":
+        both = rows.reset_index(drop=True) if df.empty else pd.concat([df, rows], ignore_index=True)
+        orden = both.groupby(key, sort=False, dropna=False).ngroup().to_numpy()
+        ult = both.drop_duplicates(key, keep="last")
+        return ult.iloc[orden[ult.index.to_numpy()].argsort(kind="stable")].reset_index(drop=True)
+    if op == "del":
+        if df.empty: return df
+        hit = df[key].merge(rows[key].drop_duplicates().assign(_hit=True), on=key, how="left")["_hit"]
+        return df[hit.isna().to_numpy()].reset_index(drop=True)
+    raise ValueError(f"Operación de journal desconocida: {op!r}")
+
+
+class Journal:
+    def __init__(self, base: Path, cols: list[str], key: list[str] | None = None,
+                 compactar_bytes: int = COMPACTAR_BYTES):
+        self.base = Path(base)
+        self.cols = list(cols)
+        self.key = key
+        self.compactar_bytes = compactar_bytes
+        stem = self.base.with_suffix("")
+        self.path   = stem.with_name(stem.name + ".journal.csv")
+        self.sealed = stem.with_name(stem.name + ".journal.sealed.csv")
+        self.done   = stem.with_name(stem.name + ".journal.done.csv")
+        self.tmp    = self.base.with_name(self.base.name + ".tmp")
+        self.lock   = stem.with_name(stem.name + ".journal.lock")
+        self.compact_lock = stem.with_name(stem.name + ".compact.lock")
+
+    # ---------- escritura ----------
+    def append(self, op: str, rows: list[dict]):
+        """Agrega `rows` al journal con un único write + fsync."""
+        if op not in OPS: raise ValueError(f"Operación de journal desconocida: {op!r}")
+        if not rows: return
+        buf = io.StringIO()
+        w = csv.writer(buf, lineterminator="\n")
+        for r in rows:
+            w.writerow([op] + [_fmt(r.get(c)) for c in self.cols])
+        self._agregar(buf.getvalue())
+
+    def append_df(self, df: pd.DataFrame):
+        """
+        Como append("add", ...) para un DataFrame entero (importaciones). Lo escribe el writer CSV
+        de pyarrow, por columna: comillas en todos los textos y Timestamp con microsegundos, que
+        se leen igual que las líneas de append.
+        """
+        if df.empty: return
+        buf = io.BytesIO()
+        pa_csv.write_csv(pa.Table.from_pandas(df.reindex(columns=self.cols).assign(_op="add")[["_op"] + self.cols],
+                                              preserve_index=False), buf, pa_csv.WriteOptions(include_header=False))
+        self._agregar(buf.getvalue().decode("utf-8").replace("\r\n", "\n"))
+
+    def _agregar(self, texto: str):
+        with _Bloqueo(self.lock):   # compact() no puede congelar el journal mientras se escribe
+            if self.path.exists(): _reparar_cola(self.path)
+            with open(self.path, "a", newline="", encoding="utf-8") as f:
+                if f.tell() == 0:
+                    f.write(",".join(["_op"] + self.cols) + "\n")
+                f.write(texto)
+                f.flush(); os.fsync(f.fileno())
+                size = f.tell()
+        if size > self.compactar_bytes:
+            threading.Thread(target=self.compact, daemon=True).start()
+
+    def replace(self, df: pd.DataFrame):
+        """Reescribe la base completa de forma atómica y descarta el journal."""
+        with _Bloqueo(self.compact_lock), _Bloqueo(self.lock):
+            self._write_base(df)
+            for p in (self.path, self.sealed, self.done):
+                p.unlink(missing_ok=True)
+
+    def _write_tmp(self, df: pd.DataFrame):
+        with open(self.tmp, "w", newline="", encoding="utf-8") as f:
+            df.to_csv(f, index=False)
+            f.flush(); os.fsync(f.fileno())
+
+    def _write_base(self, df: pd.DataFrame):
+        self._write_tmp(df)
+        os.replace(self.tmp, self.base)
+
+    # ---------- lectura ----------
+    def exists(self) -> bool:
+        return any(p.exists() for p in (self.base, self.sealed, self.done, self.path))
+
+    def load(self) -> pd.DataFrame | None:
+        """Base + journal(es) re-aplicados, con los tipos crudos de read_csv. None si no hay nada."""
+        while True:
+            self._recuperar()
+            antes = self._estado()
+            if not self.exists(): return None
+            df = _read_csv(self.base)
+            if df is None: df = pd.DataFrame(columns=self.cols)
+            for p in (self.sealed, self.path):
+                df = self._replay(df, _read_csv(p))
+            if self._estado() == antes: return df   # si una compactación movió los archivos a mitad de la lectura, otra vez
+
+    def _estado(self) -> tuple:
+        out = []
+        for p in (self.base, self.sealed, self.done):
+            try:
+                s = p.stat(); out.append((s.st_ino, s.st_mtime_ns, s.st_size))
+            except FileNotFoundError:
+                out.append(None)
+        return tuple(out)
+
+    def _replay(self, df: pd.DataFrame, j: pd.DataFrame | None) -> pd.DataFrame:
+        if j is None or j.empty: return df
+        bloques = (j["_op"] != j["_op"].shift()).cumsum()
+        for _, run in j.groupby(bloques, sort=False):
+            df = aplicar(df, run["_op"].iloc[0], run.drop(columns="_op"), self.key)
+        return df
+
+    # ---------- compactación ----------
+    def _recuperar(self):
+        """Termina una compactación cortada: `done` marca que `tmp` ya es la base nueva."""
+        if not self.done.exists(): return
+        with _Bloqueo(self.compact_lock):
+            self._terminar()
+
+    def _terminar(self):
+        if self.done.exists():
+            if self.tmp.exists(): os.replace(self.tmp, self.base)
+            self.done.unlink(missing_ok=True)
+
+    def compact(self):
+        """Pliega el journal en la base. Las escrituras concurrentes van a un journal nuevo."""
+        try:
+            with _Bloqueo(self.compact_lock, espera=0): self._compactar()
+        except TimeoutError:
+            return   # otra compactación (de este u otro proceso) en curso: ya pliega lo que haya
+
+    def _compactar(self):
+        self._terminar()
+        if not self.sealed.exists():
+            with _Bloqueo(self.lock):
+                if not self.path.exists(): return
+                os.replace(self.path, self.sealed)
+        df = _read_csv(self.base)
+        if df is None: df = pd.DataFrame(columns=self.cols)
+        self._write_tmp(self._replay(df, _read_csv(self.sealed)))
+        os.replace(self.sealed, self.done)   # punto de commit
+        self._terminar()
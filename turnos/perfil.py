@@ -0,0 +1,205 @@
+"""
+Perfil por rerun de los caminos calientes (opt-in): en qué se va un clic lento, si en leer o
+parsear un dataset, escribirlo, generar el calendario, aplicar overrides, agregar o dibujar.
+
+    config.json "perfil": {"activo": false, "archivo": "data/metricas.jsonl", "max_mb": 5, "copias": 3}
+
+- `medir(nombre)` / `@medido(nombre)`: acumulan llamadas, ms y ms propios (sin los puntos anidados)
+  en el rerun en curso del hilo. Sin rerun abierto cuesta un ContextVar.get().
+- `PERFIL.empezar(pagina)` abre el rerun ("activo": todas las sesiones; `forzar`: sólo esta) y
+  `PERFIL.cerrar(rec)` lo devuelve resumido y lo agrega como una línea al JSONL, rotado por tamaño.
+- `python -m turnos.perfil [--desde AAAA-MM-DD] [--pagina panel]`: p50/p95 por punto del JSONL
+  (incluye los rotados), para ver qué punto empeoró sin enchufar un profiler.
+"""
+import argparse
+import contextvars
+import datetime as dt
+import functools
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+import pandas as pd
+
+DEFAULTS = {"activo": False, "archivo": "data/metricas.jsonl", "max_mb": 5, "copias": 3}
+
+_actual: contextvars.ContextVar[dict | None] = contextvars.ContextVar("perfil", default=None)
+
+
+# ================== MEDICIÓN ==================
+@contextmanager
+def medir(nombre: str):
+    rec = _actual.get()
+    if rec is None:
+        yield; return
+    pila = rec["pila"]; pila.append(0.0)
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        t1 = time.perf_counter()
+        ms, hijos = (t1 - t0) * 1000, pila.pop()
+        pila[-1] += ms; rec["fin"] = t1
+        p = rec["puntos"].get(nombre)
+        if p is None: rec["puntos"][nombre] = [1, ms, ms - hijos]
+        else: p[0] += 1; p[1] += ms; p[2] += ms - hijos
+
+
+def medido(nombre: str):
+    """Decorador: mide cada llamada como `nombre`."""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrap(*a, **k):
+            if _actual.get() is None: return fn(*a, **k)
+            with medir(nombre): return fn(*a, **k)
+        return wrap
+    return deco
+
+
+def en_curso() -> bool:
+    return _actual.get() is not None
+
+
+# ================== RERUNS ==================
+class Perfil:
+    def __init__(self):
+        self.opciones = dict(DEFAULTS)
+        self._log: logging.Logger | None = None
+        self._destino = None
+        self._lock = threading.Lock()
+
+    def configurar(self, config: dict) -> "Perfil":
+        """Opciones de config.json "perfil" (true equivale a {"activo": true})."""
+        c = config.get("perfil")
+        c = {"activo": True} if c is True else (c if isinstance(c, dict) else {})
+        self.opciones = {**DEFAULTS, **c}
+        return self
+
+    def empezar(self, pagina: str, forzar: bool = False) -> dict | None:
+        """Abre el rerun del hilo actual; None (y nada que medir) si el perfil está apagado."""
+        if not (self.opciones["activo"] or forzar):
+            _actual.set(None); return None
+        t0 = time.perf_counter()
+        rec = {"pagina": pagina, "ts": dt.datetime.now().isoformat(timespec="seconds"),
+               "t0": t0, "fin": t0, "puntos": {}, "pila": [0.0]}
+        _actual.set(rec)
+        return rec
+
+    def cerrar(self, rec: dict | None, sesion: str | None = None, interrumpido: bool = False) -> dict | None:
+        """
+        Resumen del rerun: {"ts", "sesion", "pagina", "ms", "resto", "interrumpido", "puntos": {nombre:
+        [llamadas, ms, ms propios]}}. "resto" es lo que no cae en ningún punto (widgets, Streamlit).
+        Un rerun cortado por st.rerun() se cierra al empezar el siguiente, con `interrumpido`: su
+        total llega hasta el último punto medido.
+        """
+        if rec is None: return None
+        if _actual.get() is rec: _actual.set(None)
+        total = ((rec["fin"] if interrumpido else time.perf_counter()) - rec["t0"]) * 1000
+        out = {"ts": rec["ts"], "sesion": sesion, "pagina": rec["pagina"], "ms": round(total, 2),
+               "resto": round(total - rec["pila"][0], 2), "interrumpido": interrumpido,
+               "puntos": {k: [n, round(ms, 2), round(propio, 2)] for k, (n, ms, propio) in rec["puntos"].items()}}
+        self._escribir(out)
+        return out
+
+    @contextmanager
+    def suelto(self, pagina: str, punto: str, sesion: str | None = None, forzar: bool = False, al_cerrar=None):
+        """
+        `medir(punto)` dentro del rerun en curso. Sin uno (un callback on_click, el rerun de un solo
+        fragmento) lo mide como rerun propio de `pagina`, cerrado aunque salga por st.rerun().
+        """
+        if en_curso():
+            with medir(punto): yield
+            return
+        rec = self.empezar(pagina, forzar)
+        try:
+            with medir(punto): yield
+        finally:
+            r = self.cerrar(rec, sesion)
+            if r is not None and al_cerrar is not None: al_cerrar(r)
+
+    def _escribir(self, out: dict):
+        archivo = self.opciones.get("archivo")
+        if not archivo: return
+        destino = (str(archivo), float(self.opciones["max_mb"]), int(self.opciones["copias"]))
+        with self._lock:
+            if self._destino != destino:
+                self._log = _logger(*destino); self._destino = destino
+            self._log.info(json.dumps(out, ensure_ascii=False))
+
+
+def _logger(archivo: str, max_mb: float, copias: int) -> logging.Logger:
+    log = logging.getLogger("turnos.perfil")
+    log.setLevel(logging.INFO); log.propagate = False
+    for h in list(log.handlers): log.removeHandler(h); h.close()
+    Path(archivo).parent.mkdir(parents=True, exist_ok=True)
+    h = RotatingFileHandler(archivo, maxBytes=int(max_mb * 1024 * 1024), backupCount=copias, encoding="utf-8")
+    h.setFormatter(logging.Formatter("%(message)s"))
+    log.addHandler(h)
+    return log
+
+
+PERFIL = Perfil()
+
+
+# ================== RESÚMENES ==================
+def acumular(total: dict, rerun: dict) -> dict:
+    """Suma los puntos de `rerun` a `total` ({nombre: [llamadas, ms, ms propios]}), p. ej. por sesión."""
+    for k, (n, ms, propio) in rerun["puntos"].items():
+        t = total.setdefault(k, [0, 0.0, 0.0])
+        t[0] += n; t[1] += ms; t[2] += propio
+    return total
+
+
+def desglose(puntos: dict, total_ms: float | None = None) -> pd.DataFrame:
+    """Tabla de puntos, de más a menos ms propios (con % del total si se pasa)."""
+    df = pd.DataFrame([(k, n, ms, propio) for k, (n, ms, propio) in puntos.items()],
+                      columns=["Punto", "Llamadas", "ms", "ms propios"])
+    df = df.sort_values("ms propios", ascending=False, ignore_index=True)
+    if total_ms: df["%"] = (100 * df["ms propios"] / total_ms).round(1)
+    return df.round({"ms": 1, "ms propios": 1})
+
+
+def leer(archivo: str | Path) -> list[dict]:
+    """Reruns del JSONL y de sus copias rotadas (archivo.1, archivo.2, ...), del más viejo al más nuevo."""
+    p = Path(archivo)
+    partes = sorted((x for x in p.parent.glob(p.name + ".*") if x.suffix[1:].isdigit()), key=lambda x: -int(x.suffix[1:]))
+    out = []
+    for f in [*partes, p]:
+        if not f.exists(): continue
+        with open(f, encoding="utf-8") as fh:
+            out.extend(json.loads(l) for l in fh if l.strip())
+    return out
+
+
+def resumen(reruns: list[dict]) -> pd.DataFrame:
+    """Por punto: en cuántos reruns aparece, llamadas y p50/p95 de ms propios por rerun."""
+    filas = [(k, propio, n) for r in reruns for k, (n, _, propio) in r["puntos"].items()]
+    filas += [("(resto)", r["resto"], 1) for r in reruns] + [("(total)", r["ms"], 1) for r in reruns]
+    df = pd.DataFrame(filas, columns=["Punto", "ms", "Llamadas"])
+    if df.empty: return pd.DataFrame(columns=["Punto", "Reruns", "Llamadas", "p50 ms", "p95 ms", "Total ms"])
+    g = df.groupby("Punto")
+    return pd.DataFrame({
+        "Reruns": g.size(), "Llamadas": g["Llamadas"].sum(),
+        "p50 ms": g["ms"].quantile(0.5).round(1), "p95 ms": g["ms"].quantile(0.95).round(1),
+        "Total ms": g["ms"].sum().round(1),
+    }).sort_values("Total ms", ascending=False).reset_index()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("archivo", nargs="?", default=DEFAULTS["archivo"])
+    ap.add_argument("--desde", type=dt.date.fromisoformat, default=None)
+    ap.add_argument("--pagina", default=None, help="panel, kiosco o 'fragmento <pestaña>'")
+    args = ap.parse_args()
+    reruns = [r for r in leer(args.archivo)
+              if (args.desde is None or r["ts"] >= args.desde.isoformat()) and (args.pagina is None or r["pagina"] == args.pagina)]
+    print(f"{len(reruns)} reruns en {args.archivo}")
+    if reruns: print(resumen(reruns).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Plantel: personas (personas.csv), plantillas de turno y sitios (config.json "plantel").
+
+    personas.csv   Persona,Activo,Sitio,Color,Credencial   (Sitio, Color y Credencial opcionales;
+                                                            Credencial: el id del reloj biométrico)
+    config.json    "plantel": {
+                     "plantillas": {"Mañana": ["06:00", "14:00"], ...},
+                     "sitios": {"La Lucy": {
+                        "turnos": [{"nombre": "Mañana", "plantilla": "Mañana", "titulares": ["Moira", "Brisa"]}, ...],
+                        "orden_libre": [...],        # por defecto, las personas activas del sitio
+                        "cobertura": ["Alina"]}}}    # tantos francos por día como personas de cobertura
+
+Sin "plantel" en config.json se usa el de siempre (La Lucy, ver calendario.SITIO_DEF).
+Los nombres de turno son únicos entre sitios: overrides y fichadas se siguen identificando por
+(Fecha, Turno) sin columna de sitio. Un titular inactivo deja su lugar en "⚠ Falta cubrir".
+"""
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+import pandas as pd
+
+from turnos.calendario import FALTA, HORAS_DEF, PERSONAS, SITIO_DEF, Sitio
+from turnos.cobertura import intervalo
+
+PALETA = ["#DBEAFE","#EDE9FE","#FEF3C7","#FFE4D6","#FCE7F3","#D1FAE5","#FCE7E7",
+          "#E0F2FE","#FEF9C3","#DCFCE7","#F3E8FF","#FFEDD5","#E2E8F0","#CCFBF1"]
+
+
+@dataclass(frozen=True)
+class Persona:
+    nombre: str
+    activo: bool
+    sitio: str
+    color: str
+    credencial: str = ""
+
+
+@dataclass(frozen=True)
+class Plantel:
+    personas: tuple[Persona, ...]
+    sitios: tuple[Sitio, ...]
+
+    def sitio(self, nombre: str | None = None) -> Sitio:
+        """El sitio `nombre` (el primero si no se pasa)."""
+        if nombre is None: return self.sitios[0]
+        for s in self.sitios:
+            if s.nombre == nombre: return s
+        raise KeyError(f"Sitio desconocido: {nombre!r}")
+
+    def activos(self, sitio: str | None = None) -> list[str]:
+        """Nombres de las personas activas (de `sitio`, o de todos)."""
+        return [p.nombre for p in self.personas if p.activo and (sitio is None or p.sitio == sitio)]
+
+    def credenciales(self) -> dict[str, str]:
+        """Credencial del reloj -> persona (activas o no: un export viejo puede traer bajas)."""
+        return {p.credencial: p.nombre for p in self.personas if p.credencial}
+
+    def sitio_de(self, persona: str) -> Sitio:
+        for p in self.personas:
+            if p.nombre == persona: return self.sitio(p.sitio)
+        return self.sitio()
+
+    def turnos(self) -> list[str]:
+        return [t for s in self.sitios for t in s.turnos]
+
+    def duraciones(self) -> dict[str, float]:
+        """Horas de cada turno, por nombre."""
+        return {t: (lambda a, b: (b - a) / 60)(*intervalo(*h)) for s in self.sitios for t, h in zip(s.turnos, s.horas)}
+
+    def css(self) -> str:
+        """Una clase .chip-<persona> por persona, con su color (la cobertura, con borde punteado)."""
+        cob = {p for s in self.sitios for p in s.cobertura}
+        return "\n".join(
+            f".{chip_cls(p.nombre)}{{background:{p.color}{';border:1px dashed #f472b6' if p.nombre in cob else ''}}}"
+            for p in self.personas)
+
+
+def chip_cls(nombre: str) -> str:
+    n = str(nombre).lower()
+    if "falta cubrir" in n: return "chip-warn"
+    return "chip-" + re.sub(r"[^0-9a-záéíóúñü]+", "-", n).strip("-")
+
+
+def _leer_personas(path: Path, sitio_def: str) -> pd.DataFrame:
+    df = pd.read_csv(path, dtype=str) if Path(path).exists() else pd.DataFrame({"Persona": PERSONAS})
+    df = df[df["Persona"].notna() & (df["Persona"].str.strip() != "")].copy()
+    df["Persona"] = df["Persona"].str.strip()
+    df["Activo"] = df["Activo"].fillna("True").str.strip().str.lower().isin(["true","1","si","sí"]) if "Activo" in df else True
+    df["Sitio"] = df["Sitio"].fillna(sitio_def) if "Sitio" in df else sitio_def
+    if "Color" not in df: df["Color"] = None
+    df["Color"] = [c if isinstance(c, str) and c.strip() else PALETA[i % len(PALETA)] for i, c in enumerate(df["Color"])]
+    df["Credencial"] = df["Credencial"].fillna("").str.strip() if "Credencial" in df else ""
+    return df.drop_duplicates("Persona", keep="last")
+
+
+def _sitio(nombre: str, cfg: dict, plantillas: dict, personas: pd.DataFrame) -> Sitio:
+    activos = set(personas.loc[personas["Activo"], "Persona"])
+    del_sitio = [p for p in personas.loc[personas["Activo"] & (personas["Sitio"] == nombre), "Persona"]]
+    turnos, horas, titulares = [], [], []
+    for t in cfg.get("turnos", []):
+        plantilla = t.get("plantilla", t["nombre"])
+        if plantilla not in plantillas: raise ValueError(f"{nombre}: plantilla de turno desconocida {plantilla!r}")
+        tit = (list(t.get("titulares", [])) + [FALTA, FALTA])[:2]
+        turnos.append(t["nombre"]); horas.append(tuple(plantillas[plantilla]))
+        titulares.append(tuple(p if p in activos else FALTA for p in tit))
+    orden = [p for p in cfg.get("orden_libre", del_sitio) if p in activos]
+    cobertura = [p for p in cfg.get("cobertura", []) if p in activos]
+    return Sitio(nombre, tuple(turnos), tuple(horas), tuple(titulares), tuple(orden), tuple(cobertura))
+
+
+def cargar_plantel(config: dict, personas_csv: Path = Path("personas.csv")) -> Plantel:
+    """Plantel de config.json + personas.csv. ValueError si un turno se repite entre sitios."""
+    cfg = config.get("plantel") or {}
+    sitios_cfg = cfg.get("sitios") or {}
+    sitio_def = next(iter(sitios_cfg), SITIO_DEF.nombre)
+    personas = _leer_personas(personas_csv, sitio_def)
+    if sitios_cfg:
+        plantillas = {**HORAS_DEF, **{k: tuple(v) for k, v in (cfg.get("plantillas") or {}).items()}}
+        sitios = tuple(_sitio(n, s, plantillas, personas) for n, s in sitios_cfg.items())
+    else:
+        sitios = (SITIO_DEF,)
+    vistos = {}
+    for s in sitios:
+        for t in s.turnos:
+            if t in vistos: raise ValueError(f"Turno {t!r} repetido en {vistos[t]!r} y {s.nombre!r}")
+            vistos[t] = s.nombre
+    cred = personas.loc[personas["Credencial"] != "", "Credencial"]
+    if cred.duplicated().any(): raise ValueError(f"Credencial {cred[cred.duplicated()].iloc[0]!r} repetida en personas.csv")
+    return Plantel(tuple(Persona(r.Persona, bool(r.Activo), r.Sitio, r.Color, r.Credencial) for r in personas.itertuples()), sitios)
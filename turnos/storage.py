@@ -0,0 +1,463 @@
+"""
+Backends de persistencia detrás de los load_*/save_*/append_* de la app.
+
+- CsvBackend:    los CSV de data/ con su journal append-only (ver turnos/journal.py).
+- SqliteBackend: una base SQLite en modo WAL, con índices por (Fecha, Persona) y (Fecha, Turno),
+                 transacciones para que varios kioscos escriban a la vez sin perder filas.
+
+Los backends devuelven los datos "crudos" (fechas y timestamps como texto); el parseo de tipos
+queda en los load_* de la app, igual para los dos.
+
+Elegir backend en config.json:  "storage": {"backend": "sqlite", "sqlite_path": "data/turnos.db"}
+Migrar los CSV existentes:       python -m turnos.storage migrar [--data data] [--db data/turnos.db]
+Archivo mensual (Parquet) de los meses cerrados, apagado si no está en config.json (ver turnos/archivo.py):
+                                 "storage": {..., "archivo": {"dir": "data/archivo", "datasets": ["timelog", "absences"]}}
+
+Los ids (`auto_id`) salen de una secuencia persistida por dataset (data/<archivo>.seq en CSV,
+tabla _secuencias en SQLite), que también guarda las claves de idempotencia de los últimos
+VENTANA_CLAVES segundos: asignar no lee el dataset y un id borrado no se vuelve a dar.
+"""
+import argparse
+import datetime as dt
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from turnos.journal import Journal, _Bloqueo, aplicar
+
+
+@dataclass(frozen=True)
+class Dataset:
+    archivo: str
+    cols: list
+    key: list | None = None   # clave de upsert/del
+    unico: bool = False       # la clave identifica una sola fila (upsert en SQLite vía ON CONFLICT)
+    secuencia: str | None = None   # columna de ids correlativos (append con auto_id)
+
+
+DATASETS = {
+    "overrides": Dataset("overrides.csv", ["Fecha","Turno","Persona A","Persona B","Libre"], ["Fecha","Turno"], unico=True),
+    "absences":  Dataset("absences.csv", ["Fecha","Turno","Slot","Persona","Motivo","LoggedAt"], ["Fecha","Persona"]),
+    "tasks":     Dataset("tasks.csv", ["id","Fecha","Turno","Persona","Titulo","Estado","Due","CreatedAt"], ["id"], unico=True,
+                         secuencia="id"),
+    "timelog":   Dataset("timelog.csv", ["id","Fecha","Persona","Tipo","Timestamp","Turno","Fuente"], ["id"], secuencia="id"),
+    # historial append-only de timelog: una versión por alta, corrección o eliminación (ver datos.py)
+    "fichadas_hist": Dataset("fichadas_hist.csv",
+                             ["ID","Version","Persona","Fecha","Evento","Timestamp","Turno","Fuente","Ciclo","Observaciones",
+                              "CreadoPor","CreadoEn","EditadoPor","EditadoEn",
+                              "Eliminado","EliminadoPor","EliminadoEn","MotivoEliminacion"],
+                             ["ID","Version"], unico=True),
+}
+
+
+def _iso(d: dt.date | None) -> str | None:
+    return None if d is None else d.isoformat()
+
+
+def _next_ids(df: pd.DataFrame | None, col: str, n: int, desde: int = 1) -> list[int]:
+    if df is None or df.empty or col not in df.columns:
+        start = 1
+    else:
+        _ids = pd.to_numeric(df[col], errors="coerce")
+        start = (int(_ids.max()) if _ids.notna().any() else 0) + 1
+    start = max(start, desde)
+    return list(range(start, start + n))
+
+
+# ================== SECUENCIAS E IDEMPOTENCIA ==================
+VENTANA_CLAVES = 120   # segundos en que repetir una clave no vuelve a escribir
+
+
+def _asignar(estado: dict, rows: list[dict], auto_id: str, id_desde: int, clave: str | None) -> bool:
+    """
+    Asigna ids a `rows` desde `estado` ({"ultimo": n, "claves": {clave: [creada, ids]}}), que el
+    backend persiste en la misma transacción/lock que la escritura. Si `clave` ya se usó dentro de
+    la ventana, repite aquellos ids, marca las filas con "_repetida" y devuelve False: no escribir.
+    """
+    ahora = time.time()
+    claves = {k: v for k, v in estado["claves"].items() if ahora - v[0] < VENTANA_CLAVES}
+    estado["claves"] = claves
+    if clave is not None and clave in claves:
+        for r, i in zip(rows, claves[clave][1]): r[auto_id] = i; r["_repetida"] = True
+        return False
+    start = _reservar(estado, len(rows), id_desde)
+    for i, r in enumerate(rows): r[auto_id] = start + i
+    if clave is not None: claves[clave] = [ahora, [r[auto_id] for r in rows]]
+    return True
+
+
+def _reservar(estado: dict, n: int, id_desde: int) -> int:
+    """Reserva `n` ids correlativos en `estado` y devuelve el primero."""
+    start = max(int(estado["ultimo"]) + 1, id_desde)
+    estado["ultimo"] = start + n - 1
+    return start
+
+
+class Backend:
+    indexado = False   # True si las consultas por rango no leen todo el dataset
+
+    def load(self, name: str, first: dt.date | None = None, last: dt.date | None = None) -> pd.DataFrame | None:
+        """Filas del dataset (opcionalmente sólo Fecha en first..last). None si no existe."""
+        raise NotImplementedError
+
+    def append(self, name: str, op: str, rows: list[dict], auto_id: str | None = None, id_desde: int = 1,
+               clave: str | None = None) -> list[dict]:
+        """
+        Aplica `op` (add/upsert/del; upsert reemplaza la fila entera por clave). Con `auto_id`, asigna ids correlativos a `rows` (de la secuencia
+        del dataset, nunca menos que `id_desde`) y las devuelve. Con `clave` (idempotencia), repetirla
+        dentro de VENTANA_CLAVES no escribe nada y devuelve las filas con los ids de la primera vez.
+        """
+        raise NotImplementedError
+
+    def append_lote(self, name: str, df: pd.DataFrame, auto_id: str | None = None, id_desde: int = 1) -> pd.DataFrame:
+        """
+        "add" de un DataFrame entero en una sola escritura (importaciones): sin pasar por una lista
+        de dicts. Con `auto_id`, devuelve `df` con los ids asignados (correlativos, en su orden).
+        """
+        return pd.DataFrame(self.append(name, "add", df.to_dict("records"), auto_id, id_desde), columns=df.columns)
+
+    def replace(self, name: str, df: pd.DataFrame):
+        """Reemplaza el dataset completo."""
+        raise NotImplementedError
+
+    def firma(self, name: str) -> tuple | None:
+        """Huella que cambia con cada escritura (para cachear lo parseado). None: no cacheable."""
+        return None
+
+    def por_rango(self, name: str) -> bool:
+        """True si leer first..last de `name` no lee todo el dataset (se cachea cada rango aparte)."""
+        return self.indexado
+
+    def compactar(self, name: str):
+        """Pliega las escrituras pendientes (si el backend las acumula) para que el próximo load sea barato."""
+
+    def rotar_meses_cerrados(self, hoy: dt.date) -> dict[str, dict[str, int]]:
+        """Con archivo mensual, archiva lo de meses anteriores al de `hoy` (ver turnos/archivo.py). Sin archivo, nada."""
+        return {}
+
+    def bloqueo(self, name: str) -> "_Bloqueo":
+        """Lock exclusivo sobre `name` entre procesos (leer-verificar-escribir sin pisarse entre kioscos)."""
+        raise NotImplementedError
+
+
+# ================== CSV + JOURNAL ==================
+class CsvBackend(Backend):
+    def __init__(self, data_dir: Path):
+        self.data_dir = Path(data_dir)
+        self.journals = {n: Journal(self.data_dir / d.archivo, d.cols, key=d.key) for n, d in DATASETS.items()}
+
+    def load(self, name, first=None, last=None):
+        df = self.journals[name].load()
+        if df is None or (first is None and last is None) or "Fecha" not in df: return df
+        f = df["Fecha"].astype(str)
+        mask = np.ones(len(df), dtype=bool)
+        if first is not None: mask &= (f >= _iso(first)).to_numpy()
+        if last is not None: mask &= (f <= _iso(last)).to_numpy()
+        return df[mask].reset_index(drop=True)
+
+    def append(self, name, op, rows, auto_id=None, id_desde=1, clave=None):
+        if not auto_id:
+            self.journals[name].append(op, rows); return rows
+        seq = self._secuencia(name)
+        with _Bloqueo(seq.with_name(seq.name + ".lock")):   # ids en el mismo orden que el journal
+            estado = self._estado_secuencia(name, seq, auto_id)
+            if _asignar(estado, rows, auto_id, id_desde, clave):
+                self._escribir_secuencia(seq, estado)
+                self.journals[name].append(op, rows)
+        return rows
+
+    def append_lote(self, name, df, auto_id=None, id_desde=1):
+        if not auto_id:
+            self.journals[name].append_df(df); return df
+        seq = self._secuencia(name)
+        with _Bloqueo(seq.with_name(seq.name + ".lock")):
+            estado = self._estado_secuencia(name, seq, auto_id)
+            df = df.assign(**{auto_id: np.arange(len(df), dtype="int64") + _reservar(estado, len(df), id_desde)})
+            self._escribir_secuencia(seq, estado)
+            self.journals[name].append_df(df)
+        return df
+
+    def _estado_secuencia(self, name: str, seq: Path, auto_id: str) -> dict:
+        estado = self._leer_secuencia(seq)
+        if estado is None:   # primera vez: sembrar desde el máximo guardado
+            estado = {"ultimo": _next_ids(self.journals[name].load(), auto_id, 1)[0] - 1, "claves": {}}
+        return estado
+
+    def replace(self, name, df):
+        self.journals[name].replace(df)
+        col, seq = DATASETS[name].secuencia, self._secuencia(name)
+        if col is None or not seq.exists(): return
+        with _Bloqueo(seq.with_name(seq.name + ".lock")):   # los ids del reemplazo no se vuelven a dar
+            estado = self._leer_secuencia(seq)
+            estado["ultimo"] = max(estado["ultimo"], _next_ids(df, col, 1)[0] - 1)
+            self._escribir_secuencia(seq, estado)
+
+    def _secuencia(self, name: str) -> Path:
+        return self.data_dir / f"{DATASETS[name].archivo}.seq"
+
+    @staticmethod
+    def _leer_secuencia(path: Path) -> dict | None:
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    @staticmethod
+    def _escribir_secuencia(path: Path, estado: dict):
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(estado, f); f.flush(); os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def compactar(self, name):
+        self.journals[name].compact()
+
+    def bloqueo(self, name):
+        return _Bloqueo(self.data_dir / f"{DATASETS[name].archivo}.lock")
+
+    def firma(self, name):
+        j = self.journals[name]
+        out = [str(j.base)]
+        for p in (j.base, j.sealed, j.done, j.path):
+            try:
+                s = p.stat(); out.append((s.st_mtime_ns, s.st_size))
+            except FileNotFoundError:
+                out.append(None)
+        return tuple(out)
+
+
+# ================== SQLITE (WAL) ==================
+def _q(col: str) -> str:
+    return '"' + col.replace('"', '""') + '"'
+
+
+def _sql_val(v):
+    if v is None or (not isinstance(v, str) and pd.isna(v)): return None
+    if isinstance(v, str): return v if v != "" else None
+    if isinstance(v, np.generic): v = v.item()
+    if isinstance(v, (pd.Timestamp, dt.datetime)): return str(pd.Timestamp(v))
+    if isinstance(v, dt.date): return v.isoformat()
+    return v
+
+
+def _sql_filas(df: pd.DataFrame, cols: list[str]):
+    """Tuplas de `df` en el orden de `cols`, convertidas por columna como _sql_val (sin recorrer celda por celda en Python)."""
+    out = []
+    for c in cols:
+        s = df[c] if c in df else pd.Series(None, index=df.index, dtype=object)
+        if s.dtype.kind in "iufb":
+            out.append(s.astype(object).where(s.notna(), None).to_numpy())
+        else:
+            v = s if pd.api.types.is_string_dtype(s.dtype) and s.dtype != object else s.astype(str)
+            out.append(v.astype(object).where(s.notna() & (v != ""), None).to_numpy())
+    return zip(*out)
+
+
+class SqliteBackend(Backend):
+    indexado = True
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self._local = threading.local()   # una conexión por hilo (Streamlit usa un hilo por sesión)
+        with self._tx() as c:
+            c.execute("CREATE TABLE IF NOT EXISTS _secuencias (dataset TEXT PRIMARY KEY, ultimo INTEGER NOT NULL, claves TEXT)")
+            c.execute("CREATE TABLE IF NOT EXISTS _versiones (dataset TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+            for name, d in DATASETS.items():
+                c.execute(f"CREATE TABLE IF NOT EXISTS {_q(name)} (_rowid INTEGER PRIMARY KEY AUTOINCREMENT, "
+                          + ", ".join(_q(col) for col in d.cols) + ")")
+                if "Persona" in d.cols:
+                    c.execute(f"CREATE INDEX IF NOT EXISTS {_q('ix_' + name + '_fecha_persona')} ON {_q(name)} (Fecha, Persona)")
+                if "Turno" in d.cols:
+                    c.execute(f"CREATE INDEX IF NOT EXISTS {_q('ix_' + name + '_fecha_turno')} ON {_q(name)} (Fecha, Turno)")
+                if "id" in d.cols:
+                    c.execute(f"CREATE INDEX IF NOT EXISTS {_q('ix_' + name + '_id')} ON {_q(name)} (id)")
+                if d.unico:
+                    c.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {_q('ux_' + name + '_key')} ON {_q(name)} "
+                              f"({', '.join(_q(k) for k in d.key)})")
+
+    def _conn(self) -> sqlite3.Connection:
+        c = getattr(self._local, "conn", None)
+        if c is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            c = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            c.execute("PRAGMA journal_mode=WAL")
+            c.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = c
+        return c
+
+    def _tx(self) -> "_Tx":
+        return _Tx(self._conn())
+
+    def bloqueo(self, name):
+        return _Bloqueo(self.db_path.with_name(f"{self.db_path.name}.{name}.lock"))
+
+    def firma(self, name):
+        # cada escritura suma 1 a la versión del dataset en su misma transacción (también desde otro proceso)
+        v = self._conn().execute("SELECT version FROM _versiones WHERE dataset = ?", (name,)).fetchone()
+        return (str(self.db_path), name, v[0] if v else 0)
+
+    @staticmethod
+    def _nueva_version(c: sqlite3.Connection, name: str):
+        c.execute("INSERT INTO _versiones VALUES (?, 1) ON CONFLICT (dataset) DO UPDATE SET version = version + 1", (name,))
+
+    def load(self, name, first=None, last=None):
+        d = DATASETS[name]
+        sql = f"SELECT {', '.join(_q(c) for c in d.cols)} FROM {_q(name)}"
+        where, params = [], []
+        if first is not None: where.append("Fecha >= ?"); params.append(_iso(first))
+        if last is not None: where.append("Fecha <= ?"); params.append(_iso(last))
+        if where: sql += " WHERE " + " AND ".join(where)
+        cur = self._conn().execute(sql + " ORDER BY _rowid", params)
+        return pd.DataFrame(cur.fetchall(), columns=d.cols)
+
+    def append(self, name, op, rows, auto_id=None, id_desde=1, clave=None):
+        d = DATASETS[name]
+        with self._tx() as c:
+            if auto_id:
+                fila = c.execute("SELECT ultimo, claves FROM _secuencias WHERE dataset = ?", (name,)).fetchone()
+                estado = ({"ultimo": fila[0], "claves": json.loads(fila[1] or "{}")} if fila else
+                          {"ultimo": c.execute(f"SELECT COALESCE(MAX({_q(auto_id)}), 0) FROM {_q(name)}").fetchone()[0], "claves": {}})
+                if not _asignar(estado, rows, auto_id, id_desde, clave): return rows
+                c.execute("INSERT INTO _secuencias VALUES (?, ?, ?) ON CONFLICT (dataset) "
+                          "DO UPDATE SET ultimo = excluded.ultimo, claves = excluded.claves",
+                          (name, estado["ultimo"], json.dumps(estado["claves"])))
+            vals = [[_sql_val(r.get(col)) for col in d.cols] for r in rows]
+            cols = ", ".join(_q(col) for col in d.cols)
+            marks = ", ".join("?" for _ in d.cols)
+            if op == "add":
+                c.executemany(f"INSERT INTO {_q(name)} ({cols}) VALUES ({marks})", vals)
+            elif op == "upsert" and d.unico:
+                sets = ", ".join(f"{_q(col)} = excluded.{_q(col)}" for col in d.cols if col not in d.key)
+                c.executemany(f"INSERT INTO {_q(name)} ({cols}) VALUES ({marks}) "
+                              f"ON CONFLICT ({', '.join(_q(k) for k in d.key)}) DO UPDATE SET {sets}", vals)
+            elif op == "upsert":   # sin índice único (timelog): UPDATE de la clave o, si no está, INSERT
+                resto = [i for i, col in enumerate(d.cols) if col not in d.key]
+                sets = ", ".join(f"{_q(d.cols[i])} = ?" for i in resto)
+                cond = " AND ".join(f"{_q(k)} = ?" for k in d.key)
+                for v in vals:
+                    if c.execute(f"UPDATE {_q(name)} SET {sets} WHERE {cond}",
+                                 [v[i] for i in resto] + [v[d.cols.index(k)] for k in d.key]).rowcount == 0:
+                        c.execute(f"INSERT INTO {_q(name)} ({cols}) VALUES ({marks})", v)
+            elif op == "del":
+                cond = " AND ".join(f"{_q(k)} = ?" for k in d.key)
+                c.executemany(f"DELETE FROM {_q(name)} WHERE {cond}",
+                              [[_sql_val(r.get(k)) for k in d.key] for r in rows])
+            else:
+                raise ValueError(f"Operación desconocida: {op!r}")
+            self._nueva_version(c, name)
+        return rows
+
+    def append_lote(self, name, df, auto_id=None, id_desde=1):
+        d = DATASETS[name]
+        with self._tx() as c:
+            if auto_id:
+                fila = c.execute("SELECT ultimo, claves FROM _secuencias WHERE dataset = ?", (name,)).fetchone()
+                estado = ({"ultimo": fila[0], "claves": json.loads(fila[1] or "{}")} if fila else
+                          {"ultimo": c.execute(f"SELECT COALESCE(MAX({_q(auto_id)}), 0) FROM {_q(name)}").fetchone()[0], "claves": {}})
+                df = df.assign(**{auto_id: np.arange(len(df), dtype="int64") + _reservar(estado, len(df), id_desde)})
+                c.execute("INSERT INTO _secuencias VALUES (?, ?, ?) ON CONFLICT (dataset) "
+                          "DO UPDATE SET ultimo = excluded.ultimo, claves = excluded.claves",
+                          (name, estado["ultimo"], json.dumps(estado["claves"])))
+            c.executemany(f"INSERT INTO {_q(name)} ({', '.join(_q(col) for col in d.cols)}) "
+                          f"VALUES ({', '.join('?' for _ in d.cols)})", _sql_filas(df, d.cols))
+            self._nueva_version(c, name)
+        return df
+
+    def replace(self, name, df):
+        d = DATASETS[name]
+        if d.unico:   # la tabla exige clave única: plegar duplicados como el journal
+            df = aplicar(pd.DataFrame(columns=d.cols), "upsert", df, d.key)
+        vals = [[_sql_val(v) for v in rec] for rec in df.reindex(columns=d.cols).itertuples(index=False)]
+        with self._tx() as c:
+            c.execute(f"DELETE FROM {_q(name)}")
+            c.executemany(f"INSERT INTO {_q(name)} ({', '.join(_q(col) for col in d.cols)}) "
+                          f"VALUES ({', '.join('?' for _ in d.cols)})", vals)
+            if d.secuencia:   # los ids del reemplazo no se vuelven a dar
+                c.execute("UPDATE _secuencias SET ultimo = MAX(ultimo, ?) WHERE dataset = ?",
+                          (_next_ids(df, d.secuencia, 1)[0] - 1, name))
+            self._nueva_version(c, name)
+
+
+class _Tx:
+    """Contexto `BEGIN IMMEDIATE ... COMMIT` sobre una conexión en autocommit."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+# ================== SELECCIÓN ==================
+_BACKENDS: dict[tuple, Backend] = {}
+_lock = threading.Lock()
+
+
+def leer_config(path: Path = Path("config.json")) -> dict:
+    try:
+        return json.loads(Path(path).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {}
+
+
+def get_backend(data_dir: Path = Path("data"), config: dict | None = None) -> Backend:
+    """Backend configurado en config.json; uno por proceso, compartido entre sesiones."""
+    st_cfg = (leer_config() if config is None else config).get("storage", {})
+    kind = st_cfg.get("backend", "csv")
+    if kind == "sqlite":
+        key = ("sqlite", str(Path(st_cfg.get("sqlite_path", Path(data_dir) / "turnos.db")).resolve()))
+    elif kind == "csv":
+        key = ("csv", str(Path(data_dir).resolve()))
+    else:
+        raise ValueError(f"Backend de storage desconocido: {kind!r}")
+    arch = st_cfg.get("archivo") or {}
+    if arch.get("datasets"):
+        key += (str(Path(arch.get("dir", Path(data_dir) / "archivo")).resolve()), tuple(arch["datasets"]))
+    with _lock:
+        if key not in _BACKENDS:
+            b = SqliteBackend(Path(key[1])) if kind == "sqlite" else CsvBackend(Path(key[1]))
+            if len(key) > 2:
+                from turnos.archivo import ArchivoBackend   # pyarrow sólo si se usa el archivo
+                b = ArchivoBackend(b, Path(key[2]), key[3])
+            _BACKENDS[key] = b
+        return _BACKENDS[key]
+
+
+def migrar(data_dir: Path, db_path: Path) -> dict[str, int]:
+    """Copia cada dataset CSV (base + journal) a la base SQLite, reemplazando lo que haya."""
+    csv_b, sql_b = CsvBackend(data_dir), SqliteBackend(db_path)
+    out = {}
+    for name in DATASETS:
+        df = csv_b.load(name)
+        if df is None: continue
+        sql_b.replace(name, df)
+        out[name] = len(df)
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(prog="python -m turnos.storage")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    m = sub.add_parser("migrar", help="importar los CSV de data/ a SQLite")
+    m.add_argument("--data", default="data")
+    m.add_argument("--db", default=None, help="por defecto <data>/turnos.db")
+    args = ap.parse_args()
+    if args.cmd == "migrar":
+        db = Path(args.db) if args.db else Path(args.data) / "turnos.db"
+        for name, n in migrar(Path(args.data), db).items():
+            print(f"{name}: {n} filas -> {db}")
+
+
+if __name__ == "__main__":
+    main()